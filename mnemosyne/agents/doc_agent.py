@@ -0,0 +1,24 @@
+"""Orchestrator agent answering from the ``mnemo doc`` knowledge base."""
+
+from __future__ import annotations
+
+from typing import Any, Dict
+
+from . import registry
+
+ROUTE_KEYWORDS = {
+    "knowledge base": 1.0, "documentation": 0.8, "doc": 0.8, "document": 0.8, "handbook": 0.8, "runbook": 0.8,
+    "manual": 0.6, "notes": 0.5, "guide": 0.4,
+}
+
+
+async def _handle(request: registry.AgentRequest) -> Dict[str, Any]:
+    from ..ai_rag import rag
+
+    # Retrieval runs in worker threads and the answer streams on the loop, so a
+    # timeout cancels the stream instead of leaving a thread printing tokens.
+    answer = await rag.aquery_vectorstore(request.prompt, on_token=request.on_token)
+    return {"content": [answer["result"]], "structured": {"cached": True} if answer.get("cached") else None}
+
+
+registry.register_agent("doc", _handle, ROUTE_KEYWORDS, "Questions answered from documents loaded with 'mnemo doc load'.")
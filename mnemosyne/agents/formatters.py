@@ -0,0 +1,233 @@
+"""Deterministic formatting of GitHub MCP tool results.
+
+Formatters are registered per tool name and result shape, so common
+listings render as tables without an LLM round trip. Specific formatters name
+their tools exactly, since a pattern such as ``*pull_request*`` would also
+catch get_pull_request_reviews and friends; fnmatch patterns are kept for the
+fallbacks, and anything else gets a generic table or key/value view.
+``cap_payload`` bounds what is sent to a model when the LLM pass is opted in.
+"""
+
+from __future__ import annotations
+
+import fnmatch
+import json
+import os
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+MAX_ROWS = int(os.getenv("MNEMO_FORMAT_MAX_ROWS", "50"))
+MAX_PAYLOAD_CHARS = int(os.getenv("MNEMO_FORMAT_MAX_CHARS", "12000"))
+MAX_CELL = 60
+
+Formatter = Callable[[Any], str]
+# (tool pattern, shape, formatter), most specific first.
+_registry: List[Tuple[str, str, Formatter]] = []
+
+
+def shape_of(payload: Any) -> str:
+    """'records' for a list of objects, 'search' for {items: [...]}, else 'object', 'list' or 'text'."""
+    if isinstance(payload, dict):
+        if isinstance(payload.get("items"), list):
+            return "search"
+        return "object"
+    if isinstance(payload, list):
+        return "records" if payload and all(isinstance(item, dict) for item in payload) else "list"
+    return "text"
+
+
+def register(pattern: str, shape: str) -> Callable[[Formatter], Formatter]:
+    def decorator(fn: Formatter) -> Formatter:
+        _registry.append((pattern, shape, fn))
+        return fn
+
+    return decorator
+
+
+def find(tool: str, payload: Any) -> Optional[Formatter]:
+    shape = shape_of(payload)
+    for pattern, wanted, fn in _registry:
+        if wanted == shape and fnmatch.fnmatch(tool, pattern):
+            return fn
+    return None
+
+
+def _cell(value: Any) -> str:
+    text = " ".join(str("" if value is None else value).split())
+    return text if len(text) <= MAX_CELL else text[: MAX_CELL - 1] + "…"
+
+
+def _get(item: Dict[str, Any], path: str) -> Any:
+    value: Any = item
+    for part in path.split("."):
+        if not isinstance(value, dict):
+            return None
+        value = value.get(part)
+    return value
+
+
+def table(rows: Sequence[Dict[str, Any]], columns: Sequence[Tuple[str, str]], total: Optional[int] = None) -> str:
+    """Plain-text table of ``columns`` (header, dotted key path), capped at MAX_ROWS."""
+    shown = list(rows)[:MAX_ROWS]
+    cells = [[_cell(_get(row, path)) for _, path in columns] for row in shown]
+    widths = [max([len(header)] + [len(r[i]) for r in cells]) for i, (header, _) in enumerate(columns)]
+    lines = ["  ".join(header.ljust(w) for (header, _), w in zip(columns, widths)).rstrip()]
+    lines.append("  ".join("-" * w for w in widths))
+    lines.extend("  ".join(c.ljust(w) for c, w in zip(r, widths)).rstrip() for r in cells)
+    total = len(rows) if total is None else total
+    if total > len(shown):
+        lines.append(f"… {total - len(shown)} more")
+    return "\n".join(lines)
+
+
+REPO_COLUMNS = [("repository", "full_name"), ("stars", "stargazers_count"), ("language", "language"), ("description", "description")]
+ISSUE_COLUMNS = [("#", "number"), ("state", "state"), ("title", "title"), ("author", "user.login"), ("updated", "updated_at")]
+PR_COLUMNS = [("#", "number"), ("state", "state"), ("title", "title"), ("author", "user.login"), ("head", "head.ref"), ("base", "base.ref")]
+COMMIT_COLUMNS = [("sha", "sha"), ("author", "commit.author.name"), ("date", "commit.author.date"), ("message", "commit.message")]
+BRANCH_COLUMNS = [("branch", "name"), ("sha", "commit.sha"), ("protected", "protected")]
+COMMENT_COLUMNS = [("author", "user.login"), ("created", "created_at"), ("comment", "body")]
+FILE_COLUMNS = [("file", "filename"), ("status", "status"), ("+", "additions"), ("-", "deletions")]
+
+
+def _short_shas(rows: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    return [dict(row, sha=str(row.get("sha", ""))[:7], commit=dict(row.get("commit") or {}, sha=str(_get(row, "commit.sha") or "")[:7])) for row in rows]
+
+
+@register("search_repositories", "search")
+def _repo_search(payload: Dict[str, Any]) -> str:
+    return table(payload["items"], REPO_COLUMNS, payload.get("total_count"))
+
+
+@register("search_issues", "search")
+@register("search_pull_requests", "search")
+def _issue_search(payload: Dict[str, Any]) -> str:
+    return table(payload["items"], ISSUE_COLUMNS, payload.get("total_count"))
+
+
+@register("get_issue_comments", "records")
+@register("get_pull_request_comments", "records")
+@register("get_pull_request_review_comments", "records")
+def _comments(rows: List[Dict[str, Any]]) -> str:
+    return table(rows, COMMENT_COLUMNS)
+
+
+@register("get_pull_request_files", "records")
+def _files(rows: List[Dict[str, Any]]) -> str:
+    return table(rows, FILE_COLUMNS)
+
+
+@register("list_repositories", "records")
+@register("list_user_repositories", "records")
+@register("list_org_repositories", "records")
+@register("list_starred_repositories", "records")
+def _repos(rows: List[Dict[str, Any]]) -> str:
+    return table(rows, REPO_COLUMNS)
+
+
+@register("list_pull_requests", "records")
+def _pulls(rows: List[Dict[str, Any]]) -> str:
+    return table(rows, PR_COLUMNS)
+
+
+@register("search_*", "search")
+def _search(payload: Dict[str, Any]) -> str:
+    items = payload["items"]
+    return table(items, _generic_columns(items), payload.get("total_count"))
+
+
+@register("list_issues", "records")
+@register("list_sub_issues", "records")
+def _issues(rows: List[Dict[str, Any]]) -> str:
+    return table(rows, ISSUE_COLUMNS)
+
+
+@register("list_commits", "records")
+def _commits(rows: List[Dict[str, Any]]) -> str:
+    # Subject line only; bodies belong in get_commit.
+    subjects = [dict(row, commit=dict(row.get("commit") or {}, message=str(_get(row, "commit.message") or "").split("\n", 1)[0])) for row in rows]
+    return table(_short_shas(subjects), COMMIT_COLUMNS)
+
+
+@register("list_branches", "records")
+def _branches(rows: List[Dict[str, Any]]) -> str:
+    return table(_short_shas(rows), BRANCH_COLUMNS)
+
+
+_PREFERRED_KEYS = ("number", "name", "full_name", "login", "title", "state", "path", "html_url", "updated_at", "description")
+
+
+def _generic_columns(rows: Sequence[Dict[str, Any]]) -> List[Tuple[str, str]]:
+    first = rows[0] if rows else {}
+    scalar = [k for k, v in first.items() if not isinstance(v, (dict, list))]
+    ordered = [k for k in _PREFERRED_KEYS if k in scalar] + [k for k in scalar if k not in _PREFERRED_KEYS]
+    return [(k, k) for k in ordered[:6]]
+
+
+@register("*", "records")
+def _records(rows: List[Dict[str, Any]]) -> str:
+    return table(rows, _generic_columns(rows))
+
+
+@register("*", "object")
+def _object(payload: Dict[str, Any]) -> str:
+    lines = []
+    for key, value in payload.items():
+        if isinstance(value, dict):
+            value = value.get("login") or value.get("name") or json.dumps(value, ensure_ascii=False)
+        elif isinstance(value, list):
+            value = ", ".join(_cell(v.get("name") if isinstance(v, dict) else v) for v in value[:10]) + (" …" if len(value) > 10 else "")
+        if value in (None, ""):
+            continue
+        lines.append(f"{key}: {_cell(value) if key != 'body' else value}")
+    return "\n".join(lines)
+
+
+@register("*", "list")
+def _list(items: List[Any]) -> str:
+    shown = [f"- {_cell(item)}" for item in items[:MAX_ROWS]]
+    if len(items) > MAX_ROWS:
+        shown.append(f"… {len(items) - MAX_ROWS} more")
+    return "\n".join(shown) or "(empty)"
+
+
+@register("*", "text")
+def _text(payload: Any) -> str:
+    return str(payload)
+
+
+def format_result(tool: str, content: Any) -> str:
+    """Render every payload of a tool result with its registered formatter."""
+    payloads = content if isinstance(content, list) else [content]
+    if len(payloads) > 1 and shape_of(payloads) == "records":
+        payloads = [payloads]  # several one-object contents read best as one table
+    rendered = []
+    for payload in payloads:
+        fn = find(tool, payload)
+        rendered.append(fn(payload) if fn else str(payload))
+    return "\n\n".join(rendered)
+
+
+def cap_payload(content: Any, limit: int = MAX_PAYLOAD_CHARS) -> str:
+    """JSON for ``content`` no longer than ``limit`` characters.
+
+    Lists are cut to the items that fit, with a note of how many were left
+    out; anything else is truncated. Plain strings are capped as they are,
+    without JSON quoting.
+    """
+    text = content if isinstance(content, str) else json.dumps(content, indent=1, ensure_ascii=False, default=str)
+    if len(text) <= limit:
+        return text
+    items = content.get("items") if isinstance(content, dict) else content
+    if isinstance(items, list) and items:
+        kept: List[Any] = []
+        size = 0
+        for item in items:
+            size += len(json.dumps(item, ensure_ascii=False, default=str)) + 2
+            if size > limit and kept:
+                break
+            kept.append(item)
+        capped = dict(content, items=kept) if isinstance(content, dict) else kept
+        note = f"\n[{len(items) - len(kept)} of {len(items)} items omitted to fit the size cap]"
+        text = json.dumps(capped, ensure_ascii=False, default=str)
+        if len(text) <= limit:
+            return text + note
+    return text[:limit] + f"\n[truncated {len(text) - limit} characters]"
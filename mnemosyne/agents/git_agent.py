@@ -0,0 +1,47 @@
+"""Orchestrator agent for the local git checkout (status, diff, branches)."""
+
+from __future__ import annotations
+
+import asyncio
+import os
+import re
+from typing import Any, Dict, List
+
+from . import formatters, registry
+
+ROUTE_KEYWORDS = {
+    "git status": 1.0, "working tree": 1.0, "uncommitted": 1.0, "unstaged": 1.0, "local changes": 1.0,
+    "local branch": 1.0, "staged": 0.8, "git": 0.6, "diff": 0.6, "stash": 0.6,
+}
+REPO_DIR = os.getenv("MNEMO_GIT_REPO", ".")
+
+
+_ASKS = (
+    ("status", re.compile(r"\b(status|uncommitted|unstaged|staged|working tree|local changes)\b")),
+    ("diff", re.compile(r"\bdiffs?\b")),
+    ("branches", re.compile(r"\bbranch(es)?\b")),
+)
+
+
+def _operations(prompt: str) -> List[str]:
+    """The git commands the prompt asks for; status when it names none."""
+    text = prompt.lower()
+    return [op for op, pattern in _ASKS if pattern.search(text)] or ["status"]
+
+
+async def _handle(request: registry.AgentRequest) -> Dict[str, Any]:
+    from ..mcp import git_server
+
+    impls = {"status": git_server.status_impl, "diff": git_server.diff_impl, "branches": git_server.branches_impl}
+    ops = _operations(request.prompt)
+    outputs = await asyncio.gather(*(asyncio.to_thread(impls[op], REPO_DIR) for op in ops))
+    content: List[Any] = []
+    for op, out in zip(ops, outputs):
+        text = out.get("stdout") if out.get("ok") else out.get("stderr") or out.get("error")
+        # Diffs can be arbitrarily large; keep each command's output within the usual payload cap.
+        content.append(f"$ git {op}\n{formatters.cap_payload((text or '').rstrip() or '(no output)')}")
+    return {"content": content, "structured": None}
+
+
+registry.register_agent("git", _handle, ROUTE_KEYWORDS, "The local git checkout: working tree status, diffs and branches.",
+                        timeout=float(os.getenv("MNEMO_GIT_TIMEOUT", "30")))
@@ -4,19 +4,29 @@ import asyncio
 import json
 import os
 import difflib
+from functools import lru_cache, partial
 from typing import Any, Dict, Optional, TypedDict, cast, List, Tuple
 
 from langgraph.graph import START, END, StateGraph
-from langchain_openai import AzureChatOpenAI
-from langchain_google_genai import ChatGoogleGenerativeAI
-from pydantic import SecretStr
 
-from ..mcp.github_client import list_tools as gh_list_tools, list_tools_full, call_tool as gh_call_tool
+from ..llm import TokenCallback, estimate_tokens, get_chat_model
+from ..llm_cache import acomplete
+from . import formatters
+from . import plan_steps, planner_prompt, registry, tool_selector
+from ..mcp.github_client import get_tool_catalog, list_tools_full, call_tool as gh_call_tool
+from ..mcp.tool_catalog import catalog_version
 import keyring
 
 
 GITHUB_PAT_SERVICE = "mnemosyne.github.mcp"
 
+# Weights for the orchestrator's keyword router: unambiguous terms route on
+# their own, generic ones ("tag", "release") need company.
+ROUTE_KEYWORDS = {
+    "github": 1.0, "pull request": 1.0, "pr": 0.8, "gist": 0.8, "repo": 0.6, "repository": 0.6, "issue": 0.6,
+    "commit": 0.6, "fork": 0.5, "workflow": 0.5, "actions": 0.4, "branch": 0.4, "tag": 0.4, "release": 0.4,
+}
+
 
 def _get_pat() -> str:
     pat = keyring.get_password(GITHUB_PAT_SERVICE, "pat")
@@ -25,31 +35,11 @@ def _get_pat() -> str:
     return pat
 
 
+PLANNER_TEMPERATURE = 0.0
+
+
 def _llm(provider: str) -> Tuple[Any, str]:
-    desired = (provider or "azure").lower()
-    if desired == "azure":
-        endpoint = os.getenv("AZURE_OPENAI_ENDPOINT")
-        key = os.getenv("AZURE_OPENAI_KEY")
-        if endpoint and key:
-            return (
-                AzureChatOpenAI(
-                    azure_endpoint=endpoint,
-                    api_key=SecretStr(key),
-                    api_version=os.getenv("AZURE_OPENAI_API_VERSION", "2024-12-01-preview"),
-                    model=os.getenv("AZURE_OPENAI_DEPLOYMENT", "gpt-4.1-nano"),
-                ),
-                "azure",
-            )
-        # Fall back to Gemini if Azure creds missing
-        desired = "gemini"
-    if desired == "gemini":
-        if os.getenv("GOOGLE_API_KEY"):
-            return ChatGoogleGenerativeAI(model="gemini-1.5-pro", temperature=0.2), "gemini"
-        raise RuntimeError(
-            "No LLM provider configured. Set Azure OpenAI environment variables or GOOGLE_API_KEY, "
-            "or pass --provider gemini after configuring Google Generative AI."
-        )
-    raise ValueError("provider must be 'azure' or 'gemini'")
+    return get_chat_model(provider, temperature=PLANNER_TEMPERATURE)
 
 
 class AgentState(TypedDict):
@@ -60,27 +50,39 @@ class AgentState(TypedDict):
     result: Dict[str, Any]
     trace: List[str]
     llm_provider: str
+    on_token: Optional[TokenCallback]
+    llm_format: bool
+    concurrency: int
+    planned_by: str
 
 
-async def plan_node(state: AgentState, provider: str) -> AgentState:
-    msg_llm = "GitHub: selecting LLM for planning"
-    state["trace"].append(msg_llm)
-    print(msg_llm)
+def _parse_plan(content: Any, prompt: str) -> Dict[str, Any]:
     try:
-        llm, resolved_provider = _llm(state.get("llm_provider") or provider)
-        state["llm_provider"] = resolved_provider
-        if resolved_provider != (provider or "azure").lower():
-            msg_fallback = f"GitHub: falling back to {resolved_provider} provider"
-            state["trace"].append(msg_fallback)
-            print(msg_fallback)
-    except RuntimeError as exc:
-        error_msg = f"GitHub: LLM unavailable - {exc}"
-        state["trace"].append(error_msg)
-        print(error_msg)
-        state["result"] = {"content": [str(exc)], "structured": None}
-        state["plan"] = {}
-        return state
+        return json.loads(content) if isinstance(content, str) else json.loads(content[0]["text"])  # type: ignore
+    except Exception:
+        # Fallback: naive selection
+        return {"tool": "repos.search_code", "arguments": {"query": prompt}}
 
+
+async def llm_plan(llm: Any, system: str, prompt: str) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+    """Ask the planner LLM for ``{tool, arguments}``; also returns the reported token usage, if any.
+
+    A plan answered from the response cache reports ``{"cached": True}`` as its usage.
+    """
+    completion = await acomplete(llm, [
+        ("system", system),
+        ("user", prompt),
+    ])
+    usage = {"cached": True} if completion.cached else completion.usage
+    return _parse_plan(completion.text or "{}", prompt), usage
+
+
+def _selector(pat: str, tool_map: Dict[str, Any]) -> tool_selector.ToolSelector:
+    version = get_tool_catalog().version(pat) or catalog_version(tool_map)
+    return tool_selector.get_selector(tool_map, version)
+
+
+async def plan_node(state: AgentState, provider: str) -> AgentState:
     try:
         pat = _get_pat()
     except RuntimeError as exc:
@@ -91,11 +93,10 @@ async def plan_node(state: AgentState, provider: str) -> AgentState:
         state["plan"] = {}
         return state
 
-    msg_tools = "GitHub: fetching tools and schemas from MCP"
+    msg_tools = "GitHub: loading tool catalog"
     state["trace"].append(msg_tools)
     print(msg_tools)
     try:
-        tools = await gh_list_tools(pat)
         tool_map = await list_tools_full(pat)
     except Exception as exc:
         error_msg = f"GitHub: failed to list tools - {exc}"
@@ -109,95 +110,146 @@ async def plan_node(state: AgentState, provider: str) -> AgentState:
         own, rep = _infer_owner_repo()
         state["owner"] = state.get("owner") or own
         state["repo"] = state.get("repo") or rep
-    system = (
-        "You are a planner that maps user requests to GitHub MCP tools. "
-        "Select the best tool and produce JSON with 'tool' and 'arguments'. "
-        f"Available tools: {tools}. "
-        f"If the tool requires owner/repo and user context provides it, include them."
-    )
-    msg_planning = "GitHub: prompting planner LLM"
+
+    selector = _selector(pat, tool_map)
+    local = None
+    if os.getenv("MNEMO_PLANNER_FAST_PATH", "1") != "0":
+        local = selector.select(state.get("prompt", ""), state.get("owner"), state.get("repo"))
+    if local is not None:
+        msg_local = f"GitHub: planned locally tool={local['tool']} ({local['source']}, confidence {local['confidence']})"
+        state["trace"].append(msg_local)
+        print(msg_local)
+        state["plan"] = {"tool": local["tool"], "arguments": local["arguments"]}
+        state["planned_by"] = "local"
+        return state
+
+    msg_llm = "GitHub: selecting LLM for planning"
+    state["trace"].append(msg_llm)
+    print(msg_llm)
+    try:
+        llm, resolved_provider = _llm(state.get("llm_provider") or provider)
+        state["llm_provider"] = resolved_provider
+        if resolved_provider != (provider or "azure").lower():
+            msg_fallback = f"GitHub: falling back to {resolved_provider} provider"
+            state["trace"].append(msg_fallback)
+            print(msg_fallback)
+    except RuntimeError as exc:
+        error_msg = f"GitHub: LLM unavailable - {exc}"
+        state["trace"].append(error_msg)
+        print(error_msg)
+        state["result"] = {"content": [str(exc)], "structured": None}
+        state["plan"] = {}
+        return state
+
+    system, shown = planner_prompt.build(selector, state.get("prompt", ""), state.get("owner"), state.get("repo"))
+    prompt_tokens = estimate_tokens(system) + estimate_tokens(state.get("prompt", ""))
+    msg_planning = f"GitHub: prompting planner LLM (~{prompt_tokens} prompt tokens, {len(shown)} of {len(tool_map)} tool schemas)"
     state["trace"].append(msg_planning)
     print(msg_planning)
-    msg = await llm.ainvoke([
-        ("system", system),
-        ("user", state.get("prompt", "")),
-    ])
-    content = getattr(msg, "content", "{}")
+    plan, usage = await llm_plan(llm, system, state.get("prompt", ""))
+    state["planned_by"] = "llm"
+    if usage.get("cached"):
+        msg_usage = "GitHub: planner answered from the response cache"
+        state["trace"].append(msg_usage)
+        print(msg_usage)
+    elif usage:
+        msg_usage = f"GitHub: planner used {usage.get('input_tokens', '?')} input + {usage.get('output_tokens', '?')} output tokens"
+        state["trace"].append(msg_usage)
+        print(msg_usage)
     try:
-        plan = json.loads(content) if isinstance(content, str) else json.loads(content[0]["text"])  # type: ignore
-    except Exception:
-        # Fallback: naive selection
-        plan = {"tool": "repos.search_code", "arguments": {"query": state.get("prompt", "")}}
-    msg_planned = f"GitHub: planned tool={plan.get('tool')}"
+        steps = plan_steps.normalize(plan)
+    except plan_steps.PlanError as exc:
+        error_msg = f"GitHub: invalid plan - {exc}"
+        state["trace"].append(error_msg)
+        print(error_msg)
+        state["result"] = {"content": f"The planner produced an invalid plan: {exc}", "structured": None}
+        state["plan"] = {}
+        return state
+    if len(steps) == 1:
+        msg_planned = f"GitHub: planned tool={steps[0]['tool']}"
+    else:
+        msg_planned = f"GitHub: planned {len(steps)} steps: {', '.join(s['tool'] for s in steps)}"
     state["trace"].append(msg_planned)
     print(msg_planned)
-    if plan.get("tool") not in tool_map:
-        msg_missing = f"GitHub: tool '{plan.get('tool')}' not available in GitHub MCP"
+    if any(s["tool"] not in tool_map for s in steps):
+        # The cached catalog may predate a server update; re-list once before giving up.
+        try:
+            tool_map = await list_tools_full(pat, refresh=True)
+        except Exception:
+            pass
+    unknown = next((s["tool"] for s in steps if s["tool"] not in tool_map), None)
+    if unknown is not None:
+        msg_missing = f"GitHub: tool '{unknown}' not available in GitHub MCP"
         state["trace"].append(msg_missing)
         print(msg_missing)
-        suggestions = difflib.get_close_matches(plan.get("tool"), list(tool_map.keys()), n=3)
+        suggestions = difflib.get_close_matches(unknown, list(tool_map.keys()), n=3)
         hint = (
-            f"Tool '{plan.get('tool')}' is not available."
+            f"Tool '{unknown}' is not available."
             + (f" Did you mean: {', '.join(suggestions)}?" if suggestions else " Use 'mnemo github tools' to list supported tools.")
         )
         state["result"] = {"content": hint, "structured": None}
         state["plan"] = {}
         return state
     # Autofill owner/repo if required by schema
-    input_schema = (tool_map.get(plan.get("tool"), {}) or {}).get("inputSchema") or {}
-    required = input_schema.get("required", []) if isinstance(input_schema, dict) else []
-    args = plan.get("arguments") or {}
-    if "owner" in required and not args.get("owner") and state.get("owner"):
-        args["owner"] = cast(Optional[str], state.get("owner"))
-    if "repo" in required and not args.get("repo") and state.get("repo"):
-        args["repo"] = cast(Optional[str], state.get("repo"))
-    if any(k in required for k in ("owner", "repo")):
-        msg_autofill = f"GitHub: autofilled owner={args.get('owner')} repo={args.get('repo')}"
+    autofilled = 0
+    for step in steps:
+        required = _required(tool_map, step["tool"])
+        args = step["arguments"]
+        if "owner" in required and not args.get("owner") and state.get("owner"):
+            args["owner"] = cast(Optional[str], state.get("owner"))
+        if "repo" in required and not args.get("repo") and state.get("repo"):
+            args["repo"] = cast(Optional[str], state.get("repo"))
+        autofilled += any(k in required for k in ("owner", "repo"))
+    if autofilled:
+        args = steps[0]["arguments"]
+        msg_autofill = (
+            f"GitHub: autofilled owner={args.get('owner')} repo={args.get('repo')}" if len(steps) == 1
+            else f"GitHub: autofilled owner/repo in {autofilled} of {len(steps)} steps"
+        )
         state["trace"].append(msg_autofill)
         print(msg_autofill)
-    plan["arguments"] = args
-    state["plan"] = plan
+    if len(steps) == 1:
+        state["plan"] = {"tool": steps[0]["tool"], "arguments": steps[0]["arguments"]}
+    else:
+        state["plan"] = {"steps": steps}
     return state
 
 
-def _fallback_format(content: Any) -> str:
-    if isinstance(content, str):
-        return content
-    if isinstance(content, list):
-        try:
-            return json.dumps(content, indent=2, ensure_ascii=False)
-        except TypeError:
-            return "\n".join(str(item) for item in content)
-    if isinstance(content, dict):
-        return json.dumps(content, indent=2, ensure_ascii=False)
-    return str(content)
+def _required(tool_map: Dict[str, Any], tool: str) -> List[str]:
+    input_schema = (tool_map.get(tool, {}) or {}).get("inputSchema") or {}
+    return input_schema.get("required", []) if isinstance(input_schema, dict) else []
 
 
 async def act_node(state: AgentState) -> AgentState:
     plan = state.get("plan") or {}
-    if not plan.get("tool"):
+    if not plan.get("tool") and not plan.get("steps"):
         return state
     pat = _get_pat()
-    tool = plan.get("tool") or "repos.search_code"
-    args = plan.get("arguments", {})
-    # Treat placeholders as missing
-    for key in ("owner", "repo"):
-        if key in args and isinstance(args[key], str) and args[key].strip().lower() in {"owner", "repo", "<owner>", "<repo>"}:
-            del args[key]
+    steps = plan_steps.normalize(plan)
     # Validate required arguments if schema known
     tool_map = await list_tools_full(pat)
-    input_schema = (tool_map.get(tool, {}) or {}).get("inputSchema") or {}
-    required = input_schema.get("required", []) if isinstance(input_schema, dict) else []
-    missing = [r for r in required if r not in args]
-    if missing:
+    problems = []
+    for step in steps:
+        args = step["arguments"]
+        # Treat placeholders as missing
+        for key in ("owner", "repo"):
+            if key in args and isinstance(args[key], str) and args[key].strip().lower() in {"owner", "repo", "<owner>", "<repo>"}:
+                del args[key]
+        missing = [r for r in _required(tool_map, step["tool"]) if r not in args]
+        if missing:
+            prefix = f"{step['tool']}: " if len(steps) > 1 else ""
+            problems.append(f"{prefix}missing required parameter(s): {', '.join(missing)}")
+    if problems:
         state["result"] = {
-            "content": [
-                f"missing required parameter(s): {', '.join(missing)}",
+            "content": problems + [
                 "Pass --owner and --repo flags, or run from a git repo with a GitHub origin remote, or set defaults.",
             ],
             "structured": None,
         }
         return state
+    if len(steps) > 1:
+        return await _act_steps(state, pat, steps)
+    tool, args = steps[0]["tool"], steps[0]["arguments"]
     msg_call = f"GitHub: calling MCP tool {tool}"
     state["trace"].append(msg_call)
     print(msg_call)
@@ -212,10 +264,51 @@ async def act_node(state: AgentState) -> AgentState:
     msg_finished = "GitHub: MCP call finished"
     state["trace"].append(msg_finished)
     print(msg_finished)
+    if result.get("isError"):
+        msg_error = "GitHub: MCP tool reported an error"
+        state["trace"].append(msg_error)
+        print(msg_error)
+    elif state.get("planned_by") == "llm":
+        # Successful LLM plans teach the local planner this prompt -> tool mapping;
+        # local plans are not recorded, so a wrong local guess cannot reinforce itself.
+        tool_selector.get_memory().record(state.get("prompt", ""), tool)
     state["result"] = result
     return state
 
 
+async def _act_steps(state: AgentState, pat: str, steps: List[plan_steps.Step]) -> AgentState:
+    concurrency = state.get("concurrency") or plan_steps.DEFAULT_CONCURRENCY
+    msg_call = f"GitHub: calling {len(steps)} MCP tools (concurrency {concurrency})"
+    state["trace"].append(msg_call)
+    print(msg_call)
+
+    async def call(tool: str, args: Dict[str, Any]) -> Dict[str, Any]:
+        return await gh_call_tool(pat, tool, args)
+
+    records = await plan_steps.run(steps, call, concurrency)
+    for record in records:
+        outcome = f"failed - {record['error']}" if "error" in record else "finished"
+        msg_step = f"GitHub: step {record['id']} {record['tool']} {outcome}"
+        state["trace"].append(msg_step)
+        print(msg_step)
+    state["result"] = {"content": records, "structured": None}
+    return state
+
+
+def _format_steps(records: List[Dict[str, Any]]) -> str:
+    blocks = []
+    for record in records:
+        shown = {k: v for k, v in record["arguments"].items() if k not in ("owner", "repo")}
+        where = "/".join(str(record["arguments"][k]) for k in ("owner", "repo") if record["arguments"].get(k))
+        label = " ".join(part for part in (record["tool"], where, json.dumps(shown, ensure_ascii=False) if shown else "") if part)
+        if "error" in record:
+            body = f"error: {record['error']}"
+        else:
+            body = formatters.format_result(record["tool"], record.get("content") or []) or "(no content)"
+        blocks.append(f"## {label}\n{body}")
+    return "\n\n".join(blocks)
+
+
 async def format_node(state: AgentState, provider: str) -> AgentState:
     result = state.get("result", {})
     content = result.get("content")
@@ -224,7 +317,18 @@ async def format_node(state: AgentState, provider: str) -> AgentState:
     if isinstance(content, str):
         return state
 
-    msg_format = "GitHub: formatting result with LLM"
+    tool = (state.get("plan") or {}).get("tool") or ""
+    step_records = (state.get("plan") or {}).get("steps") and all(isinstance(r, dict) and "tool" in r for r in content)
+    render = _format_steps if step_records else partial(formatters.format_result, tool)
+    if not state.get("llm_format"):
+        state["result"]["content"] = render(content)
+        msg_local = "GitHub: formatted result locally"
+        state["trace"].append(msg_local)
+        print(msg_local)
+        return state
+
+    data_str = formatters.cap_payload(content)
+    msg_format = f"GitHub: formatting result with LLM (~{estimate_tokens(data_str)} payload tokens)"
     state["trace"].append(msg_format)
     print(msg_format)
 
@@ -236,7 +340,7 @@ async def format_node(state: AgentState, provider: str) -> AgentState:
         fallback_msg = f"GitHub: formatting fallback - {exc}"
         state["trace"].append(fallback_msg)
         print(fallback_msg)
-        state["result"]["content"] = _fallback_format(content)
+        state["result"]["content"] = render(content)
         return state
 
     system = (
@@ -245,22 +349,18 @@ async def format_node(state: AgentState, provider: str) -> AgentState:
         "Use bullet points, numbered lists, or short paragraphs as appropriate. "
         "Keep it concise but informative."
     )
-    data_str = json.dumps(content, indent=2, ensure_ascii=False)
-    msg = await llm.ainvoke([
+    on_token = state.get("on_token")
+    formatted = await acomplete(llm, [
         ("system", system),
         ("user", f"Format this data in a human-friendly way:\n{data_str}"),
-    ])
-    formatted = getattr(msg, "content", None)
-    if isinstance(formatted, str):
-        state["result"]["content"] = formatted
-    elif isinstance(formatted, list):
-        state["result"]["content"] = "\n".join(str(part) for part in formatted)
-    else:
-        state["result"]["content"] = _fallback_format(content)
+    ], on_token)
+    state["result"]["content"] = formatted.text or render(content)
 
     msg_done = "GitHub: formatting completed"
     state["trace"].append(msg_done)
-    print(msg_done)
+    if on_token is None:
+        # While streaming, the caller is still rendering the result block.
+        print(msg_done)
     return state
 
 
@@ -286,8 +386,23 @@ def build_graph(provider: str):
     return g.compile()
 
 
-async def run_agent(prompt: str, provider: str = "azure", owner: Optional[str] = None, repo: Optional[str] = None, trace: Optional[List[str]] = None) -> Dict[str, Any]:
-    graph = build_graph(provider)
+@lru_cache(maxsize=None)
+def get_graph(provider: str):
+    """Compiled GitHub agent graph for ``provider``, built once per process."""
+    return build_graph(provider)
+
+
+async def run_agent(prompt: str, provider: str = "azure", owner: Optional[str] = None, repo: Optional[str] = None, trace: Optional[List[str]] = None,
+                    on_token: Optional[TokenCallback] = None, llm_format: Optional[bool] = None,
+                    concurrency: Optional[int] = None) -> Dict[str, Any]:
+    """Plan, call and format one GitHub request.
+
+    Multi-step plans run at most ``concurrency`` tool calls at once (default:
+    MNEMO_GITHUB_CONCURRENCY). Results are formatted locally unless
+    ``llm_format`` (default: MNEMO_LLM_FORMAT=1) asks for an LLM pass, whose
+    answer ``on_token`` receives as it streams.
+    """
+    graph = get_graph((provider or "azure").lower())
     state: AgentState = {
         "prompt": prompt,
         "owner": owner,
@@ -296,11 +411,26 @@ async def run_agent(prompt: str, provider: str = "azure", owner: Optional[str] =
         "result": {},
         "trace": trace or [],
         "llm_provider": (provider or "azure").lower(),
+        "on_token": on_token,
+        "llm_format": os.getenv("MNEMO_LLM_FORMAT") == "1" if llm_format is None else llm_format,
+        "concurrency": concurrency or plan_steps.DEFAULT_CONCURRENCY,
+        "planned_by": "",
     }
     final = await graph.ainvoke(state)
     return final.get("result", {})
 
 
+async def _handle(request: registry.AgentRequest) -> Dict[str, Any]:
+    return await run_agent(request.prompt, provider=request.provider, owner=request.owner, repo=request.repo,
+                           trace=request.trace, on_token=request.on_token)
+
+
+registry.register_agent(
+    "github", _handle, ROUTE_KEYWORDS, "GitHub repositories, issues, pull requests, branches, releases and Actions workflows.",
+    timeout=float(os.getenv("MNEMO_GITHUB_TIMEOUT", "90")),
+)
+
+
 def _infer_owner_repo() -> tuple[Optional[str], Optional[str]]:
     import subprocess, re
     try:
@@ -3,13 +3,16 @@ from __future__ import annotations
 import asyncio
 import json
 import os
+from functools import lru_cache
 from typing import Any, Dict, Optional, TypedDict, List
 
 from langgraph.graph import START, END, StateGraph
-from langchain_openai import AzureChatOpenAI
-from langchain_google_genai import ChatGoogleGenerativeAI
 
-from .github_agent import run_agent as run_github_agent
+from ..llm import TokenCallback, get_chat_model
+from ..llm_cache import acomplete
+from . import registry, router
+# Importing the agents registers them (and their routes) with the registry.
+from . import doc_agent, git_agent, github_agent  # noqa: F401
 
 
 class OrchestratorState(TypedDict):
@@ -18,108 +21,96 @@ class OrchestratorState(TypedDict):
     owner: Optional[str]
     repo: Optional[str]
     route: str
+    routes: List[str]
     result: Dict[str, Any]
     trace: List[str]
+    on_token: Optional[TokenCallback]
+
+
+ROUTER_TEMPERATURE = 0.0
 
 
 def _llm(provider: str):
-    provider = (provider or "azure").lower()
-    if provider == "azure":
-        from pydantic import SecretStr
-
-        endpoint = os.getenv("AZURE_OPENAI_ENDPOINT")
-        key = os.getenv("AZURE_OPENAI_KEY")
-        if endpoint and key:
-            return AzureChatOpenAI(
-                azure_endpoint=endpoint,
-                api_key=SecretStr(key),
-                api_version=os.getenv("AZURE_OPENAI_API_VERSION", "2024-12-01-preview"),
-                model=os.getenv("AZURE_OPENAI_DEPLOYMENT", "gpt-4.1-nano"),
-                temperature=0.0,
-            )
-        provider = "gemini"
-    if provider == "gemini":
-        if os.getenv("GOOGLE_API_KEY"):
-            return ChatGoogleGenerativeAI(model="gemini-1.5-pro", temperature=0.0)
-        raise RuntimeError(
-            "Router LLM unavailable. Set Azure OpenAI environment variables or GOOGLE_API_KEY, "
-            "or pass --provider gemini after configuring Google Generative AI."
-        )
-    raise ValueError("provider must be 'azure' or 'gemini'")
+    llm, _ = get_chat_model(provider, temperature=ROUTER_TEMPERATURE)
+    return llm
+
+
+def _record(state: OrchestratorState, message: str) -> None:
+    state["trace"].append(message)
+    print(message)
+
+
+def _set_routes(state: OrchestratorState, routes: List[str]) -> None:
+    state["routes"] = routes
+    state["route"] = routes[0] if routes else router.DEFAULT_ROUTE
+
+
+def _parse_routes(text: str) -> List[str]:
+    try:
+        data = json.loads(text or "{}")
+    except Exception:
+        return []
+    routes = data.get("routes", [data.get("route")]) if isinstance(data, dict) else []
+    if isinstance(routes, str):
+        routes = [routes]
+    return [r for r in routes or [] if isinstance(r, str) and registry.get_agent(r) is not None]
 
 
 async def classify_node(state: OrchestratorState) -> OrchestratorState:
-    # Heuristic first pass to keep routing snappy and obvious
-    text = state["prompt"].lower()
-    heuristics = ["git ", "github", "commit", "pull request", "pr ", "issue", "workflow", "actions", "repo", "branch", "tag", "release"]
-    for h in heuristics:
-        if h in text:
-            state["route"] = "github"
-            msg = f"Orchestrator: heuristic match '{h.strip()}' → route=github"
-            state["trace"].append(msg)
-            print(msg)
-            return state
+    # Keyword routing first to keep obvious prompts snappy; the LLM decides the rest.
+    keywords = router.get_router()
+    several = keywords.matching(state["prompt"])
+    if len(several) > 1:
+        _set_routes(state, several)
+        _record(state, f"Orchestrator: keyword match for several agents → routes={', '.join(several)}")
+        return state
+    decision = keywords.route(state["prompt"])
+    if decision is not None:
+        _set_routes(state, [decision.route])
+        _record(state, f"Orchestrator: keyword match {', '.join(repr(m) for m in decision.matches)} "
+                       f"(confidence {decision.confidence:.2f}) → route={decision.route}")
+        return state
+    guess = keywords.score(state["prompt"])
     try:
         llm = _llm(state.get("provider", "azure"))
     except RuntimeError as exc:
-        msg_error = f"Orchestrator: LLM router unavailable - {exc}. Defaulting to route=default"
-        state["trace"].append(msg_error)
-        print(msg_error)
-        state["route"] = "default"
+        # Without an LLM, a weak keyword guess still beats the echo agent.
+        _set_routes(state, [] if guess.route == router.DEFAULT_ROUTE else [guess.route])
+        _record(state, f"Orchestrator: LLM router unavailable - {exc}. Using keyword guess route={state['route']}")
         return state
-    system = (
-        "You are a router. Respond with a single JSON object {route: 'github'|'default'}. "
-        "If the user asks anything about GitHub repos/issues/PRs/actions, pick 'github'."
-    )
-    msg_llm = "Orchestrator: analyzing prompt via LLM router"
-    state["trace"].append(msg_llm)
-    print(msg_llm)
-    msg = await llm.ainvoke([("system", system), ("user", state["prompt"])])
-    content = getattr(msg, "content", "{}")
-    try:
-        data = json.loads(content) if isinstance(content, str) else json.loads(content[0]["text"])  # type: ignore
-        route = data.get("route", "default")
-    except Exception:
-        route = "default"
-    state["route"] = route
-    msg_route = f"Orchestrator: route={route}"
-    state["trace"].append(msg_route)
-    print(msg_route)
+    _record(state, "Orchestrator: analyzing prompt via LLM router")
+    completion = await acomplete(llm, [("system", keywords.llm_prompt()), ("user", state["prompt"])])
+    _set_routes(state, _parse_routes(completion.text))
+    _record(state, f"Orchestrator: routes={', '.join(state['routes']) or router.DEFAULT_ROUTE}"
+                   + (" (cached)" if completion.cached else ""))
     return state
 
 
 async def act_node(state: OrchestratorState) -> OrchestratorState:
-    if state.get("route") == "github":
-        msg_delegate = "Orchestrator: delegating to GitHub agent"
-        state["trace"].append(msg_delegate)
-        print(msg_delegate)
-        # Pass the same trace list into the GitHub agent so it can append its steps
-        try:
-            res = await run_github_agent(
-                state["prompt"],
-                provider=state.get("provider", "azure"),
-                owner=state.get("owner"),
-                repo=state.get("repo"),
-                trace=state["trace"],
-            )
-            state["result"] = res
-            return state
-        except RuntimeError as exc:
-            msg_error = f"Orchestrator: GitHub agent error - {exc}"
-            state["trace"].append(msg_error)
-            print(msg_error)
-            state["result"] = {"content": [str(exc)], "structured": None}
-            return state
-        except Exception as exc:
-            msg_error = f"Orchestrator: unexpected GitHub agent failure - {exc}"
-            state["trace"].append(msg_error)
-            print(msg_error)
-            state["result"] = {"content": ["GitHub agent failed.", str(exc)], "structured": None}
-            return state
-    msg_echo = "Orchestrator: no matching agent, default echo"
-    state["trace"].append(msg_echo)
-    print(msg_echo)
-    state["result"] = {"content": ["No matching agent. Echo:", state["prompt"]], "structured": None}
+    names = [name for name in state.get("routes") or [] if registry.get_agent(name) is not None]
+    if not names:
+        _record(state, "Orchestrator: no matching agent, default echo")
+        state["result"] = {"content": ["No matching agent. Echo:", state["prompt"]], "structured": None}
+        return state
+    _record(state, f"Orchestrator: delegating to {' + '.join(names)} agent{'s in parallel' if len(names) > 1 else ''}")
+    request = registry.AgentRequest(
+        state["prompt"], provider=state.get("provider", "azure"), owner=state.get("owner"), repo=state.get("repo"),
+        # The agents append their own steps to the shared trace.
+        trace=state["trace"], on_token=state.get("on_token"),
+    )
+    # Each of several agents gets its own ask ("show git status" / "list open issues"), not the whole prompt.
+    prompts = router.get_router().split(state["prompt"], names) if len(names) > 1 else None
+    records = await registry.dispatch(names, request, prompts)
+    for record in records:
+        if "error" in record:
+            _record(state, f"Orchestrator: {record['agent']} agent error - {record['error']}")
+        elif len(records) > 1:
+            _record(state, f"Orchestrator: {record['agent']} agent finished in {record['elapsed_ms']} ms")
+    if len(records) == 1:
+        record = records[0]
+        state["result"] = record.get("result") or {"content": [f"{record['agent']} agent failed.", record.get("error", "")], "structured": None}
+    else:
+        state["result"] = registry.merge(records)
     return state
 
 
@@ -140,8 +131,17 @@ def build_graph():
     return g.compile()
 
 
-async def run_orchestrator(prompt: str, provider: str = "azure", owner: Optional[str] = None, repo: Optional[str] = None) -> Dict[str, Any]:
-    graph = build_graph()
-    state: OrchestratorState = {"prompt": prompt, "provider": provider, "owner": owner, "repo": repo, "route": "", "result": {}, "trace": []}
+@lru_cache(maxsize=None)
+def get_graph():
+    """Compiled orchestrator graph, built once per process."""
+    return build_graph()
+
+
+async def run_orchestrator(prompt: str, provider: str = "azure", owner: Optional[str] = None, repo: Optional[str] = None,
+                           on_token: Optional[TokenCallback] = None) -> Dict[str, Any]:
+    graph = get_graph()
+    state: OrchestratorState = {
+        "prompt": prompt, "provider": provider, "owner": owner, "repo": repo, "route": "", "routes": [], "result": {}, "trace": [], "on_token": on_token,
+    }
     final = await graph.ainvoke(state)
     return {"trace": final.get("trace", []), "result": final.get("result", {})}
@@ -0,0 +1,150 @@
+"""Multi-step GitHub plans.
+
+A plan is either a single ``{tool, arguments}`` call or ``{steps: [...]}``
+where each step has an ``id``, ``tool``, ``arguments`` and optional ``after``
+list of step ids it must wait for. A string argument ``"$<id>.<path>"`` is
+replaced by that field of the earlier step's first result payload (dotted
+keys and list indexes, e.g. ``$s1.items.0.number``). Independent steps run
+concurrently up to a limit.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import os
+import re
+from typing import Any, Awaitable, Callable, Dict, List
+
+DEFAULT_CONCURRENCY = int(os.getenv("MNEMO_GITHUB_CONCURRENCY", "4"))
+MAX_STEPS = int(os.getenv("MNEMO_GITHUB_MAX_STEPS", "20"))
+
+_REF = re.compile(r"^\$([\w-]+)\.(.+)$")
+
+Step = Dict[str, Any]
+Call = Callable[[str, Dict[str, Any]], Awaitable[Dict[str, Any]]]
+
+
+class PlanError(ValueError):
+    pass
+
+
+def normalize(plan: Dict[str, Any]) -> List[Step]:
+    """The steps of ``plan``, with ids, argument dicts and ``after`` lists filled in."""
+    raw = plan.get("steps") if isinstance(plan.get("steps"), list) else [plan] if plan.get("tool") else []
+    steps: List[Step] = []
+    for i, item in enumerate(raw, 1):
+        if not isinstance(item, dict) or not item.get("tool"):
+            raise PlanError(f"step {i} has no tool")
+        after = item.get("after") or []
+        steps.append({
+            "id": str(item.get("id") or f"s{i}"),
+            "tool": str(item["tool"]),
+            "arguments": dict(item.get("arguments") or {}),
+            "after": [str(a) for a in (after if isinstance(after, list) else [after])],
+        })
+    validate(steps)
+    return steps
+
+
+def _refs(value: Any) -> List[str]:
+    if isinstance(value, str):
+        m = _REF.match(value)
+        return [m.group(1)] if m else []
+    if isinstance(value, dict):
+        return [r for v in value.values() for r in _refs(v)]
+    if isinstance(value, list):
+        return [r for v in value for r in _refs(v)]
+    return []
+
+
+def dependencies(step: Step) -> List[str]:
+    """Step ids ``step`` waits for: its ``after`` list plus any ids its arguments reference."""
+    deps = list(step["after"])
+    deps.extend(r for r in _refs(step["arguments"]) if r not in deps)
+    return deps
+
+
+def validate(steps: List[Step]) -> None:
+    """Raise PlanError for duplicate ids, unknown dependencies, cycles or too many steps."""
+    if len(steps) > MAX_STEPS:
+        raise PlanError(f"plan has {len(steps)} steps; the limit is {MAX_STEPS}")
+    ids = [s["id"] for s in steps]
+    if len(set(ids)) != len(ids):
+        raise PlanError("plan repeats a step id")
+    deps = {s["id"]: dependencies(s) for s in steps}
+    for sid, wanted in deps.items():
+        unknown = [d for d in wanted if d not in deps]
+        if unknown:
+            raise PlanError(f"step {sid} depends on unknown step(s): {', '.join(unknown)}")
+    done: set = set()
+    pending = dict(deps)
+    while pending:
+        ready = [sid for sid, wanted in pending.items() if all(d in done for d in wanted)]
+        if not ready:
+            raise PlanError(f"plan has a dependency cycle between: {', '.join(pending)}")
+        for sid in ready:
+            done.add(sid)
+            del pending[sid]
+
+
+def _lookup(payload: Any, path: str) -> Any:
+    value = payload
+    for part in path.split("."):
+        if isinstance(value, list) and part.isdigit() and int(part) < len(value):
+            value = value[int(part)]
+        elif isinstance(value, dict) and part in value:
+            value = value[part]
+        else:
+            raise PlanError(f"no field '{path}' in the referenced result")
+    return value
+
+
+def resolve(value: Any, outputs: Dict[str, Dict[str, Any]]) -> Any:
+    """``value`` with every ``$id.path`` string replaced from earlier step results."""
+    if isinstance(value, str):
+        m = _REF.match(value)
+        if not m:
+            return value
+        content = (outputs.get(m.group(1)) or {}).get("content")
+        payload = content[0] if isinstance(content, list) and content else content
+        return _lookup(payload, m.group(2))
+    if isinstance(value, dict):
+        return {k: resolve(v, outputs) for k, v in value.items()}
+    if isinstance(value, list):
+        return [resolve(v, outputs) for v in value]
+    return value
+
+
+async def run(steps: List[Step], call: Call, concurrency: int = DEFAULT_CONCURRENCY) -> List[Dict[str, Any]]:
+    """Run ``steps`` as soon as their dependencies finish, at most ``concurrency`` at a time.
+
+    Returns one record per step, in plan order, with either ``content`` and
+    ``structured`` or an ``error``. Steps whose dependencies failed are not run.
+    """
+    limit = asyncio.Semaphore(max(1, concurrency))
+    outputs: Dict[str, Dict[str, Any]] = {}
+    tasks: Dict[str, asyncio.Task] = {}
+
+    async def run_one(step: Step) -> Dict[str, Any]:
+        record: Dict[str, Any] = {"id": step["id"], "tool": step["tool"], "arguments": step["arguments"]}
+        wanted = dependencies(step)
+        if wanted:
+            await asyncio.gather(*(tasks[d] for d in wanted))
+        failed = [d for d in wanted if "error" in outputs[d]]
+        if failed:
+            record["error"] = f"skipped: step(s) {', '.join(failed)} failed"
+            outputs[step["id"]] = record
+            return record
+        try:
+            record["arguments"] = resolve(step["arguments"], outputs)
+            async with limit:
+                result = await call(step["tool"], record["arguments"])
+            record.update(content=result.get("content"), structured=result.get("structured"))
+        except Exception as exc:
+            record["error"] = str(exc)
+        outputs[step["id"]] = record
+        return record
+
+    for step in steps:
+        tasks[step["id"]] = asyncio.create_task(run_one(step))
+    return list(await asyncio.gather(*tasks.values()))
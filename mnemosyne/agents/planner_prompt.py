@@ -0,0 +1,82 @@
+"""System prompt for the GitHub planner.
+
+Only the tools most relevant to the request are listed, each as a one-line
+signature compressed from its ``inputSchema`` (``*`` marks required
+parameters), so the model sees what it must fill in without the whole
+catalog. When nothing matches well, the remaining tool names are appended
+so the model can still pick any tool.
+"""
+
+from __future__ import annotations
+
+import os
+from typing import Any, Dict, List, Optional, Tuple
+
+from .tool_selector import ToolSelector
+
+TOP_N = int(os.getenv("MNEMO_PLANNER_TOP_TOOLS", "12"))
+MAX_DESCRIPTION = 100
+MAX_ENUM = 6
+
+PREAMBLE = (
+    "You are a planner that maps user requests to GitHub MCP tools. "
+    "Select the best tool and produce JSON with 'tool' and 'arguments'. "
+    "If the request needs several calls (e.g. the same listing across repositories), produce "
+    "{\"steps\": [{\"id\": \"s1\", \"tool\": ..., \"arguments\": {...}, \"after\": []}, ...]} instead; "
+    "steps without 'after' run in parallel, and a string argument \"$s1.field.0.name\" takes a value from step s1's result. "
+    "Fill every parameter marked * and use the exact parameter names shown."
+)
+
+
+def _type_of(spec: Dict[str, Any]) -> str:
+    enum = spec.get("enum")
+    if isinstance(enum, list) and enum:
+        shown = "|".join(str(v) for v in enum[:MAX_ENUM])
+        return shown + ("|…" if len(enum) > MAX_ENUM else "")
+    kind = spec.get("type")
+    if isinstance(kind, list):
+        kind = "|".join(str(k) for k in kind if k != "null")
+    if kind == "array":
+        items = spec.get("items") if isinstance(spec.get("items"), dict) else {}
+        return f"{_type_of(items) if items else 'any'}[]"
+    return {"string": "str", "integer": "int", "number": "num", "boolean": "bool"}.get(str(kind), str(kind or "any"))
+
+
+def compact_schema(schema: Any) -> str:
+    """``owner*: str, state: OPEN|CLOSED, perPage: num`` for a JSON Schema object; required first."""
+    if not isinstance(schema, dict):
+        return ""
+    props = schema.get("properties") if isinstance(schema.get("properties"), dict) else {}
+    required = [r for r in schema.get("required") or [] if isinstance(r, str)]
+    names = required + [n for n in props if n not in required]
+    return ", ".join(
+        f"{name}{'*' if name in required else ''}: {_type_of(props.get(name) or {})}" for name in names
+    )
+
+
+def _summary(description: Any) -> str:
+    text = " ".join(str(description or "").split())
+    first = text.split(". ", 1)[0].rstrip(".")
+    return first if len(first) <= MAX_DESCRIPTION else first[: MAX_DESCRIPTION - 1] + "…"
+
+
+def tool_line(name: str, meta: Any) -> str:
+    meta = meta if isinstance(meta, dict) else {}
+    summary = _summary(meta.get("description"))
+    return f"- {name}({compact_schema(meta.get('inputSchema'))})" + (f": {summary}" if summary else "")
+
+
+def build(selector: ToolSelector, prompt: str, owner: Optional[str] = None, repo: Optional[str] = None,
+          top_n: int = TOP_N) -> Tuple[str, List[str]]:
+    """The planner system prompt for ``prompt`` and the tools it describes in full."""
+    ranked = selector.rank(prompt)
+    shown = [name for name, _, _ in ranked[:top_n]]
+    lines = [PREAMBLE, "", "Relevant tools:"]
+    lines.extend(tool_line(name, selector.tools.get(name)) for name in shown)
+    if not ranked or ranked[0][1] < selector.threshold:
+        rest = [name for name, _, _ in ranked[top_n:]]
+        if rest:
+            lines.append(f"Other tools (ask for one only if none above fits): {', '.join(rest)}")
+    if owner or repo:
+        lines.extend(["", f"Context: owner={owner or '?'} repo={repo or '?'}. Use them when a tool needs owner/repo."])
+    return "\n".join(lines), shown
@@ -0,0 +1,113 @@
+"""Agents the orchestrator can route prompts to.
+
+Each agent registers an async handler together with its routing keywords, so
+adding an agent is a single ``register_agent`` call in the agent's module.
+When a prompt concerns several agents they run concurrently, each under its
+own timeout, and their results are merged into one answer; a slow or failing
+agent costs its own section, not the whole reply.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import os
+import time
+from dataclasses import dataclass, field, replace
+from typing import Any, Awaitable, Callable, Dict, List, Mapping, Optional
+
+from ..llm import TokenCallback
+from . import router
+
+DEFAULT_TIMEOUT = float(os.getenv("MNEMO_AGENT_TIMEOUT", "60"))
+
+
+@dataclass
+class AgentRequest:
+    prompt: str
+    provider: str = "azure"
+    owner: Optional[str] = None
+    repo: Optional[str] = None
+    trace: List[str] = field(default_factory=list)
+    on_token: Optional[TokenCallback] = None
+
+
+Handler = Callable[[AgentRequest], Awaitable[Dict[str, Any]]]
+
+
+@dataclass
+class Agent:
+    name: str
+    handler: Handler
+    description: str = ""
+    timeout: float = DEFAULT_TIMEOUT
+
+
+_agents: Dict[str, Agent] = {}
+
+
+def register_agent(name: str, handler: Handler, keywords: Mapping[str, float], description: str = "",
+                   timeout: Optional[float] = None) -> Agent:
+    """Make ``handler`` reachable from the orchestrator under the route ``name``."""
+    agent = _agents[name] = Agent(name, handler, description, DEFAULT_TIMEOUT if timeout is None else timeout)
+    router.register_route(name, keywords, description)
+    return agent
+
+
+def get_agent(name: str) -> Optional[Agent]:
+    return _agents.get(name)
+
+
+def agent_names() -> List[str]:
+    return list(_agents)
+
+
+async def _run_one(agent: Agent, request: AgentRequest) -> Dict[str, Any]:
+    start = time.perf_counter()
+    record: Dict[str, Any] = {"agent": agent.name}
+    try:
+        record["result"] = await asyncio.wait_for(agent.handler(request), agent.timeout)
+    except asyncio.TimeoutError:
+        record["error"] = f"timed out after {agent.timeout:g}s"
+    except Exception as exc:
+        record["error"] = str(exc) or type(exc).__name__
+    record["elapsed_ms"] = round((time.perf_counter() - start) * 1000, 1)
+    return record
+
+
+async def dispatch(names: List[str], request: AgentRequest,
+                   prompts: Optional[Mapping[str, str]] = None) -> List[Dict[str, Any]]:
+    """Run the named agents concurrently; one record per agent, in ``names`` order.
+
+    Each record has ``agent`` and ``elapsed_ms`` plus either ``result`` or
+    ``error``. ``prompts`` gives an agent its own part of the prompt instead
+    of the whole request (see ``KeywordRouter.split``). Only a lone agent
+    receives ``on_token``, so parallel answers never interleave on the
+    terminal.
+    """
+    agents = [_agents[name] for name in names if name in _agents]
+    if len(agents) > 1 and request.on_token is not None:
+        request = replace(request, on_token=None)
+    prompts = prompts or {}
+    return list(await asyncio.gather(*(
+        _run_one(agent, replace(request, prompt=prompts[agent.name]) if agent.name in prompts else request)
+        for agent in agents
+    )))
+
+
+def merge(records: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """One ``{content, structured}`` result with a titled section per agent."""
+    content: List[Any] = []
+    structured: Dict[str, Any] = {}
+    for record in records:
+        name = record["agent"]
+        if "error" in record:
+            content.append(f"## {name}\n{name} agent failed: {record['error']}")
+            continue
+        result = record.get("result") or {}
+        body = result.get("content")
+        items = body if isinstance(body, list) else ([] if body in (None, "") else [body])
+        content.append(f"## {name}")
+        content.extend(items)
+        if result.get("structured") not in (None, {}):
+            structured[name] = result["structured"]
+    return {"content": content, "structured": structured or None}
@@ -0,0 +1,238 @@
+"""Keyword routing for the orchestrator.
+
+Agents register a route with weighted keywords. All keywords are compiled
+into one regular expression with word boundaries (so "tag" does not match
+inside "stage", while plurals such as "issues" and "repositories" still match), and a
+prompt is scored per route by the weights of the distinct keywords it
+contains. The confidence of the best route shrinks when another route scores
+close to it; below the threshold the orchestrator asks the LLM router instead.
+"""
+
+from __future__ import annotations
+
+import os
+import re
+import statistics
+import time
+from dataclasses import dataclass, field
+from typing import Dict, List, Mapping, Optional, Sequence, Tuple
+
+DEFAULT_THRESHOLD = float(os.getenv("MNEMO_ROUTER_THRESHOLD", "0.5"))
+DEFAULT_ROUTE = "default"
+# Conjunctions that separate the asks of a prompt for several agents.
+_JOIN = re.compile(r"\b(?:and|also|plus|then|as well as)\b|[,;]", re.IGNORECASE)
+
+
+@dataclass
+class Route:
+    name: str
+    keywords: Dict[str, float]
+    description: str = ""
+
+
+@dataclass
+class Decision:
+    route: str
+    confidence: float
+    scores: Dict[str, float] = field(default_factory=dict)
+    matches: List[str] = field(default_factory=list)
+
+
+def _pieces(prompt: str) -> List[str]:
+    return [piece.strip() for piece in _JOIN.split(prompt) if piece.strip()]
+
+
+def _keyword_pattern(keyword: str) -> str:
+    """``keyword`` with flexible spacing and its plural: -s/-es, or -ies for a consonant + y ending."""
+    words = [re.escape(w) for w in keyword.lower().split()]
+    last = words[-1]
+    if len(last) > 2 and last.endswith("y") and last[-2] not in "aeiou":
+        words[-1] = last[:-1] + "(?:y|ies)"
+    else:
+        words[-1] = last + "(?:e?s)?"
+    return r"\s+".join(words)
+
+
+class KeywordRouter:
+    def __init__(self, threshold: float = DEFAULT_THRESHOLD):
+        self.threshold = threshold
+        self.routes: Dict[str, Route] = {}
+        self._pattern: Optional[re.Pattern[str]] = None
+        self._groups: Dict[str, Tuple[str, List[Tuple[str, float]]]] = {}
+
+    def register(self, name: str, keywords: Mapping[str, float], description: str = "") -> None:
+        """Add or replace the route ``name``; weights are summed per matched keyword."""
+        self.routes[name] = Route(name, {k.lower(): float(w) for k, w in keywords.items()}, description)
+        self._pattern = None
+
+    def unregister(self, name: str) -> None:
+        if self.routes.pop(name, None) is not None:
+            self._pattern = None
+
+    def _compile(self) -> Optional[re.Pattern[str]]:
+        if self._pattern is None and self.routes:
+            # One group per distinct keyword; a keyword several routes share scores for each of them.
+            owners: Dict[str, List[Tuple[str, float]]] = {}
+            for route in self.routes.values():
+                for keyword, weight in route.keywords.items():
+                    owners.setdefault(keyword, []).append((route.name, weight))
+            # Longest first so "pull request" wins over a shorter keyword at the same position.
+            ordered = sorted(owners, key=lambda k: -len(k))
+            self._groups = {f"k{i}": (keyword, owners[keyword]) for i, keyword in enumerate(ordered)}
+            alternation = "|".join(f"(?P<{group}>{_keyword_pattern(kw)})" for group, (kw, _) in self._groups.items())
+            self._pattern = re.compile(rf"\b(?:{alternation})\b", re.IGNORECASE)
+        return self._pattern
+
+    def _hits(self, prompt: str) -> List[Tuple[int, int, str, List[Tuple[str, float]]]]:
+        """(start, end, keyword, owning routes) for the first occurrence of each keyword."""
+        pattern = self._compile()
+        hits: List[Tuple[int, int, str, List[Tuple[str, float]]]] = []
+        if pattern is not None:
+            seen = set()
+            for match in pattern.finditer(prompt):
+                keyword, owners = self._groups[match.lastgroup or ""]
+                if keyword not in seen:
+                    seen.add(keyword)
+                    hits.append((match.start(), match.end(), keyword, owners))
+        return hits
+
+    def score(self, prompt: str) -> Decision:
+        """Best route for ``prompt`` with its confidence in [0, 1]; ``default`` when nothing matches."""
+        scores: Dict[str, float] = {}
+        matches: List[str] = []
+        for _, _, keyword, owners in self._hits(prompt):
+            matches.append(keyword)
+            for route, weight in owners:
+                scores[route] = scores.get(route, 0.0) + weight
+        if not scores:
+            return Decision(DEFAULT_ROUTE, 0.0)
+        ranked = sorted(scores.items(), key=lambda kv: -kv[1])
+        best, top = ranked[0]
+        runner_up = ranked[1][1] if len(ranked) > 1 else 0.0
+        confidence = min(1.0, top) * (1.0 - runner_up / top) if top > 0 else 0.0
+        return Decision(best, round(confidence, 3), scores, matches)
+
+    def route(self, prompt: str) -> Optional[Decision]:
+        """The keyword decision when it clears the threshold, else None (ask the LLM)."""
+        decision = self.score(prompt)
+        return decision if decision.route != DEFAULT_ROUTE and decision.confidence >= self.threshold else None
+
+    def matching(self, prompt: str) -> List[str]:
+        """Routes for a prompt that joins asks for several agents, best first.
+
+        The best route must clear the threshold over the whole prompt.
+        Another route is added when a piece of the prompt between conjunctions
+        ("and", "also", a comma...) routes to it confidently on its own, so
+        incidental words such as "docs" in "pull requests in the docs repo" do
+        not pull in an agent.
+        """
+        decision = self.score(prompt)
+        if decision.route == DEFAULT_ROUTE or min(1.0, decision.scores[decision.route]) < self.threshold:
+            return []
+        chosen = [decision.route]
+        for piece in _pieces(prompt):
+            other = self.route(piece)
+            if other is not None and other.route not in chosen:
+                chosen.append(other.route)
+        return chosen
+
+    def split(self, prompt: str, routes: Sequence[str]) -> Dict[str, str]:
+        """The part of ``prompt`` meant for each of ``routes``.
+
+        A route gets the pieces between conjunctions that score best for it,
+        plus the pieces no route claims (shared context such as "in octo/cli"),
+        in prompt order. A route no piece scores for gets the whole prompt.
+        """
+        pieces = _pieces(prompt)
+        owners = [self.score(piece).route for piece in pieces]
+        parts: Dict[str, str] = {}
+        for name in routes:
+            if name not in owners:
+                parts[name] = prompt
+                continue
+            parts[name] = ", ".join(piece for piece, owner in zip(pieces, owners) if owner == name or owner not in routes)
+        return parts
+
+    def llm_prompt(self) -> str:
+        """System prompt for the LLM router listing the registered routes."""
+        lines = [
+            "You are a router. Respond with a single JSON object {\"routes\": [<name>, ...]} naming every route below "
+            f"the request needs (usually one), or {{\"routes\": [\"{DEFAULT_ROUTE}\"]}} when none fits.",
+        ]
+        lines.extend(f"- {route.name}: {route.description}" for route in self.routes.values())
+        return "\n".join(lines)
+
+
+_router = KeywordRouter()
+
+
+def get_router() -> KeywordRouter:
+    """The process-wide router that agents register their routes with."""
+    return _router
+
+
+def register_route(name: str, keywords: Mapping[str, float], description: str = "") -> None:
+    _router.register(name, keywords, description)
+
+
+def benchmark(router: KeywordRouter, cases: Sequence[Tuple[str, str]]) -> Dict[str, object]:
+    """Accuracy and latency of keyword routing over ``(prompt, expected route)`` cases.
+
+    ``confident`` counts prompts routed without the LLM; ``precision`` is the
+    share of those that picked the expected route. ``accuracy`` scores the best
+    keyword guess on every prompt, treating no match as ``default``.
+    """
+    confident = confident_correct = correct = 0
+    latencies: List[float] = []
+    rows = []
+    router._compile()  # time routing, not the one-off compile
+    for prompt, expected in cases:
+        start = time.perf_counter()
+        decision = router.score(prompt)
+        latencies.append((time.perf_counter() - start) * 1000)
+        routed = decision.route != DEFAULT_ROUTE and decision.confidence >= router.threshold
+        correct += decision.route == expected
+        if routed:
+            confident += 1
+            confident_correct += decision.route == expected
+        rows.append({
+            "prompt": prompt, "expected": expected, "route": decision.route,
+            "confidence": decision.confidence, "llm": not routed,
+        })
+    total = len(cases)
+    latencies.sort()
+    return {
+        "cases": total,
+        "accuracy": round(correct / total, 3) if total else 0.0,
+        "confident": confident,
+        "precision": round(confident_correct / confident, 3) if confident else 0.0,
+        "llm_fallbacks": total - confident,
+        "p50_ms": round(statistics.median(latencies), 4) if latencies else 0.0,
+        "p99_ms": round(latencies[min(total - 1, int(total * 0.99))], 4) if latencies else 0.0,
+        "rows": rows,
+    }
+
+
+# Labeled prompts used by ``mnemo bench-router`` when no corpus is given.
+SAMPLE_CASES: Tuple[Tuple[str, str], ...] = (
+    ("list open pull requests on octo/hello", "github"),
+    ("show me the latest issues in my repo", "github"),
+    ("what changed in the last release?", "github"),
+    ("create a branch called feature/login on GitHub", "github"),
+    ("which workflows failed in GitHub Actions today", "github"),
+    ("who reviewed PR 42", "github"),
+    ("list tags for the repository", "github"),
+    ("list my repositories", "github"),
+    ("search repositories about langchain", "github"),
+    ("search code for TODO in the repo", "github"),
+    ("get the commits on main", "github"),
+    ("open an issue titled crash on startup", "github"),
+    ("summarize the stage directions in act two", "default"),
+    ("what is a good name for my cat", "default"),
+    ("translate 'good morning' to French", "default"),
+    ("explain the difference between TCP and UDP", "default"),
+    ("write a haiku about autumn", "default"),
+    ("how do I stage my thoughts before a presentation", "default"),
+    ("what's the weather like for the release party", "default"),
+    ("reissue my train ticket", "default"),
+)
@@ -0,0 +1,338 @@
+"""Local tool selection for the GitHub planner.
+
+Tools are indexed as TF-IDF vectors over the words of their name and
+description, and prompts from past successful runs are remembered per tool.
+When a prompt clearly matches one tool, every required argument can be
+filled from the prompt or the owner/repo context, and no word of the prompt
+is left over (an unparsed "labeled bug" or "assigned to me" is a constraint
+the local plan would silently drop), the planner uses that plan without
+asking the LLM. Anything less certain returns None and the LLM plans as
+before.
+"""
+
+from __future__ import annotations
+
+import json
+import math
+import os
+import re
+import statistics
+import time
+from collections import Counter
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Set, Tuple
+
+from ..config import cache_dir
+
+DEFAULT_THRESHOLD = float(os.getenv("MNEMO_PLANNER_THRESHOLD", "0.45"))
+DEFAULT_MARGIN = float(os.getenv("MNEMO_PLANNER_MARGIN", "0.1"))
+# Learned prompts whose template is at least this similar count as a match.
+LEARNED_THRESHOLD = 0.8
+MAX_TEMPLATES_PER_TOOL = 50
+
+Vector = Dict[str, float]
+
+_STOPWORDS = frozenset(
+    "a an the of in on for to from and or me my our show give what which who is are was be with by at all any "
+    "please can could you i it this that these those".split()
+)
+_ALIASES = {"pr": ["pull", "request"], "prs": ["pull", "request"], "repository": ["repo"], "repositories": ["repo"],
+            "ci": ["workflow"], "action": ["workflow"], "actions": ["workflow"]}
+_WORD = re.compile(r"[a-z0-9]+")
+_SLUG = re.compile(r"\b([A-Za-z0-9][\w.-]*)/([A-Za-z0-9][\w.-]*)\b")
+_OWNER = re.compile(r"[A-Za-z0-9](?:[A-Za-z0-9-]*[A-Za-z0-9])?")
+# Slash phrases that read like owner/repo but are ordinary words.
+_NOT_SLUGS = frozenset("and/or read/write yes/no on/off input/output client/server true/false tcp/ip i/o ci/cd".split())
+_NUMBER = re.compile(r"#(\d+)|\b(?:issue|pr|pull request|pull|number)\s+#?(\d+)\b", re.IGNORECASE)
+# Single quotes count only at word boundaries, so possessives and contractions are not quotes.
+_QUOTED = re.compile(r"\"([^\"]+)\"|“([^”]+)”|(?<!\w)'([^']+)'(?!\w)")
+# Request verbs that carry no constraint of their own.
+_VERBS = frozenset("list get find fetch view display see tell".split())
+
+
+def tokens(text: str) -> List[str]:
+    """Lower-cased words with snake/camel case split, light plural stripping and a few aliases."""
+    text = re.sub(r"([a-z])([A-Z])", r"\1 \2", text or "").lower().replace("_", " ")
+    out: List[str] = []
+    for word in _WORD.findall(text):
+        if word in _STOPWORDS or word.isdigit():
+            continue
+        for w in _ALIASES.get(word, [word]):
+            if len(w) > 3 and w.endswith("s") and not w.endswith("ss"):
+                w = w[:-1]
+            out.append(w)
+    return out
+
+
+def _quoted(prompt: str) -> Optional[str]:
+    match = _QUOTED.search(prompt)
+    return next((group for group in match.groups() if group), None) if match else None
+
+
+def template(prompt: str) -> str:
+    """``prompt`` with slugs, numbers and quoted strings replaced, so reruns with other values match."""
+    text = _QUOTED.sub(" <text> ", prompt)
+    text = _SLUG.sub(" <repo> ", text)
+    text = re.sub(r"#?\b\d+\b", " <n> ", text)
+    return " ".join(text.lower().split())
+
+
+def _cosine(a: Vector, b: Vector) -> float:
+    if len(a) > len(b):
+        a, b = b, a
+    dot = sum(w * b.get(t, 0.0) for t, w in a.items())
+    na = math.sqrt(sum(w * w for w in a.values()))
+    nb = math.sqrt(sum(w * w for w in b.values()))
+    return dot / (na * nb) if na and nb else 0.0
+
+
+class PlannerMemory:
+    """Prompt templates that led to a successful call, per tool, in ~/.mnemo/cache/planner_memory.json."""
+
+    def __init__(self, path: Optional[Path] = None):
+        self.path = path
+        self._tools: Dict[str, Dict[str, int]] = {}
+        self._loaded = False
+
+    def _load(self) -> None:
+        if self._loaded:
+            return
+        self._loaded = True
+        if self.path is None or not self.path.exists():
+            return
+        try:
+            data = json.loads(self.path.read_text(encoding="utf-8"))
+        except (OSError, json.JSONDecodeError):
+            return
+        if isinstance(data, dict):
+            self._tools.update({k: v for k, v in data.items() if isinstance(v, dict)})
+
+    def _save(self) -> None:
+        if self.path is None:
+            return
+        try:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            tmp = self.path.with_suffix(".tmp")
+            tmp.write_text(json.dumps(self._tools, ensure_ascii=False), encoding="utf-8")
+            os.replace(tmp, self.path)
+        except OSError:
+            pass  # learning is an optimisation only
+
+    def record(self, prompt: str, tool: str) -> None:
+        self._load()
+        seen = self._tools.setdefault(tool, {})
+        key = template(prompt)
+        seen[key] = seen.get(key, 0) + 1
+        if len(seen) > MAX_TEMPLATES_PER_TOOL:
+            for stale, _ in sorted(seen.items(), key=lambda kv: kv[1])[: len(seen) - MAX_TEMPLATES_PER_TOOL]:
+                del seen[stale]
+        self._save()
+
+    def templates(self) -> Dict[str, Dict[str, int]]:
+        self._load()
+        return self._tools
+
+    def clear(self) -> None:
+        self._tools.clear()
+        self._loaded = True
+        self._save()
+
+
+class ToolSelector:
+    """Scores a tool catalog against prompts and builds plans for confident matches."""
+
+    def __init__(self, tools: Dict[str, Any], memory: Optional[PlannerMemory] = None,
+                 threshold: float = DEFAULT_THRESHOLD, margin: float = DEFAULT_MARGIN):
+        self.tools = tools
+        self.memory = memory
+        self.threshold = threshold
+        self.margin = margin
+        docs = {name: self._doc_tokens(name, meta) for name, meta in tools.items()}
+        df: Counter = Counter()
+        for words in docs.values():
+            df.update(set(words))
+        n = max(len(docs), 1)
+        self._idf = {t: math.log((1 + n) / (1 + c)) + 1.0 for t, c in df.items()}
+        self._vectors = {name: self.vector(words) for name, words in docs.items()}
+        self._vocab = {name: set(words) | self._schema_words(tools[name]) for name, words in docs.items()}
+
+    @staticmethod
+    def _doc_tokens(name: str, meta: Any) -> List[str]:
+        description = (meta.get("description") or "") if isinstance(meta, dict) else ""
+        schema = (meta.get("inputSchema") or {}) if isinstance(meta, dict) else {}
+        required = [r for r in schema.get("required") or [] if r not in ("owner", "repo")] if isinstance(schema, dict) else []
+        # The name says what the tool does; weight it above the description.
+        # Required parameters tell "get one by number" tools apart from listings.
+        return tokens(name) * 3 + tokens(str(description)) + tokens(" ".join(required))
+
+    @staticmethod
+    def _schema_words(meta: Any) -> Set[str]:
+        schema = (meta.get("inputSchema") or {}) if isinstance(meta, dict) else {}
+        words: Set[str] = set()
+        for name, spec in _properties(schema).items():
+            words.update(tokens(name))
+            if isinstance(spec, dict) and isinstance(spec.get("enum"), list):
+                words.update(tokens(" ".join(str(v) for v in spec["enum"])))
+        return words
+
+    def unexplained(self, prompt: str, tool: str, arguments: Dict[str, Any]) -> List[str]:
+        """Words of ``prompt`` that neither describe ``tool`` nor went into ``arguments``."""
+        known = self._vocab.get(tool, set()) | _VERBS
+        known = known | set(tokens(" ".join(str(v) for v in arguments.values())))
+        if self.memory is not None:
+            for seen in self.memory.templates().get(tool, {}):
+                known |= set(tokens(seen))
+        return [word for word in tokens(prompt) if word not in known]
+
+    def vector(self, words: Iterable[str]) -> Vector:
+        counts = Counter(words)
+        return {t: (1 + math.log(c)) * self._idf.get(t, 1.0) for t, c in counts.items()}
+
+    def rank(self, prompt: str) -> List[Tuple[str, float, str]]:
+        """(tool, score, source) for every tool, best first; source is 'learned' or 'catalog'."""
+        words = tokens(prompt)
+        if _NUMBER.search(prompt):
+            words.append("number")
+        query = self.vector(words)
+        scores = {name: (_cosine(query, vec), "catalog") for name, vec in self._vectors.items()}
+        if self.memory is not None:
+            key = template(prompt)
+            key_vec = self.vector(tokens(key))
+            for name, seen in self.memory.templates().items():
+                if name not in scores:
+                    continue
+                best = max((1.0 if t == key else _cosine(key_vec, self.vector(tokens(t))) for t in seen), default=0.0)
+                if best >= LEARNED_THRESHOLD and best > scores[name][0]:
+                    scores[name] = (best, "learned")
+        return sorted(((name, score, source) for name, (score, source) in scores.items()), key=lambda r: -r[1])
+
+    def select(self, prompt: str, owner: Optional[str] = None, repo: Optional[str] = None) -> Optional[Dict[str, Any]]:
+        """A plan ``{tool, arguments, confidence, source}`` when the match is certain, else None."""
+        ranked = self.rank(prompt)
+        if not ranked:
+            return None
+        tool, score, source = ranked[0]
+        runner_up = ranked[1][1] if len(ranked) > 1 else 0.0
+        if score < self.threshold or score - runner_up < self.margin:
+            return None
+        schema = (self.tools.get(tool) or {}).get("inputSchema") or {}
+        arguments = fill_arguments(prompt, schema, owner, repo)
+        if arguments is None or self.unexplained(prompt, tool, arguments):
+            return None
+        return {"tool": tool, "arguments": arguments, "confidence": round(score, 3), "source": source}
+
+
+def _properties(schema: Dict[str, Any]) -> Dict[str, Any]:
+    props = schema.get("properties") if isinstance(schema, dict) else None
+    return props if isinstance(props, dict) else {}
+
+
+def _looks_like_repo(owner: str, repo: str) -> bool:
+    if owner.isdigit() or repo.isdigit() or (owner.isupper() and repo.isupper()):
+        return False
+    return bool(_OWNER.fullmatch(owner)) and f"{owner}/{repo}".lower() not in _NOT_SLUGS
+
+
+def fill_arguments(prompt: str, schema: Dict[str, Any], owner: Optional[str], repo: Optional[str]) -> Optional[Dict[str, Any]]:
+    """Arguments read off the prompt and context, or None when a required one has no obvious value.
+
+    An ``owner/repo`` in the prompt only fills what the context leaves open;
+    one that contradicts the context, or a slash pair that does not look like
+    a repository when there is no context, is left to the LLM planner.
+    """
+    props = _properties(schema)
+    required = list(schema.get("required") or []) if isinstance(schema, dict) else []
+    args: Dict[str, Any] = {}
+    slug = _SLUG.search(prompt)
+    if slug and "://" not in prompt[max(0, slug.start() - 3):slug.start()] and \
+            {"owner", "repo"} & {n.lower() for n in set(props) | set(required)}:
+        found = (slug.group(1), slug.group(2).removesuffix(".git"))
+        if owner or repo:
+            if _looks_like_repo(*found):
+                if (owner or found[0], repo or found[1]) != found:
+                    return None
+                owner, repo = found
+        elif _looks_like_repo(*found):
+            owner, repo = found
+        else:
+            return None
+    number = next((int(a or b) for a, b in _NUMBER.findall(prompt)), None)
+    quoted = _quoted(prompt)
+    words = set(tokens(prompt))
+    for name in set(props) | set(required):
+        spec = props.get(name) if isinstance(props.get(name), dict) else {}
+        lowered = name.lower()
+        if lowered == "owner" and owner:
+            args[name] = owner
+        elif lowered == "repo" and repo:
+            args[name] = repo
+        elif "number" in lowered and number is not None and spec.get("type", "integer") in ("integer", "number"):
+            args[name] = number
+        elif lowered in ("query", "q") and quoted:
+            args[name] = quoted
+        elif lowered == "state" and isinstance(spec.get("enum"), list):
+            choice = next((v for v in spec["enum"] if isinstance(v, str) and v.lower() in words), None)
+            if choice is not None:
+                args[name] = choice
+    if any(r not in args for r in required):
+        return None
+    return args
+
+
+_memory: Optional[PlannerMemory] = None
+_selectors: Dict[str, ToolSelector] = {}
+
+
+def get_memory() -> PlannerMemory:
+    """Process-wide planner memory backed by ~/.mnemo/cache/planner_memory.json."""
+    global _memory
+    if _memory is None:
+        _memory = PlannerMemory(cache_dir() / "planner_memory.json")
+    return _memory
+
+
+def get_selector(tools: Dict[str, Any], version: str) -> ToolSelector:
+    """Selector for a catalog listing, rebuilt only when the catalog ``version`` changes."""
+    selector = _selectors.get(version)
+    if selector is None:
+        _selectors.clear()
+        selector = _selectors[version] = ToolSelector(tools, get_memory())
+    return selector
+
+
+def benchmark(selector: ToolSelector, cases: Sequence[Tuple[str, str]], owner: Optional[str] = None,
+              repo: Optional[str] = None, llm_ms: Optional[Sequence[float]] = None) -> Dict[str, Any]:
+    """Hit rate, precision and latency of the local path over ``(prompt, expected tool)`` cases.
+
+    ``llm_ms`` holds the measured planner LLM latency per case; every local hit
+    saves that call.
+    """
+    hits = correct = 0
+    local_ms: List[float] = []
+    saved = 0.0
+    rows = []
+    for i, (prompt, expected) in enumerate(cases):
+        start = time.perf_counter()
+        plan = selector.select(prompt, owner, repo)
+        local_ms.append((time.perf_counter() - start) * 1000)
+        if plan is not None:
+            hits += 1
+            correct += plan["tool"] == expected
+            if llm_ms is not None:
+                saved += llm_ms[i]
+        rows.append({"prompt": prompt, "expected": expected, "tool": plan and plan["tool"], "source": plan and plan["source"]})
+    total = len(cases)
+    local_ms.sort()
+    report: Dict[str, Any] = {
+        "cases": total,
+        "hits": hits,
+        "hit_rate": round(hits / total, 3) if total else 0.0,
+        "precision": round(correct / hits, 3) if hits else 0.0,
+        "local_p50_ms": round(statistics.median(local_ms), 3) if local_ms else 0.0,
+        "local_p99_ms": round(local_ms[min(total - 1, int(total * 0.99))], 3) if local_ms else 0.0,
+        "rows": rows,
+    }
+    if llm_ms is not None:
+        report["llm_mean_ms"] = round(statistics.fmean(llm_ms), 1) if llm_ms else 0.0
+        report["saved_ms"] = round(saved - sum(local_ms), 1)
+    return report
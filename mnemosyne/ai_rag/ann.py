@@ -0,0 +1,122 @@
+"""FAISS index types for the RAG vector store and a recall/latency benchmark.
+
+``flat`` is exact brute force. ``ivf-flat`` and ``ivf-pq`` partition vectors
+into clusters trained on a sample (PQ also compresses them); ``hnsw`` is a
+graph index that needs no training but cannot delete vectors in place.
+"""
+
+import math
+import time
+from typing import Any, Dict, List, Optional, Sequence
+
+import numpy as np
+
+from ..timing import percentile
+
+INDEX_TYPES = ("flat", "ivf-flat", "ivf-pq", "hnsw")
+DEFAULT_TRAIN_SIZE = 10_000
+HNSW_M = 32
+HNSW_EF_SEARCH = 64
+# faiss recommends ~39 training points per centroid.
+_POINTS_PER_CENTROID = 39
+
+
+def needs_training(kind: str) -> bool:
+    return kind.startswith("ivf")
+
+
+def supports_delete(kind: str) -> bool:
+    # IVF keeps its original ids after remove_ids while the LangChain wrapper
+    # renumbers positions, and HNSW cannot remove at all; both are rebuilt.
+    return kind == "flat"
+
+
+def _pq_subquantizers(dim: int) -> int:
+    for m in (64, 48, 32, 24, 16, 12, 8, 4, 2, 1):
+        if dim % m == 0 and m <= dim:
+            return m
+    return 1
+
+
+def make_index(kind: str, dim: int, sample: Optional[np.ndarray] = None) -> Any:
+    """Create (and train on ``sample`` where needed) an empty L2 index of ``kind``."""
+    import faiss
+
+    if kind not in INDEX_TYPES:
+        raise ValueError(f"index type must be one of: {', '.join(INDEX_TYPES)}")
+    if kind == "flat":
+        return faiss.IndexFlatL2(dim)
+    if kind == "hnsw":
+        index = faiss.IndexHNSWFlat(dim, HNSW_M)
+        index.hnsw.efSearch = HNSW_EF_SEARCH
+        return index
+    if sample is None or len(sample) == 0:
+        raise ValueError(f"{kind} needs training vectors")
+    sample = np.ascontiguousarray(sample, dtype="float32")
+    nlist = max(1, min(4 * int(math.sqrt(len(sample))), len(sample) // _POINTS_PER_CENTROID))
+    quantizer = faiss.IndexFlatL2(dim)
+    if kind == "ivf-pq" and len(sample) >= 4:
+        # 2**nbits codewords per sub-quantizer must stay below the sample size.
+        nbits = max(1, min(8, int(math.log2(len(sample))) - 1))
+        index = faiss.IndexIVFPQ(quantizer, dim, nlist, _pq_subquantizers(dim), nbits)
+    else:
+        index = faiss.IndexIVFFlat(quantizer, dim, nlist)
+    index.train(sample)
+    index.nprobe = max(1, nlist // 8)
+    return index
+
+
+def index_kind(index: Any) -> str:
+    import faiss
+
+    if isinstance(index, faiss.IndexHNSW):
+        return "hnsw"
+    if isinstance(index, faiss.IndexIVFPQ):
+        return "ivf-pq"
+    if isinstance(index, faiss.IndexIVF):
+        return "ivf-flat"
+    return "flat"
+
+
+def reconstruct_all(index: Any) -> np.ndarray:
+    """Every stored vector, in position order (approximate for PQ indexes)."""
+    import faiss
+
+    if isinstance(index, faiss.IndexIVF):
+        index.make_direct_map()
+    return index.reconstruct_n(0, index.ntotal)
+
+
+def benchmark(vectors: np.ndarray, queries: np.ndarray, k: int, kinds: Sequence[str], train_size: int = DEFAULT_TRAIN_SIZE) -> List[Dict[str, Any]]:
+    """Recall@k against exact search plus per-query latency for each index kind."""
+    vectors = np.ascontiguousarray(vectors, dtype="float32")
+    queries = np.ascontiguousarray(queries, dtype="float32")
+    dim = vectors.shape[1]
+    k = min(k, len(vectors))
+    exact = make_index("flat", dim)
+    exact.add(vectors)
+    _, truth = exact.search(queries, k)
+
+    rows: List[Dict[str, Any]] = []
+    rng = np.random.default_rng(0)
+    for kind in kinds:
+        started = time.perf_counter()
+        sample = vectors[rng.choice(len(vectors), min(train_size, len(vectors)), replace=False)] if needs_training(kind) else None
+        index = make_index(kind, dim, sample)
+        index.add(vectors)
+        build_s = time.perf_counter() - started
+        latencies: List[float] = []
+        hits = 0
+        for i in range(len(queries)):
+            t0 = time.perf_counter()
+            _, found = index.search(queries[i:i + 1], k)
+            latencies.append((time.perf_counter() - t0) * 1000)
+            hits += len(set(found[0].tolist()) & set(truth[i].tolist()))
+        rows.append({
+            "index": kind,
+            "recall_at_k": round(hits / (k * len(queries)), 4),
+            "p50_ms": round(percentile(latencies, 50), 3),
+            "p99_ms": round(percentile(latencies, 99), 3),
+            "build_s": round(build_s, 3),
+        })
+    return rows
@@ -0,0 +1,112 @@
+"""Semantic cache of `mnemo doc ask` answers.
+
+Answers are stored with the embedding of the question and the version of the
+index they were produced from. A later question against the same index whose
+embedding is within ``threshold`` cosine similarity returns the stored answer
+without retrieval or an LLM call. Entries expire after ``ttl`` seconds and the
+least recently used ones are evicted beyond ``max_entries``.
+"""
+
+import os
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+from ..config import cache_dir
+
+DEFAULT_THRESHOLD = float(os.getenv("MNEMO_ANSWER_CACHE_THRESHOLD", "0.95"))
+DEFAULT_TTL = float(os.getenv("MNEMO_ANSWER_CACHE_TTL", "86400"))
+DEFAULT_MAX_ENTRIES = int(os.getenv("MNEMO_ANSWER_CACHE_SIZE", "1000"))
+
+
+def default_path() -> Path:
+    return cache_dir() / "answers.sqlite"
+
+
+class AnswerCache:
+    def __init__(self, path: Optional[Path] = None, threshold: float = DEFAULT_THRESHOLD,
+                 ttl: float = DEFAULT_TTL, max_entries: int = DEFAULT_MAX_ENTRIES):
+        self.path = Path(path or default_path())
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.threshold = threshold
+        self.ttl = ttl
+        self.max_entries = max(1, max_entries)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(self.path), check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS answers (id INTEGER PRIMARY KEY, scope TEXT NOT NULL, question TEXT NOT NULL, "
+            "vector BLOB NOT NULL, answer TEXT NOT NULL, created REAL NOT NULL, last_used REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS answers_scope ON answers (scope)")
+        # Counters persist so stats cover every `doc ask` process, not just this one.
+        self._conn.execute("CREATE TABLE IF NOT EXISTS counters (name TEXT PRIMARY KEY, value INTEGER NOT NULL)")
+        self._conn.commit()
+
+    def _bump(self, name: str) -> None:
+        self._conn.execute(
+            "INSERT INTO counters (name, value) VALUES (?, 1) ON CONFLICT(name) DO UPDATE SET value = value + 1", (name,)
+        )
+
+    def lookup(self, scope: str, vector: List[float]) -> Optional[Dict[str, Any]]:
+        """Closest live answer in ``scope`` above the threshold, or None (counted as a miss)."""
+        query = np.asarray(vector, dtype="float32")
+        query_norm = float(np.linalg.norm(query)) or 1.0
+        now = time.time()
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT id, question, vector, answer FROM answers WHERE scope = ? AND created >= ?", (scope, now - self.ttl)
+            ).fetchall()
+            best: Optional[Dict[str, Any]] = None
+            if rows:
+                matrix = np.stack([np.frombuffer(blob, dtype="float32") for _, _, blob, _ in rows])
+                sims = matrix @ query / (np.linalg.norm(matrix, axis=1) * query_norm + 1e-12)
+                i = int(np.argmax(sims))
+                if sims[i] >= self.threshold:
+                    entry_id, question, _, answer = rows[i]
+                    best = {"question": question, "answer": answer, "similarity": round(float(sims[i]), 4)}
+                    self._conn.execute("UPDATE answers SET last_used = ? WHERE id = ?", (now, entry_id))
+            self._bump("hits" if best else "misses")
+            self._conn.commit()
+        return best
+
+    def put(self, scope: str, question: str, vector: List[float], answer: str) -> None:
+        now = time.time()
+        blob = np.asarray(vector, dtype="float32").tobytes()
+        with self._lock:
+            self._conn.execute(
+                "INSERT INTO answers (scope, question, vector, answer, created, last_used) VALUES (?, ?, ?, ?, ?, ?)",
+                (scope, question, blob, answer, now, now),
+            )
+            self._conn.execute("DELETE FROM answers WHERE created < ?", (now - self.ttl,))
+            self._conn.execute(
+                "DELETE FROM answers WHERE id NOT IN (SELECT id FROM answers ORDER BY last_used DESC LIMIT ?)",
+                (self.max_entries,),
+            )
+            self._conn.commit()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            counters = dict(self._conn.execute("SELECT name, value FROM counters").fetchall())
+            entries = self._conn.execute("SELECT COUNT(*) FROM answers").fetchone()[0]
+        hits, misses = counters.get("hits", 0), counters.get("misses", 0)
+        return {
+            "entries": entries,
+            "hits": hits,
+            "misses": misses,
+            "hit_rate": round(hits / (hits + misses), 3) if hits + misses else 0.0,
+            "threshold": self.threshold,
+            "ttl_s": self.ttl,
+            "max_entries": self.max_entries,
+            "path": str(self.path),
+        }
+
+    def clear(self) -> None:
+        with self._lock:
+            self._conn.execute("DELETE FROM answers")
+            self._conn.execute("DELETE FROM counters")
+            self._conn.commit()
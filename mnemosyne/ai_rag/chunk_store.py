@@ -0,0 +1,200 @@
+"""Pickle-free on-disk format for the RAG vector store.
+
+``index.faiss`` holds the vectors and is memory-mapped for queries, so opening
+an index costs the same whatever its size. Chunk texts and metadata live in
+``chunks.sqlite`` keyed by index position and are only read for the top-k hits.
+The same file carries an FTS5 keyword index over the chunk texts, so exact
+identifiers can be matched with BM25 and fused with the vector ranking.
+"""
+
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import threading
+from typing import Any, Dict, List, Sequence, Set
+
+import numpy as np
+from langchain_community.docstore.in_memory import InMemoryDocstore
+from langchain_community.vectorstores import FAISS
+from langchain_core.documents import Document
+
+INDEX_NAME = "index.faiss"
+CHUNKS_NAME = "chunks.sqlite"
+FILES = (INDEX_NAME, CHUNKS_NAME)
+# Keep snake_case identifiers whole instead of splitting them on "_".
+FTS_TOKENIZER = "unicode61 tokenchars '_'"
+# Reciprocal-rank fusion constant from Cormack et al.; damps the top ranks.
+RRF_K = 60
+_TERM = re.compile(r"\w+")
+# index.faiss is fingerprinted from this many evenly spaced blocks, so opening stays cheap.
+FINGERPRINT_BLOCKS = 16
+FINGERPRINT_BLOCK_SIZE = 64 * 1024
+
+
+def exists(index_dir: str) -> bool:
+    return all(os.path.exists(os.path.join(index_dir, name)) for name in FILES)
+
+
+def _mmap_flags() -> int:
+    import faiss
+
+    # MMAP_IFC maps flat codes (flat and HNSW storage) in place; older faiss
+    # builds only offer IO_FLAG_MMAP, which maps IVF inverted lists.
+    return getattr(faiss, "IO_FLAG_MMAP_IFC", faiss.IO_FLAG_MMAP) | faiss.IO_FLAG_READ_ONLY
+
+
+def fingerprint(path: str) -> str:
+    """Hash of the size and sampled blocks of ``path``; tells two index files apart without reading them whole."""
+    size = os.path.getsize(path)
+    digest = hashlib.sha256(str(size).encode("ascii"))
+    with open(path, "rb") as fh:
+        step = max(FINGERPRINT_BLOCK_SIZE, size // FINGERPRINT_BLOCKS)
+        for offset in range(0, size, step):
+            fh.seek(offset)
+            digest.update(fh.read(FINGERPRINT_BLOCK_SIZE))
+    return digest.hexdigest()
+
+
+def save(store: FAISS, index_dir: str) -> None:
+    """Write ``store`` as index.faiss plus chunks.sqlite.
+
+    Each file is written to a temporary name and renamed into place, so
+    neither is ever half written, but the two renames are separate: a crash
+    between them leaves a new chunks.sqlite next to the old index.faiss.
+    chunks.sqlite records a fingerprint of the index.faiss it was written
+    with, so ``MappedStore`` notices such a pair and asks for a rebuild.
+    """
+    import faiss
+
+    os.makedirs(index_dir, exist_ok=True)
+    index_tmp = os.path.join(index_dir, INDEX_NAME + ".tmp")
+    faiss.write_index(store.index, index_tmp)
+    chunks_tmp = os.path.join(index_dir, CHUNKS_NAME + ".tmp")
+    if os.path.exists(chunks_tmp):
+        os.remove(chunks_tmp)
+    conn = sqlite3.connect(chunks_tmp)
+    try:
+        conn.execute("CREATE TABLE chunks (pos INTEGER PRIMARY KEY, id TEXT NOT NULL, text TEXT NOT NULL, metadata TEXT NOT NULL)")
+        rows = []
+        for pos, doc_id in store.index_to_docstore_id.items():
+            doc = store.docstore.search(doc_id)
+            rows.append((pos, doc_id, doc.page_content, json.dumps(doc.metadata, default=str)))
+        conn.executemany("INSERT INTO chunks (pos, id, text, metadata) VALUES (?, ?, ?, ?)", rows)
+        conn.execute(f'CREATE VIRTUAL TABLE chunks_fts USING fts5(text, tokenize="{FTS_TOKENIZER}")')
+        conn.executemany("INSERT INTO chunks_fts (rowid, text) VALUES (?, ?)", [(pos, text) for pos, _, text, _ in rows])
+        conn.execute("CREATE TABLE meta (key TEXT PRIMARY KEY, value TEXT NOT NULL)")
+        conn.execute("INSERT INTO meta (key, value) VALUES ('index_fingerprint', ?)", (fingerprint(index_tmp),))
+        conn.commit()
+    finally:
+        conn.close()
+    os.replace(chunks_tmp, os.path.join(index_dir, CHUNKS_NAME))
+    os.replace(index_tmp, os.path.join(index_dir, INDEX_NAME))
+
+
+def stored_ids(index_dir: str, ids: Sequence[str]) -> Set[str]:
+    """The subset of chunk ``ids`` present in the index at ``index_dir``."""
+    if not ids or not exists(index_dir):
+        return set()
+    found: Set[str] = set()
+    conn = sqlite3.connect(f"file:{os.path.join(index_dir, CHUNKS_NAME)}?mode=ro", uri=True)
+    try:
+        for start in range(0, len(ids), 500):
+            batch = list(ids[start:start + 500])
+            marks = ",".join("?" * len(batch))
+            found.update(row[0] for row in conn.execute(f"SELECT id FROM chunks WHERE id IN ({marks})", batch))
+    finally:
+        conn.close()
+    return found
+
+
+def load(index_dir: str, embeddings: Any) -> FAISS:
+    """Fully load the store into a writable LangChain FAISS wrapper (used by the indexer)."""
+    import faiss
+
+    index = faiss.read_index(os.path.join(index_dir, INDEX_NAME))
+    conn = sqlite3.connect(f"file:{os.path.join(index_dir, CHUNKS_NAME)}?mode=ro", uri=True)
+    try:
+        rows = conn.execute("SELECT pos, id, text, metadata FROM chunks ORDER BY pos").fetchall()
+    finally:
+        conn.close()
+    docstore = InMemoryDocstore({doc_id: Document(page_content=text, metadata=json.loads(meta)) for _, doc_id, text, meta in rows})
+    return FAISS(embeddings, index, docstore, {pos: doc_id for pos, doc_id, _, _ in rows})
+
+
+def rrf(rankings: Sequence[Sequence[int]], k: int = RRF_K) -> List[int]:
+    """Fuse ranked position lists: score = sum of 1 / (k + rank) over the lists."""
+    scores: Dict[int, float] = {}
+    for ranking in rankings:
+        for rank, pos in enumerate(ranking, start=1):
+            scores[pos] = scores.get(pos, 0.0) + 1.0 / (k + rank)
+    return sorted(scores, key=lambda pos: -scores[pos])
+
+
+class MappedStore:
+    """Read-only store: memory-mapped vectors, chunk rows fetched per query."""
+
+    def __init__(self, index_dir: str, embeddings: Any):
+        import faiss
+
+        self.embeddings = embeddings
+        self.index = faiss.read_index(os.path.join(index_dir, INDEX_NAME), _mmap_flags())
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(f"file:{os.path.join(index_dir, CHUNKS_NAME)}?mode=ro", uri=True, check_same_thread=False)
+        try:
+            row = self._conn.execute("SELECT value FROM meta WHERE key = 'index_fingerprint'").fetchone()
+            consistent = row is None or row[0] == fingerprint(os.path.join(index_dir, INDEX_NAME))
+        except sqlite3.OperationalError:
+            # Written before fingerprints were recorded; the row count is the best check available.
+            (rows,) = self._conn.execute("SELECT COUNT(*) FROM chunks").fetchone()
+            consistent = rows == self.index.ntotal
+        if not consistent:
+            self._conn.close()
+            raise ValueError(
+                f"❌ The index at {index_dir} is inconsistent (index.faiss does not belong to chunks.sqlite). "
+                "Run 'mnemo doc load <path> --full' to rebuild it."
+            )
+
+    def vector_positions(self, query: str, k: int) -> List[int]:
+        vector = np.asarray([self.embeddings.embed_query(query)], dtype="float32")
+        _, found = self.index.search(vector, k)
+        return [pos for pos in found[0].tolist() if pos >= 0]
+
+    def keyword_positions(self, query: str, k: int) -> List[int]:
+        """Best BM25 matches for any term of ``query``."""
+        terms = _TERM.findall(query)
+        if not terms:
+            return []
+        match = " OR ".join('"' + term + '"' for term in dict.fromkeys(terms))
+        try:
+            with self._lock:
+                rows = self._conn.execute(
+                    "SELECT rowid FROM chunks_fts WHERE chunks_fts MATCH ? ORDER BY bm25(chunks_fts) LIMIT ?", (match, k)
+                ).fetchall()
+        except sqlite3.OperationalError:
+            raise ValueError("❌ This index has no keyword index. Run 'mnemo doc load <path> --full' to rebuild it.")
+        return [pos for (pos,) in rows]
+
+    def documents(self, positions: Sequence[int]) -> List[Document]:
+        if not positions:
+            return []
+        marks = ",".join("?" * len(positions))
+        with self._lock:
+            rows = self._conn.execute(f"SELECT pos, text, metadata FROM chunks WHERE pos IN ({marks})", list(positions)).fetchall()
+        by_pos = {pos: Document(page_content=text, metadata=json.loads(meta)) for pos, text, meta in rows}
+        return [by_pos[pos] for pos in positions if pos in by_pos]
+
+    def similarity_search(self, query: str, k: int = 4) -> List[Document]:
+        return self.documents(self.vector_positions(query, k))
+
+    def keyword_search(self, query: str, k: int = 4) -> List[Document]:
+        return self.documents(self.keyword_positions(query, k))
+
+    def hybrid_search(self, query: str, k: int = 4) -> List[Document]:
+        """Reciprocal-rank fusion of the vector and BM25 rankings."""
+        depth = max(4 * k, 20)
+        return self.documents(rrf([self.vector_positions(query, depth), self.keyword_positions(query, depth)])[:k])
+
+    def close(self) -> None:
+        self._conn.close()
@@ -1,34 +1,322 @@
+from typing import Optional
+
 import typer
-from . import doc_loader, rag, debate
 
 doc_app = typer.Typer(help="AI CLI Knowledge Agent")
+cache_app = typer.Typer(help="Inspect the `doc ask` answer cache")
+doc_app.add_typer(cache_app, name="cache")
+
+# doc_loader/rag/debate pull in LangChain, FAISS and sentence-transformers;
+# they are imported inside each command so other subcommands start fast.
 
 @doc_app.command()
-def load(path: str):
+def load(
+    path: str,
+    full: bool = typer.Option(False, "--full", help="Re-embed everything instead of only changed files."),
+    workers: Optional[int] = typer.Option(None, help="Processes for parsing/splitting files (default: CPU count, max 8)."),
+    batch_size: int = typer.Option(64, help="Chunks per embedding call."),
+    index: Optional[str] = typer.Option(None, help="Index type: flat|ivf-flat|ivf-pq|hnsw (default: keep the current one, else flat)."),
+    train_size: int = typer.Option(10_000, help="Vectors sampled to train IVF indexes."),
+):
     """
     Load documents (PDF, Markdown, code) and build embeddings.
+    Interrupted loads resume from the last checkpoint on the next run.
+    """
+    from . import doc_loader, indexer, rag
+
+    def progress(stats):
+        typer.echo(f"… {stats['chunks']} chunks embedded ({stats['chunks_per_sec']} chunks/sec)")
+
+    embeddings = rag.get_cached_embeddings()
+    try:
+        stats = indexer.update_index(
+            path,
+            rag.INDEX_DIR,
+            lambda: embeddings,
+            full=full,
+            workers=workers or doc_loader.default_workers(),
+            batch_size=batch_size,
+            on_progress=progress,
+            index_type=index,
+            train_size=train_size,
+        )
+    except ValueError as exc:
+        typer.echo(str(exc))
+        raise typer.Exit(code=1)
+    except KeyboardInterrupt:
+        typer.echo("Interrupted; progress saved. Run the same command again to resume.")
+        raise typer.Exit(code=130)
+    typer.echo(
+        f"✅ Indexed {path}: {stats['added']} added, {stats['changed']} changed, "
+        f"{stats['removed']} removed, {stats['unchanged']} unchanged ({stats['chunks']} chunks embedded)"
+    )
+    if embeddings.hits:
+        typer.echo(f"♻️  {embeddings.hits} chunks reused from the embedding cache, {embeddings.misses} embedded")
+    if stats.get("rebuilt"):
+        typer.echo("ℹ️  The index type cannot delete vectors in place, so it was rebuilt.")
+
+@doc_app.command()
+def bench(
+    k: int = typer.Option(10, help="Neighbours per query for recall@k."),
+    queries: int = typer.Option(200, help="Stored vectors sampled as queries (ignored with --queries-file)."),
+    queries_file: Optional[str] = typer.Option(None, help="Text file with one real question per line."),
+    index_types: str = typer.Option("flat,ivf-flat,ivf-pq,hnsw", help="Comma-separated index types to compare."),
+    train_size: int = typer.Option(10_000, help="Vectors sampled to train IVF indexes."),
+    as_json: bool = typer.Option(False, "--json", help="Emit rows as JSON."),
+):
+    """
+    Compare index types on the loaded corpus: recall@k vs flat, p50/p99 latency.
+    """
+    import json
+    import os
+
+    import faiss
+    import numpy as np
+
+    from . import ann, rag
+
+    path = os.path.join(rag.INDEX_DIR, "index.faiss")
+    if not os.path.exists(path):
+        typer.echo(f"❌ No index found at {rag.INDEX_DIR}. Run 'mnemo doc load <path>' first.")
+        raise typer.Exit(code=1)
+    current = faiss.read_index(path)
+    vectors = ann.reconstruct_all(current)
+    if queries_file:
+        with open(queries_file, encoding="utf-8") as fh:
+            lines = [line.strip() for line in fh if line.strip()]
+        query_vectors = np.array(rag.get_embeddings().embed_documents(lines), dtype="float32")
+    else:
+        rng = np.random.default_rng(0)
+        query_vectors = vectors[rng.choice(len(vectors), min(queries, len(vectors)), replace=False)]
+    kinds = [kind.strip() for kind in index_types.split(",") if kind.strip()]
+    try:
+        rows = ann.benchmark(vectors, query_vectors, k, kinds, train_size=train_size)
+    except ValueError as exc:
+        typer.echo(str(exc))
+        raise typer.Exit(code=2)
+    if as_json:
+        typer.echo(json.dumps(rows, indent=2))
+        return
+    typer.echo(f"{len(vectors)} vectors, {len(query_vectors)} queries, k={k} (current index: {ann.index_kind(current)})")
+    typer.echo(f"{'index':<10} {'recall@k':>9} {'p50 ms':>9} {'p99 ms':>9} {'build s':>9}")
+    for row in rows:
+        typer.echo(f"{row['index']:<10} {row['recall_at_k']:>9} {row['p50_ms']:>9} {row['p99_ms']:>9} {row['build_s']:>9}")
+
+@doc_app.command()
+def bench_retrieval(
+    cases_file: str = typer.Argument(..., help="Lines of 'question<TAB>expected text or source'."),
+    max_k: int = typer.Option(10, help="Deepest k to search before a case counts as missed."),
+    as_json: bool = typer.Option(False, "--json", help="Emit rows as JSON."),
+):
+    """
+    Compare vector, keyword and hybrid retrieval: k and prompt tokens needed per answer.
     """
-    docs = doc_loader.load_documents(path)
-    rag.build_vectorstore(docs)
-    typer.echo(f"✅ Loaded {len(docs)} documents from {path}")
+    import json
+
+    from . import rag
+
+    cases = []
+    with open(cases_file, encoding="utf-8") as fh:
+        for line in fh:
+            question, _, expected = line.rstrip("\n").partition("\t")
+            if question.strip() and expected.strip():
+                cases.append((question.strip(), expected.strip()))
+    if not cases:
+        typer.echo("❌ No cases found. Use one 'question<TAB>expected' pair per line.")
+        raise typer.Exit(code=1)
+    try:
+        rows = rag.retrieval_benchmark(cases, max_k=max_k)
+    except (ValueError, FileNotFoundError) as exc:
+        typer.echo(str(exc))
+        raise typer.Exit(code=1)
+    if as_json:
+        typer.echo(json.dumps(rows, indent=2))
+        return
+    typer.echo(f"{len(cases)} cases, max k={max_k}")
+    typer.echo(f"{'mode':<8} {'hit rate':>9} {'mean k':>7} {'max k':>6} {'tokens':>8} {'tokens@max':>11}")
+    for row in rows:
+        typer.echo(
+            f"{row['mode']:<8} {row['hit_rate']:>9} {str(row['mean_k']):>7} {str(row['max_k_needed']):>6} "
+            f"{str(row['mean_prompt_tokens']):>8} {row['tokens_at_max_k']:>11}"
+        )
 
 @doc_app.command()
-def ask(query: str):
+def ask(
+    query: Optional[str] = typer.Argument(None, help="Question to answer (or use --from-file)."),
+    from_file: Optional[str] = typer.Option(None, "--from-file", help="Text file with one question per line, answered concurrently."),
+    concurrency: int = typer.Option(8, help="Questions answered at once with --from-file."),
+    mode: str = typer.Option("vector", help="Retrieval: vector|keyword|hybrid (hybrid fuses BM25 with vectors)."),
+    k: int = typer.Option(4, help="Chunks passed to the model."),
+    no_cache: bool = typer.Option(False, "--no-cache", help="Skip the answer cache for this question."),
+    stream: bool = typer.Option(True, "--stream/--no-stream", help="Print the answer as it is generated."),
+    as_json: bool = typer.Option(False, "--json", help="Print the final answer as JSON (no streaming)."),
+):
     """
     Ask questions about loaded documents.
+    Near-duplicate questions against an unchanged index are answered from the cache.
+    With --from-file, the questions' LLM calls are batched and rate limited together.
+    """
+    import json
+    import sys
+
+    from . import rag
+
+    if from_file:
+        try:
+            with open(from_file, encoding="utf-8") as fh:
+                questions = [line.strip() for line in fh if line.strip()]
+        except OSError as exc:
+            typer.echo(f"❌ Could not read {from_file}: {exc.strerror or exc}")
+            raise typer.Exit(code=1)
+        if not questions:
+            typer.echo("❌ No questions found. Use one question per line.")
+            raise typer.Exit(code=1)
+
+        def on_answer(i: int, answer) -> None:
+            if as_json:
+                return
+            typer.echo(f"\n❓ [{i + 1}/{len(questions)}] {answer['query']}")
+            typer.echo(f"❌ {answer['error']}" if "error" in answer else f"💡 {answer['result']}")
+
+        answers = rag.query_many(questions, k=k, mode=mode, use_cache=not no_cache, concurrency=concurrency, on_answer=on_answer)
+        if as_json:
+            typer.echo(json.dumps(answers, indent=2, ensure_ascii=False))
+        if any("error" in a for a in answers):
+            raise typer.Exit(code=1)
+        return
+    if not query:
+        typer.echo("❌ Give a question or --from-file.")
+        raise typer.Exit(code=2)
+
+    streamed = []
+
+    def on_token(token: str) -> None:
+        if not streamed:
+            sys.stdout.write("💡 ")
+        streamed.append(token)
+        sys.stdout.write(token)
+        sys.stdout.flush()
+
+    try:
+        answer = rag.query_vectorstore(
+            query, k=k, mode=mode, use_cache=not no_cache, on_token=on_token if stream and not as_json else None
+        )
+    except (ValueError, FileNotFoundError, RuntimeError) as exc:
+        typer.echo(str(exc))
+        raise typer.Exit(code=1)
+    if as_json:
+        typer.echo(json.dumps(answer, indent=2, ensure_ascii=False))
+        return
+    if streamed:
+        typer.echo("")
+    else:
+        typer.echo(f"💡 {answer['result']}")
+    if answer.get("cached"):
+        typer.echo(f"⚡ From the answer cache (similarity {answer['similarity']})")
+
+@cache_app.command("stats")
+def cache_stats(as_json: bool = typer.Option(False, "--json", help="Emit stats as JSON.")):
+    """Show answer cache size and hit/miss counts."""
+    import json
+
+    from . import rag
+
+    stats = rag.get_answer_cache().stats()
+    if as_json:
+        typer.echo(json.dumps(stats, indent=2))
+        return
+    typer.echo(f"Entries:   {stats['entries']} (max {stats['max_entries']}, TTL {int(stats['ttl_s'])}s)")
+    typer.echo(f"Hits:      {stats['hits']}")
+    typer.echo(f"Misses:    {stats['misses']}")
+    typer.echo(f"Hit rate:  {stats['hit_rate']:.1%}")
+    typer.echo(f"Threshold: {stats['threshold']} cosine similarity")
+    typer.echo(f"Path:      {stats['path']}")
+
+@cache_app.command("clear")
+def cache_clear():
+    """Drop every cached answer and reset the counters."""
+    from . import rag
+
+    rag.get_answer_cache().clear()
+    typer.echo("🧹 Answer cache cleared.")
+
+@doc_app.command()
+def serve(index: Optional[str] = typer.Option(None, help="Index directory (defaults to the one `doc load` writes).")):
+    """
+    Keep the embedding model and index warm for `doc ask` (Ctrl-C to stop).
     """
-    answer = rag.query_vectorstore(query)
-    typer.echo(f"💡 {answer['result']}")
+    from . import daemon, rag
+
+    index_dir = index or rag.INDEX_DIR
+    typer.echo(f"🔥 Warming embeddings and index from {index_dir} ...")
+    typer.echo(f"Listening on {daemon.socket_path()}")
+    try:
+        daemon.serve(index_dir)
+    except (RuntimeError, FileNotFoundError) as exc:
+        typer.echo(str(exc))
+        raise typer.Exit(code=1)
+    except KeyboardInterrupt:
+        pass
 
 @doc_app.command()
-def init_debate(topic: str):
-    """Simulate a multi-agent debate on a topic"""
-    result = debate.run_debate(topic)
+def init_debate(
+    topic: Optional[str] = typer.Argument(None, help="Topic to debate (or use --from-file)."),
+    from_file: Optional[str] = typer.Option(None, "--from-file", help="Text file with one topic per line."),
+    concurrency: int = typer.Option(4, help="Debates run at once with --from-file."),
+    researchers: int = typer.Option(
+        1, help="Researchers arguing in parallel (1-3); each one beyond the first adds an LLM call per debate."
+    ),
+    stream: bool = typer.Option(True, "--stream/--no-stream", help="Print each role's output as it is generated."),
+):
+    """Simulate a multi-agent debate on a topic, or on every topic in a file"""
+    import sys
+
+    from . import debate
+
+    if from_file:
+        try:
+            with open(from_file, encoding="utf-8") as fh:
+                topics = [line.strip() for line in fh if line.strip()]
+        except OSError as exc:
+            typer.echo(f"❌ Could not read {from_file}: {exc.strerror or exc}")
+            raise typer.Exit(code=1)
+        if not topics:
+            typer.echo("❌ No topics found. Use one topic per line.")
+            raise typer.Exit(code=1)
+
+        def on_result(i: int, result) -> None:
+            typer.echo(f"\n🧠 [{i + 1}/{len(topics)}] {result['question']}")
+            typer.echo(f"❌ {result['error']}" if "error" in result else "✅ " + result["consensus_output"])
+
+        try:
+            results = debate.run_debates(topics, concurrency=concurrency, researchers=researchers, on_result=on_result)
+        except ValueError as exc:
+            typer.echo(str(exc))
+            raise typer.Exit(code=1)
+        failed = sum(1 for r in results if "error" in r)
+        typer.echo(f"\n🧠 {len(results) - failed} debates finished, {failed} failed.")
+        if failed:
+            raise typer.Exit(code=1)
+        return
+    if not topic:
+        typer.echo("❌ Give a topic or --from-file.")
+        raise typer.Exit(code=2)
+
+    def on_token(token: str) -> None:
+        sys.stdout.write(token)
+        sys.stdout.flush()
+
+    try:
+        result = debate.run_debate(topic, on_token=on_token if stream else None, researchers=researchers)
+    except ValueError as exc:
+        typer.echo(str(exc))
+        raise typer.Exit(code=1)
 
     typer.echo("\n🧠 Debate Finished!")
-    typer.echo("\n--- Researcher ---\n" + result["researcher_output"])
-    typer.echo("\n--- Summarizer ---\n" + result["summarizer_output"])
-    typer.echo("\n--- Critic ---\n" + result["critic_output"])
+    if not stream:
+        typer.echo("\n--- Researcher ---\n" + result["researcher_output"])
+        typer.echo("\n--- Summarizer ---\n" + result["summarizer_output"])
+        typer.echo("\n--- Critic ---\n" + result["critic_output"])
     typer.echo("\n✅ Final Consensus:\n" + result["consensus_output"])
 if __name__ == "__main__":
     doc_app()
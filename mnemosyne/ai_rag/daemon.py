@@ -0,0 +1,142 @@
+"""Warm retrieval daemon for `mnemo doc ask`.
+
+`mnemo doc serve` keeps the embedding model and the FAISS index resident and
+answers retrieval requests over a Unix socket, so a question only pays for
+embedding the query and searching. Clients fall back to in-process retrieval
+when no daemon is listening.
+
+Protocol: one JSON object per line.
+  request:  {"query": str, "k": int, "index_dir": str, "mode": "vector"|"keyword"|"hybrid"}
+  response: {"ok": true, "hits": [{"page_content": str, "metadata": {...}}]}
+            {"ok": false, "error": str}
+  request:  {"embed": str}
+  response: {"ok": true, "vector": [float, ...]}
+"""
+
+import json
+import os
+import socket
+import socketserver
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from ..config import config_dir
+
+CONNECT_TIMEOUT = 0.2
+QUERY_TIMEOUT = 30.0
+
+
+def socket_path() -> Path:
+    return Path(os.getenv("MNEMO_RAG_SOCKET") or config_dir() / "rag.sock")
+
+
+def supported() -> bool:
+    return hasattr(socket, "AF_UNIX")
+
+
+def alive() -> bool:
+    """Whether something accepts connections on the socket; False only when nothing can be listening."""
+    path = socket_path()
+    if not supported() or not path.exists():
+        return False
+    try:
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+            sock.settimeout(CONNECT_TIMEOUT)
+            sock.connect(str(path))
+    except (ConnectionRefusedError, FileNotFoundError):
+        return False
+    except OSError:
+        # Busy or unreadable, but not provably stale: leave it alone.
+        return True
+    return True
+
+
+def _request(request: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    path = socket_path()
+    if not supported() or not path.exists():
+        return None
+    try:
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+            sock.settimeout(CONNECT_TIMEOUT)
+            sock.connect(str(path))
+            sock.settimeout(QUERY_TIMEOUT)
+            sock.sendall(json.dumps(request).encode("utf-8") + b"\n")
+            with sock.makefile("rb") as reader:
+                line = reader.readline()
+    except OSError:
+        return None
+    try:
+        response = json.loads(line)
+    except (TypeError, ValueError):
+        return None
+    if not response.get("ok"):
+        return None
+    return response
+
+
+def query(text: str, k: int, index_dir: str, mode: str = "vector") -> Optional[List[Dict[str, Any]]]:
+    """Ask the daemon for the top-k chunks; None when no daemon can answer."""
+    response = _request({"query": text, "k": k, "index_dir": os.path.abspath(index_dir), "mode": mode})
+    if response is None:
+        return None
+    return response.get("hits") or []
+
+
+def embed(text: str) -> Optional[List[float]]:
+    """Embed ``text`` with the daemon's warm model; None when no daemon can answer."""
+    response = _request({"embed": text})
+    if response is None:
+        return None
+    return response.get("vector")
+
+
+class _Handler(socketserver.StreamRequestHandler):
+    def handle(self) -> None:
+        from . import rag
+
+        for line in self.rfile:
+            try:
+                request = json.loads(line)
+                response: Dict[str, Any] = {"ok": True}
+                if "embed" in request:
+                    response["vector"] = rag.get_embeddings().embed_query(request["embed"])
+                else:
+                    if os.path.abspath(request["index_dir"]) != self.server.index_dir:  # type: ignore[attr-defined]
+                        raise ValueError("daemon serves a different index")
+                    docs = rag.search(
+                        rag.load_vectorstore(self.server.index_dir),  # type: ignore[attr-defined]
+                        request["query"],
+                        k=int(request.get("k") or rag.DEFAULT_K),
+                        mode=request.get("mode") or "vector",
+                    )
+                    response["hits"] = [{"page_content": d.page_content, "metadata": d.metadata} for d in docs]
+            except Exception as exc:
+                response = {"ok": False, "error": str(exc)}
+            self.wfile.write(json.dumps(response, default=str).encode("utf-8") + b"\n")
+            self.wfile.flush()
+
+
+class _Server(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+
+def serve(index_dir: str) -> None:
+    """Warm the model and index, then answer requests until interrupted."""
+    if not supported():
+        raise RuntimeError("The retrieval daemon needs Unix domain sockets, which this platform lacks.")
+    from . import rag
+
+    index_dir = os.path.abspath(index_dir)
+    rag.get_embeddings()
+    rag.load_vectorstore(index_dir)
+    path = socket_path()
+    if path.exists():
+        if alive():
+            raise RuntimeError(f"A retrieval daemon is already listening on {path}")
+        path.unlink()  # left behind by a daemon that did not shut down cleanly
+    with _Server(str(path), _Handler) as server:
+        server.index_dir = index_dir  # type: ignore[attr-defined]
+        try:
+            server.serve_forever()
+        finally:
+            path.unlink(missing_ok=True)
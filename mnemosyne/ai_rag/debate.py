@@ -1,82 +1,148 @@
+import asyncio
+import operator
 import os
-from typing import TypedDict
-from langchain_google_genai import ChatGoogleGenerativeAI
-from langgraph.graph import StateGraph, END
+from functools import lru_cache
+from typing import Annotated, Any, Callable, Dict, List, Optional, TypedDict
+
+from langgraph.graph import StateGraph, START, END
 from dotenv import load_dotenv
 
+from ..llm import astream_text, get_chat_model
+from ..llm_batch import abatched_text
+
+DEBATE_MODEL = "gemini-1.5-flash"
+DEBATE_TEMPERATURE = 0.7
+MAX_OUTPUT_TOKENS = 80
+# Each researcher argues from one angle; they run in parallel and feed the summarizer.
+PERSPECTIVES = ("supporting evidence", "counter-evidence", "background and context")
+# One researcher keeps a debate at four LLM calls; each extra perspective adds one more call.
+DEFAULT_RESEARCHERS = int(os.getenv("MNEMO_DEBATE_RESEARCHERS", "1"))
+DEFAULT_CONCURRENCY = int(os.getenv("MNEMO_DEBATE_CONCURRENCY", "4"))
+
 # Define state
-class State(TypedDict):
+class State(TypedDict, total=False):
     question: str
     llm: object
+    researcher_outputs: Annotated[List[str], operator.add]
     researcher_output: str
     summarizer_output: str
     critic_output: str
     consensus_output: str
+    on_token: object
 
 load_dotenv()
 
+async def _ask(state: State, role: str, prompt: str, stream: bool = True) -> str:
+    # Streams under a role heading when the caller asked for tokens as they arrive.
+    # Roles that run side by side are emitted whole so their output does not interleave.
+    on_token = state.get("on_token")
+    config = {"max_output_tokens": MAX_OUTPUT_TOKENS}
+    if on_token and stream:
+        on_token(f"\n--- {role} ---\n")
+        text = await astream_text(state["llm"], prompt, on_token, generation_config=config)
+        on_token("\n")
+    else:
+        text = await abatched_text(state["llm"], prompt, generation_config=config)
+        if on_token:
+            on_token(f"\n--- {role} ---\n{text}\n")
+    return text.strip()
+
 # --- Debate Agent Roles ---
-def researcher(state: State):
-    q = state["question"]
-    response = state["llm"].invoke(
-        f"As researcher, give evidence in <=300 characters:\n{q}",
-        generation_config={"max_output_tokens": 80}
-    )
-    state["researcher_output"] = response.content.strip()
-    return state
+def _researcher(perspective: Optional[str]):
+    async def researcher(state: State):
+        q = state["question"]
+        if perspective is None:
+            text = await _ask(state, "Researcher", f"As researcher, give evidence in <=300 characters:\n{q}")
+        else:
+            text = await _ask(
+                state, f"Researcher ({perspective})",
+                f"As researcher focusing on {perspective}, give evidence in <=300 characters:\n{q}", stream=False,
+            )
+        return {"researcher_outputs": [text]}
+    return researcher
 
-def summarizer(state: State):
-    response = state["llm"].invoke(
-        f"As summarizer, condense in <=300 characters:\n{state['researcher_output']}",
-        generation_config={"max_output_tokens": 80}
-    )
-    state["summarizer_output"] = response.content.strip()
-    return state
+async def summarizer(state: State):
+    research = "\n".join(state.get("researcher_outputs") or [])
+    text = await _ask(state, "Summarizer", f"As summarizer, condense in <=300 characters:\n{research}")
+    return {"researcher_output": research, "summarizer_output": text}
 
-def critic(state: State):
-    response = state["llm"].invoke(
-        f"As critic, refine/challenge in <300 characters:\n{state['summarizer_output']}",
-        generation_config={"max_output_tokens": 80}
-    )
-    state["critic_output"] = response.content.strip()
-    return state
+async def critic(state: State):
+    text = await _ask(state, "Critic", f"As critic, refine/challenge in <300 characters:\n{state['summarizer_output']}")
+    return {"critic_output": text}
 
-def consensus(state: State):
-    response = state["llm"].invoke(
+async def consensus(state: State):
+    text = await _ask(
+        state,
+        "Consensus",
         f"Give balanced consensus in <=300 characters:\n"
         f"Research: {state['researcher_output']}\n"
         f"Summary: {state['summarizer_output']}\n"
         f"Critic: {state['critic_output']}",
-        generation_config={"max_output_tokens": 80}
-    )
-    state["consensus_output"] = response.content.strip()
-    return state
-
-def run_debate(topic: str):
-    """Run a debate workflow on a given topic and return results."""
-    api_key = os.getenv("GOOGLE_API_KEY")
-    if not api_key:
-        raise ValueError("❌ GOOGLE_API_KEY not found in .env")
-
-    llm = ChatGoogleGenerativeAI(
-        model="gemini-1.5-flash", 
-        temperature=0.7, 
-        google_api_key=api_key
     )
+    return {"consensus_output": text}
 
+def build_graph(researchers: int = DEFAULT_RESEARCHERS):
+    """Researchers fan out from the start in parallel; summarizer, critic and consensus follow in turn."""
     graph = StateGraph(State)
-    graph.add_node("researcher", researcher)
+    count = max(1, min(researchers, len(PERSPECTIVES)))
+    for i in range(count):
+        name = f"researcher_{i}"
+        graph.add_node(name, _researcher(PERSPECTIVES[i] if count > 1 else None))
+        graph.add_edge(START, name)
     graph.add_node("summarizer", summarizer)
     graph.add_node("critic", critic)
     graph.add_node("consensus", consensus)
 
-    graph.set_entry_point("researcher")
-    graph.add_edge("researcher", "summarizer")
+    graph.add_edge([f"researcher_{i}" for i in range(count)], "summarizer")
     graph.add_edge("summarizer", "critic")
     graph.add_edge("critic", "consensus")
     graph.add_edge("consensus", END)
+    return graph.compile()
+
+@lru_cache(maxsize=None)
+def get_graph(researchers: int = DEFAULT_RESEARCHERS):
+    """Compiled debate graph, built once per process for each researcher count."""
+    return build_graph(researchers)
+
+def _llm() -> Any:
+    if not os.getenv("GOOGLE_API_KEY"):
+        raise ValueError("❌ GOOGLE_API_KEY not found in .env")
+    llm, _ = get_chat_model("gemini", model=DEBATE_MODEL, temperature=DEBATE_TEMPERATURE)
+    return llm
+
+async def arun_debate(topic: str, on_token=None, researchers: int = DEFAULT_RESEARCHERS) -> Dict[str, Any]:
+    """Run a debate workflow on a given topic and return results.
+
+    ``on_token`` receives each role's output as it streams.
+    """
+    state = {"question": topic, "llm": _llm(), "on_token": on_token}
+    return await get_graph(researchers).ainvoke(state)
+
+def run_debate(topic: str, on_token=None, researchers: int = DEFAULT_RESEARCHERS) -> Dict[str, Any]:
+    return asyncio.run(arun_debate(topic, on_token=on_token, researchers=researchers))
+
+async def arun_debates(topics: List[str], concurrency: int = DEFAULT_CONCURRENCY, researchers: int = DEFAULT_RESEARCHERS,
+                       on_result: Optional[Callable[[int, Dict[str, Any]], None]] = None) -> List[Dict[str, Any]]:
+    """Debate every topic, at most ``concurrency`` at once; results come back in topic order.
+
+    ``on_result`` is called with (index, result) as each debate finishes. A
+    failed debate yields ``{"question", "error"}`` instead of stopping the batch.
+    """
+    _llm()  # fail fast on missing credentials
+    gate = asyncio.Semaphore(max(1, concurrency))
+
+    async def one(i: int, topic: str) -> Dict[str, Any]:
+        async with gate:
+            try:
+                result = await arun_debate(topic, researchers=researchers)
+            except Exception as exc:
+                result = {"question": topic, "error": str(exc)}
+        if on_result is not None:
+            on_result(i, result)
+        return result
 
-    debate_graph = graph.compile()
+    return list(await asyncio.gather(*(one(i, t) for i, t in enumerate(topics))))
 
-    state = {"question": topic, "llm": llm}
-    return debate_graph.invoke(state)
+def run_debates(topics: List[str], concurrency: int = DEFAULT_CONCURRENCY, researchers: int = DEFAULT_RESEARCHERS,
+                on_result: Optional[Callable[[int, Dict[str, Any]], None]] = None) -> List[Dict[str, Any]]:
+    return asyncio.run(arun_debates(topics, concurrency=concurrency, researchers=researchers, on_result=on_result))
@@ -1,4 +1,5 @@
 import os
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
 from langchain_community.document_loaders import PyPDFLoader, TextLoader
 from langchain.text_splitter import RecursiveCharacterTextSplitter
 
@@ -8,23 +9,63 @@ text_splitter = RecursiveCharacterTextSplitter(
     chunk_overlap=100,   # small overlap to keep context
 )
 
-def load_documents(path: str):
-    docs = []
+TEXT_EXTENSIONS = ["md", "txt", "py", "js", "java"]
+SUPPORTED_EXTENSIONS = ["pdf"] + TEXT_EXTENSIONS
+
+def iter_files(path: str):
+    """Yield every loadable file under ``path`` (or ``path`` itself)."""
     if os.path.isfile(path):
-        docs.extend(_load_file(path))
+        candidates = [path]
     else:
-        for root, _, files in os.walk(path):
-            for f in files:
-                docs.extend(_load_file(os.path.join(root, f)))
+        candidates = (os.path.join(root, f) for root, _, files in os.walk(path) for f in sorted(files))
+    for filepath in candidates:
+        if filepath.lower().split(".")[-1] in SUPPORTED_EXTENSIONS:
+            yield filepath
+
+def load_documents(path: str):
+    docs = []
+    for filepath in iter_files(path):
+        docs.extend(_load_file(filepath))
     return docs
 
+def default_workers() -> int:
+    return min(os.cpu_count() or 1, 8)
+
+def iter_loaded(filepaths, workers: int = 1):
+    """Yield ``(filepath, chunks)`` as files finish parsing and splitting.
+
+    With more than one worker, files are parsed in a process pool with at most
+    ``2 * workers`` files in flight, so results stream out in completion order
+    while memory stays bounded by the queue rather than the corpus.
+    """
+    filepaths = list(filepaths)
+    if workers <= 1 or len(filepaths) <= 1:
+        for filepath in filepaths:
+            yield filepath, _load_file(filepath)
+        return
+    pending = {}
+    queue = iter(filepaths)
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        for filepath in queue:
+            pending[pool.submit(_load_file, filepath)] = filepath
+            if len(pending) >= 2 * workers:
+                break
+        while pending:
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                filepath = pending.pop(future)
+                yield filepath, future.result()
+                nxt = next(queue, None)
+                if nxt is not None:
+                    pending[pool.submit(_load_file, nxt)] = nxt
+
 def _load_file(filepath: str):
     ext = filepath.lower().split(".")[-1]
     if ext == "pdf":
         loader = PyPDFLoader(filepath)
         pages = loader.load()
         return text_splitter.split_documents(pages)
-    elif ext in ["md", "txt", "py", "js", "java"]:
+    elif ext in TEXT_EXTENSIONS:
         loader = TextLoader(filepath, encoding="utf-8")
         docs = loader.load()
         return text_splitter.split_documents(docs)
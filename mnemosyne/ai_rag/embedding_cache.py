@@ -0,0 +1,101 @@
+import hashlib
+import sqlite3
+import threading
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+import numpy as np
+from langchain_core.embeddings import Embeddings
+
+from ..config import cache_dir
+
+# SQLite caps bound parameters per statement; look keys up in slices.
+_LOOKUP_SLICE = 500
+
+
+def default_path() -> Path:
+    return cache_dir() / "embeddings.sqlite"
+
+
+def content_key(model_name: str, text: str) -> str:
+    return hashlib.sha256(f"{model_name}\0{text}".encode("utf-8")).hexdigest()
+
+
+class EmbeddingCache:
+    """Content-addressed store of float32 vectors keyed by hash(model name + text)."""
+
+    def __init__(self, path: Optional[Path] = None):
+        self.path = Path(path or default_path())
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(self.path), check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("CREATE TABLE IF NOT EXISTS embeddings (key TEXT PRIMARY KEY, vector BLOB NOT NULL)")
+        self._conn.commit()
+
+    def get_many(self, keys: List[str]) -> Dict[str, List[float]]:
+        found: Dict[str, List[float]] = {}
+        with self._lock:
+            for start in range(0, len(keys), _LOOKUP_SLICE):
+                chunk = keys[start:start + _LOOKUP_SLICE]
+                marks = ",".join("?" * len(chunk))
+                for key, blob in self._conn.execute(f"SELECT key, vector FROM embeddings WHERE key IN ({marks})", chunk):
+                    found[key] = np.frombuffer(blob, dtype="float32").tolist()
+        return found
+
+    def put_many(self, items: Dict[str, List[float]]) -> None:
+        rows = [(key, np.asarray(vec, dtype="float32").tobytes()) for key, vec in items.items()]
+        with self._lock:
+            self._conn.executemany("INSERT OR REPLACE INTO embeddings (key, vector) VALUES (?, ?)", rows)
+            self._conn.commit()
+
+    def count(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM embeddings").fetchone()[0]
+
+    def clear(self) -> None:
+        with self._lock:
+            self._conn.execute("DELETE FROM embeddings")
+            self._conn.commit()
+
+
+class CachedEmbeddings(Embeddings):
+    """Embeddings wrapper that only sends unseen chunk texts to the model.
+
+    The wrapped model is created through ``factory`` on the first cache miss,
+    so a load whose chunks are all cached never loads the model at all.
+    """
+
+    def __init__(self, factory: Callable[[], Any], model_name: str, cache: Optional[EmbeddingCache] = None):
+        self._factory = factory
+        self._model: Any = None
+        self.model_name = model_name
+        self.cache = cache or EmbeddingCache()
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def model(self) -> Any:
+        if self._model is None:
+            self._model = self._factory()
+        return self._model
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        keys = [content_key(self.model_name, text) for text in texts]
+        found = self.cache.get_many(list(set(keys)))
+        missing: Dict[str, str] = {}
+        for key, text in zip(keys, texts):
+            if key not in found:
+                missing.setdefault(key, text)
+        if missing:
+            vectors = self.model.embed_documents(list(missing.values()))
+            # Round-trip through float32 so hits and misses return identical values.
+            fresh = {key: np.asarray(vec, dtype="float32").tolist() for key, vec in zip(missing.keys(), vectors)}
+            self.cache.put_many(fresh)
+            found.update(fresh)
+        self.misses += len(missing)
+        self.hits += len(texts) - len(missing)
+        return [found[key] for key in keys]
+
+    def embed_query(self, text: str) -> List[float]:
+        return self.model.embed_query(text)
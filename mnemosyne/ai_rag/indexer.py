@@ -0,0 +1,292 @@
+import hashlib
+import json
+import os
+import time
+import uuid
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+from langchain_community.docstore.in_memory import InMemoryDocstore
+from langchain_community.vectorstores import FAISS
+
+from . import ann, chunk_store, doc_loader
+
+MANIFEST_NAME = "manifest.json"
+MANIFEST_VERSION = 1
+DEFAULT_BATCH_SIZE = 64
+DEFAULT_CHECKPOINT_EVERY = 2048
+
+
+def manifest_path(index_dir: str) -> str:
+    return os.path.join(index_dir, MANIFEST_NAME)
+
+
+def load_manifest(index_dir: str) -> Dict[str, Any]:
+    """Manifest of indexed files: path -> {mtime, size, sha256, chunk_ids}.
+
+    ``pending`` maps files interrupted mid-load to ``{sha256, chunk_ids}``, the
+    IDs of their leading chunks already stored in the index.
+    """
+    try:
+        with open(manifest_path(index_dir), encoding="utf-8") as fh:
+            data = json.load(fh)
+    except (OSError, ValueError):
+        return {"version": MANIFEST_VERSION, "files": {}}
+    if data.get("version") != MANIFEST_VERSION or not isinstance(data.get("files"), dict):
+        return {"version": MANIFEST_VERSION, "files": {}}
+    return data
+
+
+def save_manifest(index_dir: str, manifest: Dict[str, Any]) -> None:
+    os.makedirs(index_dir, exist_ok=True)
+    tmp = manifest_path(index_dir) + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as fh:
+        json.dump(manifest, fh, indent=1)
+    os.replace(tmp, manifest_path(index_dir))
+
+
+def file_sha256(filepath: str) -> str:
+    digest = hashlib.sha256()
+    with open(filepath, "rb") as fh:
+        for block in iter(lambda: fh.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+class _StreamingWriter:
+    """Embeds chunks in fixed-size batches and appends them to a FAISS store.
+
+    A file only enters the manifest once all of its chunks are stored. At each
+    checkpoint the store is saved together with the manifest of completed
+    files and the IDs of partially stored ones; the next run keeps those
+    chunks and embeds the rest when the file is unchanged, and deletes them
+    otherwise.
+    """
+
+    def __init__(self, index_dir: str, embeddings: Any, store: Optional[FAISS], current: Dict[str, Dict[str, Any]],
+                 stats: Dict[str, Any], batch_size: int, checkpoint_every: int,
+                 on_progress: Optional[Callable[[Dict[str, Any]], None]],
+                 index_type: str = "flat", train_size: int = ann.DEFAULT_TRAIN_SIZE):
+        self.index_dir = index_dir
+        self.index_type = index_type
+        self.train_size = max(1, train_size)
+        self.embeddings = embeddings
+        self.store = store
+        self.current = current
+        self.stats = stats
+        self.batch_size = max(1, batch_size)
+        self.checkpoint_every = max(self.batch_size, checkpoint_every)
+        self.on_progress = on_progress
+        self.started = time.perf_counter()
+        self._buffer: List[Tuple[str, Any]] = []
+        self._entries: Dict[str, Dict[str, Any]] = {}
+        self._remaining: Dict[str, int] = {}
+        self._since_checkpoint = 0
+        # Embedded batches held back until there are enough vectors to train on.
+        self._untrained: List[Tuple[List[str], List[List[float]], List[dict], List[str]]] = []
+        self._untrained_count = 0
+
+    def add_file(self, key: str, entry: Dict[str, Any], chunks: List[Any], stored: Optional[List[str]] = None) -> None:
+        """Queue ``chunks`` of ``key``; ``stored`` are IDs of its leading chunks already in the index."""
+        entry["chunk_ids"] = list(stored or [])
+        chunks = chunks[len(entry["chunk_ids"]):]
+        self._entries[key] = entry
+        self._remaining[key] = len(chunks)
+        if not chunks:
+            self._complete(key)
+        for chunk in chunks:
+            self._buffer.append((key, chunk))
+            if len(self._buffer) >= self.batch_size:
+                self.flush()
+
+    def _complete(self, key: str) -> None:
+        del self._remaining[key]
+        self.current[key] = self._entries.pop(key)
+
+    def _store_batch(self, texts: List[str], vectors: List[List[float]], metadatas: List[dict], ids: List[str], final: bool) -> None:
+        if self.store is not None:
+            if texts:
+                self.store.add_embeddings(list(zip(texts, vectors)), metadatas=metadatas, ids=ids)
+            return
+        if not ann.needs_training(self.index_type):
+            if not texts:
+                return
+            index = ann.make_index(self.index_type, len(vectors[0]))
+            self.store = FAISS(self.embeddings, index, InMemoryDocstore(), {})
+            self.store.add_embeddings(list(zip(texts, vectors)), metadatas=metadatas, ids=ids)
+            return
+        if texts:
+            self._untrained.append((texts, vectors, metadatas, ids))
+            self._untrained_count += len(texts)
+        if not self._untrained or (self._untrained_count < self.train_size and not final):
+            return
+        held, self._untrained, self._untrained_count = self._untrained, [], 0
+        sample = np.array([v for _, vecs, _, _ in held for v in vecs], dtype="float32")
+        index = ann.make_index(self.index_type, sample.shape[1], sample[: self.train_size])
+        self.store = FAISS(self.embeddings, index, InMemoryDocstore(), {})
+        for texts_, vectors_, metadatas_, ids_ in held:
+            self.store.add_embeddings(list(zip(texts_, vectors_)), metadatas=metadatas_, ids=ids_)
+
+    def flush(self, final: bool = False) -> None:
+        if not self._buffer:
+            if final:
+                self._store_batch([], [], [], [], final=True)
+            return
+        batch, self._buffer = self._buffer, []
+        texts = [chunk.page_content for _, chunk in batch]
+        vectors = self.embeddings.embed_documents(texts)
+        ids = [uuid.uuid4().hex for _ in batch]
+        metadatas = [chunk.metadata for _, chunk in batch]
+        self._store_batch(texts, vectors, metadatas, ids, final)
+        for (key, _), chunk_id in zip(batch, ids):
+            self._entries[key]["chunk_ids"].append(chunk_id)
+            self._remaining[key] -= 1
+            if self._remaining[key] == 0:
+                self._complete(key)
+        self.stats["chunks"] += len(batch)
+        self._since_checkpoint += len(batch)
+        if self._since_checkpoint >= self.checkpoint_every:
+            self.checkpoint()
+
+    def checkpoint(self) -> None:
+        self._since_checkpoint = 0
+        elapsed = time.perf_counter() - self.started
+        self.stats["seconds"] = round(elapsed, 3)
+        self.stats["chunks_per_sec"] = round(self.stats["chunks"] / elapsed, 1) if elapsed > 0 else 0.0
+        if self.store is not None:
+            chunk_store.save(self.store, self.index_dir)
+            # Batches held back for IVF training are not in the saved index yet.
+            held = {cid for _, _, _, ids in self._untrained for cid in ids}
+            pending = {}
+            for key, entry in self._entries.items():
+                stored = [cid for cid in entry["chunk_ids"] if cid not in held]
+                if stored:
+                    pending[key] = {"sha256": entry["sha256"], "chunk_ids": stored}
+            save_manifest(self.index_dir, {
+                "version": MANIFEST_VERSION,
+                "index_type": self.index_type,
+                "files": self.current,
+                "pending": pending,
+            })
+        if self.on_progress is not None:
+            self.on_progress(self.stats)
+
+
+def update_index(
+    path: str,
+    index_dir: str,
+    get_embeddings: Callable[[], Any],
+    full: bool = False,
+    workers: int = 1,
+    batch_size: int = DEFAULT_BATCH_SIZE,
+    checkpoint_every: int = DEFAULT_CHECKPOINT_EVERY,
+    on_progress: Optional[Callable[[Dict[str, Any]], None]] = None,
+    index_type: Optional[str] = None,
+    train_size: int = ann.DEFAULT_TRAIN_SIZE,
+) -> Dict[str, Any]:
+    """Bring the index at ``index_dir`` in line with the files under ``path``.
+
+    Only files whose size/mtime and content hash changed are re-split and
+    re-embedded; vectors of changed and vanished files are removed. Files
+    indexed earlier but not under ``path`` count as deleted, matching the
+    overwrite semantics of a full load. The embedding model and the index
+    are only loaded when something has to change. Chunks stream from the
+    ``workers`` loader pool into ``batch_size`` embedding calls, and progress
+    is checkpointed every ``checkpoint_every`` chunks so an interrupted load
+    resumes where it stopped. ``index_type`` (see ann.INDEX_TYPES) defaults to
+    the type already on disk; IVF indexes are trained on the first
+    ``train_size`` vectors. Changing the type, or deleting vectors from an
+    index that cannot delete in place, rebuilds the index. Returns counts per
+    outcome plus throughput.
+    """
+    manifest = load_manifest(index_dir)
+    kind = index_type or manifest.get("index_type") or "flat"
+    if kind not in ann.INDEX_TYPES:
+        raise ValueError(f"❌ Unknown index type '{kind}'. Use one of: {', '.join(ann.INDEX_TYPES)}")
+    incremental = (
+        not full
+        and bool(manifest["files"])
+        and chunk_store.exists(index_dir)
+        and manifest.get("index_type", "flat") == kind
+    )
+    if not incremental:
+        manifest = {"version": MANIFEST_VERSION, "index_type": kind, "files": {}}
+
+    previous: Dict[str, Dict[str, Any]] = manifest["files"]
+    current: Dict[str, Dict[str, Any]] = {}
+    stats: Dict[str, Any] = {"added": 0, "changed": 0, "removed": 0, "unchanged": 0, "chunks": 0}
+    stale_ids: List[str] = []
+    to_load: Dict[str, Dict[str, Any]] = {}
+
+    for filepath in doc_loader.iter_files(path):
+        key = os.path.abspath(filepath)
+        st = os.stat(key)
+        entry = previous.get(key)
+        if entry and entry["size"] == st.st_size and entry["mtime"] == st.st_mtime:
+            current[key] = entry
+            stats["unchanged"] += 1
+            continue
+        sha = file_sha256(key)
+        if entry and entry["sha256"] == sha:
+            current[key] = dict(entry, size=st.st_size, mtime=st.st_mtime)
+            stats["unchanged"] += 1
+            continue
+        if entry:
+            stale_ids.extend(entry["chunk_ids"])
+            stats["changed"] += 1
+        else:
+            stats["added"] += 1
+        to_load[key] = {"mtime": st.st_mtime, "size": st.st_size, "sha256": sha}
+
+    for key, entry in previous.items():
+        if key not in current and key not in to_load:
+            stale_ids.extend(entry["chunk_ids"])
+            stats["removed"] += 1
+
+    # Files that were mid-way through an interrupted load: chunks that reached
+    # the index are kept when the file is unchanged, so the load resumes
+    # instead of deleting (and, for IVF/HNSW, rebuilding).
+    resumed: Dict[str, List[str]] = {}
+    for key, value in (manifest.get("pending") or {}).items():
+        ids = value.get("chunk_ids", []) if isinstance(value, dict) else value
+        present = chunk_store.stored_ids(index_dir, ids)
+        ids = [cid for cid in ids if cid in present]
+        sha = value.get("sha256") if isinstance(value, dict) else None
+        if ids and sha and key in to_load and to_load[key]["sha256"] == sha:
+            resumed[key] = ids
+        else:
+            stale_ids.extend(ids)
+
+    if incremental and not stale_ids and not to_load:
+        manifest["files"] = current
+        save_manifest(index_dir, manifest)
+        return stats
+    if not incremental and not to_load:
+        raise ValueError("❌ No documents found. Please check your docs path.")
+    if incremental and stale_ids and not ann.supports_delete(kind):
+        stats = update_index(path, index_dir, get_embeddings, full=True, workers=workers, batch_size=batch_size,
+                             checkpoint_every=checkpoint_every, on_progress=on_progress, index_type=kind,
+                             train_size=train_size)
+        stats["rebuilt"] = 1
+        return stats
+
+    embeddings = get_embeddings()
+    store: Optional[FAISS] = None
+    if incremental:
+        store = chunk_store.load(index_dir, embeddings)
+        if stale_ids:
+            store.delete(stale_ids)
+
+    writer = _StreamingWriter(index_dir, embeddings, store, current, stats, batch_size, checkpoint_every, on_progress,
+                              index_type=kind, train_size=train_size)
+    try:
+        for key, chunks in doc_loader.iter_loaded(to_load, workers=workers):
+            writer.add_file(key, to_load[key], chunks, resumed.get(key))
+        writer.flush(final=True)
+    except KeyboardInterrupt:
+        writer.checkpoint()
+        raise
+    if writer.store is None:
+        raise ValueError("❌ No documents found. Please check your docs path.")
+    writer.checkpoint()
+    return stats
@@ -1,28 +1,271 @@
-
+import hashlib
 import os
-from langchain_huggingface import HuggingFaceEmbeddings
-from langchain_google_genai import ChatGoogleGenerativeAI, GoogleGenerativeAIEmbeddings
+from functools import lru_cache
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from langchain_core.documents import Document
+from langchain_core.retrievers import BaseRetriever
 from langchain_community.vectorstores import FAISS
-from langchain.chains import RetrievalQA
 from dotenv import load_dotenv
 
+from . import chunk_store
+
 load_dotenv()
 
-def build_vectorstore(docs):
+INDEX_DIR = "ai_rag/vectorstore/docs_index"
+EMBEDDING_MODEL = "sentence-transformers/all-MiniLM-L6-v2"
+DEFAULT_K = 4
+# vector: embedding similarity; keyword: BM25 over chunk text; hybrid: both, fused by rank.
+MODES = ("vector", "keyword", "hybrid")
+
+# Opened indexes keyed by absolute path; entries are reused until the files on
+# disk change, so repeated questions in one process skip reopening them.
+_stores: Dict[str, Tuple[float, chunk_store.MappedStore]] = {}
+
+
+@lru_cache(maxsize=None)
+def get_embeddings():
+    """Process-wide embedding model (loading it dominates cold query time)."""
+    from langchain_huggingface import HuggingFaceEmbeddings
+
+    return HuggingFaceEmbeddings(model_name=EMBEDDING_MODEL)
+
+
+@lru_cache(maxsize=None)
+def get_cached_embeddings():
+    """Embeddings for indexing: chunks seen before are read from ~/.mnemo/cache/embeddings.sqlite."""
+    from .embedding_cache import CachedEmbeddings
+
+    return CachedEmbeddings(get_embeddings, EMBEDDING_MODEL)
+
+
+INDEX_FILES = chunk_store.FILES
+
+
+def _index_mtime(index_dir: str) -> float:
+    try:
+        return max(os.path.getmtime(os.path.join(index_dir, f)) for f in INDEX_FILES)
+    except OSError:
+        if os.path.exists(os.path.join(index_dir, "index.pkl")):
+            raise FileNotFoundError(
+                f"❌ The index at {index_dir} uses the old pickle format. Run 'mnemo doc load <path>' to rebuild it."
+            )
+        raise FileNotFoundError(f"❌ No index found at {index_dir}. Run 'mnemo doc load <path>' first.")
+
+
+def index_version(index_dir: str = INDEX_DIR) -> str:
+    """Changes whenever `doc load` rewrites the index at ``index_dir``."""
+    key = os.path.abspath(index_dir)
+    stamp = [key] + [f"{os.path.getsize(os.path.join(key, f))}:{os.path.getmtime(os.path.join(key, f))}" for f in INDEX_FILES]
+    return hashlib.sha256("|".join(stamp).encode("utf-8")).hexdigest()[:16]
+
+
+def embed_query(text: str) -> List[float]:
+    """Query embedding from the warm daemon when one is running, else from the in-process model."""
+    from . import daemon
+
+    vector = daemon.embed(text)
+    return vector if vector is not None else get_embeddings().embed_query(text)
+
+
+def load_vectorstore(index_dir: str = INDEX_DIR, embeddings: Any = None) -> chunk_store.MappedStore:
+    """Return the memory-mapped store at ``index_dir``, reopening only when it changed on disk."""
+    key = os.path.abspath(index_dir)
+    mtime = _index_mtime(key)
+    cached = _stores.get(key)
+    if cached is not None and cached[0] == mtime:
+        return cached[1]
+    store = chunk_store.MappedStore(key, embeddings or get_embeddings())
+    # A superseded store is not closed here: daemon threads or worker-thread
+    # retrievals may still be reading it. Its connection closes once unreferenced.
+    _stores[key] = (mtime, store)
+    return store
+
+
+def build_vectorstore(docs, index_dir: str = INDEX_DIR, embeddings: Any = None):
     if not docs:
         raise ValueError("❌ No documents found. Please check your docs path.")
-    embeddings = HuggingFaceEmbeddings(model_name="sentence-transformers/all-MiniLM-L6-v2")
-    vectorstore = FAISS.from_documents(docs, embeddings)
-    vectorstore.save_local("ai_rag/vectorstore/docs_index")
-
-def query_vectorstore(query: str):
-    embeddings = HuggingFaceEmbeddings(model_name="sentence-transformers/all-MiniLM-L6-v2")
-    vectorstore = FAISS.load_local(
-        "ai_rag/vectorstore/docs_index", embeddings, allow_dangerous_deserialization=True
+    vectorstore = FAISS.from_documents(docs, embeddings or get_cached_embeddings())
+    chunk_store.save(vectorstore, index_dir)
+
+
+def search(store: chunk_store.MappedStore, query: str, k: int = DEFAULT_K, mode: str = "vector") -> List[Document]:
+    if mode not in MODES:
+        raise ValueError(f"❌ Unknown retrieval mode '{mode}'. Use one of: {', '.join(MODES)}")
+    if mode == "hybrid":
+        return store.hybrid_search(query, k=k)
+    if mode == "keyword":
+        return store.keyword_search(query, k=k)
+    return store.similarity_search(query, k=k)
+
+
+def retrieve(query: str, k: int = DEFAULT_K, index_dir: str = INDEX_DIR, mode: str = "vector") -> List[Document]:
+    """Top-k chunks for ``query``, answered by a running `mnemo doc serve` daemon when available."""
+    from . import daemon
+
+    hits = daemon.query(query, k=k, index_dir=index_dir, mode=mode)
+    if hits is not None:
+        return [Document(page_content=h["page_content"], metadata=h.get("metadata") or {}) for h in hits]
+    return search(load_vectorstore(index_dir), query, k=k, mode=mode)
+
+
+class WarmRetriever(BaseRetriever):
+    """Retriever over the warm daemon or the in-process index cache."""
+
+    k: int = DEFAULT_K
+    index_dir: str = INDEX_DIR
+    mode: str = "vector"
+
+    def _get_relevant_documents(self, query: str, *, run_manager: Optional[Any] = None) -> List[Document]:
+        return retrieve(query, k=self.k, index_dir=self.index_dir, mode=self.mode)
+
+
+def retrieval_benchmark(cases: List[Tuple[str, str]], max_k: int = 10, index_dir: str = INDEX_DIR,
+                        modes: Tuple[str, ...] = MODES) -> List[Dict[str, Any]]:
+    """Smallest k (and the prompt tokens it costs) at which each mode retrieves the expected text.
+
+    ``cases`` are (question, expected) pairs; a case is answered at rank r when
+    ``expected`` occurs in the text or source of the r-th chunk. Modes that
+    answer the same cases with a smaller k need fewer context tokens.
+    """
+    from ..llm import estimate_tokens
+
+    store = load_vectorstore(index_dir)
+    rows: List[Dict[str, Any]] = []
+    for mode in modes:
+        found_at: List[int] = []
+        tokens: List[int] = []
+        full_tokens = 0
+        for question, expected in cases:
+            docs = search(store, question, k=max_k, mode=mode)
+            costs = [estimate_tokens(d.page_content) for d in docs]
+            full_tokens += sum(costs)
+            needle = expected.lower()
+            for rank, doc in enumerate(docs, start=1):
+                if needle in doc.page_content.lower() or needle in str(doc.metadata.get("source", "")).lower():
+                    found_at.append(rank)
+                    tokens.append(sum(costs[:rank]))
+                    break
+        rows.append({
+            "mode": mode,
+            "hit_rate": round(len(found_at) / len(cases), 3) if cases else 0.0,
+            "mean_k": round(sum(found_at) / len(found_at), 2) if found_at else None,
+            "max_k_needed": max(found_at) if found_at else None,
+            "mean_prompt_tokens": round(sum(tokens) / len(tokens), 1) if tokens else None,
+            "tokens_at_max_k": round(full_tokens / len(cases), 1) if cases else 0.0,
+        })
+    return rows
+
+
+@lru_cache(maxsize=None)
+def get_answer_cache():
+    from .answer_cache import AnswerCache
+
+    return AnswerCache()
+
+
+QA_MODEL = "gemini-1.5-flash"
+
+
+def _qa_llm():
+    from ..llm import get_chat_model
+
+    # Shared per process, so concurrent questions reach the same request batcher.
+    llm, _ = get_chat_model("gemini", model=QA_MODEL, temperature=0)
+    return llm
+
+
+def _cached_answer(query: str, k: int, index_dir: str, mode: str) -> Tuple[Optional[Dict[str, Any]], str, List[float]]:
+    _index_mtime(index_dir)  # fail with the usual message when there is no index
+    scope = f"{index_version(index_dir)}:{mode}:{k}"
+    vector = embed_query(query)
+    cached = get_answer_cache().lookup(scope, vector)
+    if cached is not None:
+        return {"query": query, "result": cached["answer"], "cached": True, "similarity": cached["similarity"]}, scope, vector
+    return None, scope, vector
+
+
+def _qa_messages(llm: Any, query: str, k: int, index_dir: str, mode: str) -> Any:
+    # Same "stuff" prompt RetrievalQA uses, driven directly so the answer can stream.
+    from langchain.chains.question_answering.stuff_prompt import PROMPT_SELECTOR
+
+    docs = WarmRetriever(k=k, index_dir=index_dir, mode=mode).invoke(query)
+    return PROMPT_SELECTOR.get_prompt(llm).format_messages(
+        context="\n\n".join(doc.page_content for doc in docs), question=query
     )
-    retriever = vectorstore.as_retriever()
 
-    api_key = os.getenv("GOOGLE_API_KEY")
-    llm = ChatGoogleGenerativeAI(model="gemini-1.5-flash", temperature=0, google_api_key=api_key)
-    qa = RetrievalQA.from_chain_type(llm=llm, retriever=retriever)
-    return qa.invoke(query)
+
+def query_vectorstore(query: str, k: int = DEFAULT_K, index_dir: str = INDEX_DIR, mode: str = "vector", use_cache: bool = True,
+                      on_token: Optional[Callable[[str], None]] = None):
+    """Answer ``query`` from the index; near-duplicates of earlier questions come from the answer cache.
+
+    With ``on_token`` the answer is streamed fragment by fragment; the returned
+    dict is the same either way.
+    """
+    if use_cache:
+        cached, scope, vector = _cached_answer(query, k, index_dir, mode)
+        if cached is not None:
+            return cached
+
+    from ..llm import stream_text
+
+    llm = _qa_llm()
+    messages = _qa_messages(llm, query, k, index_dir, mode)
+    answer = {"query": query, "result": stream_text(llm, messages, on_token)}
+    if use_cache:
+        get_answer_cache().put(scope, query, vector, answer["result"])
+    return answer
+
+
+async def aquery_vectorstore(query: str, k: int = DEFAULT_K, index_dir: str = INDEX_DIR, mode: str = "vector",
+                             use_cache: bool = True, on_token: Optional[Callable[[str], None]] = None) -> Dict[str, Any]:
+    """``query_vectorstore`` whose LLM call goes through the shared request batcher.
+
+    Embedding and retrieval run in worker threads, so concurrent questions
+    overlap and their LLM calls reach the batcher within the same window.
+    With ``on_token`` the answer is streamed instead of batched; cancelling
+    the coroutine stops the stream.
+    """
+    import asyncio
+
+    from ..llm import astream_text
+    from ..llm_batch import abatched_text
+
+    if use_cache:
+        cached, scope, vector = await asyncio.to_thread(_cached_answer, query, k, index_dir, mode)
+        if cached is not None:
+            return cached
+    llm = _qa_llm()
+    messages = await asyncio.to_thread(_qa_messages, llm, query, k, index_dir, mode)
+    text = await (abatched_text(llm, messages) if on_token is None else astream_text(llm, messages, on_token))
+    answer = {"query": query, "result": text}
+    if use_cache:
+        await asyncio.to_thread(get_answer_cache().put, scope, query, vector, answer["result"])
+    return answer
+
+
+def query_many(queries: List[str], k: int = DEFAULT_K, index_dir: str = INDEX_DIR, mode: str = "vector", use_cache: bool = True,
+               concurrency: int = 8, on_answer: Optional[Callable[[int, Dict[str, Any]], None]] = None) -> List[Dict[str, Any]]:
+    """Answer every question, at most ``concurrency`` at once, in question order.
+
+    Their LLM calls are batched and rate limited together (see ``llm_batch``).
+    A failed question yields ``{"query", "error"}``.
+    """
+    import asyncio
+
+    async def run() -> List[Dict[str, Any]]:
+        gate = asyncio.Semaphore(max(1, concurrency))
+
+        async def one(i: int, query: str) -> Dict[str, Any]:
+            async with gate:
+                try:
+                    answer = await aquery_vectorstore(query, k=k, index_dir=index_dir, mode=mode, use_cache=use_cache)
+                except Exception as exc:
+                    answer = {"query": query, "error": str(exc)}
+            if on_answer is not None:
+                on_answer(i, answer)
+            return answer
+
+        return list(await asyncio.gather(*(one(i, q) for i, q in enumerate(queries))))
+
+    return asyncio.run(run())
@@ -11,6 +11,12 @@ def config_dir() -> Path:
     return base
 
 
+def cache_dir() -> Path:
+    base = config_dir() / "cache"
+    base.mkdir(parents=True, exist_ok=True)
+    return base
+
+
 def config_path() -> Path:
     return config_dir() / "mcp.toml"
 
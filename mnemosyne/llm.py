@@ -0,0 +1,154 @@
+from __future__ import annotations
+
+import os
+from typing import Any, Callable, Dict, Optional, Tuple
+
+
+AZURE_DEFAULT_DEPLOYMENT = "gpt-4.1-nano"
+GEMINI_DEFAULT_MODEL = "gemini-1.5-pro"
+
+NO_PROVIDER_MSG = (
+    "No LLM provider configured. Set Azure OpenAI environment variables or GOOGLE_API_KEY, "
+    "or pass --provider gemini after configuring Google Generative AI."
+)
+
+# Chat models are cached by (provider, model, temperature) so every node of
+# every graph reuses the same client objects and their connection pools.
+_models: Dict[Tuple[str, str, Optional[float]], Any] = {}
+# id(model) -> its cache key, so callers can tell how a model was configured.
+_keys: Dict[int, Tuple[str, str, Optional[float]]] = {}
+_resolved: Dict[str, str] = {}
+_http_clients: Optional[Tuple[Any, Any]] = None
+
+# Receives each text fragment of a streamed completion as it arrives.
+TokenCallback = Callable[[str], None]
+
+
+def _azure_configured() -> bool:
+    return bool(os.getenv("AZURE_OPENAI_ENDPOINT") and os.getenv("AZURE_OPENAI_KEY"))
+
+
+def resolve_provider(provider: Optional[str]) -> str:
+    """Map a requested provider to the one actually usable in this process.
+
+    Azure falls back to Gemini when its credentials are missing. The decision
+    is made once per process and reused by every caller.
+    """
+    desired = (provider or "azure").lower()
+    if desired in _resolved:
+        return _resolved[desired]
+    if desired not in ("azure", "gemini"):
+        raise ValueError("provider must be 'azure' or 'gemini'")
+    resolved = desired
+    if resolved == "azure" and not _azure_configured():
+        resolved = "gemini"
+    if resolved == "gemini" and not os.getenv("GOOGLE_API_KEY"):
+        raise RuntimeError(NO_PROVIDER_MSG)
+    _resolved[desired] = resolved
+    return resolved
+
+
+def default_model(provider: str) -> str:
+    if provider == "azure":
+        return os.getenv("AZURE_OPENAI_DEPLOYMENT", AZURE_DEFAULT_DEPLOYMENT)
+    return GEMINI_DEFAULT_MODEL
+
+
+def _shared_http_clients() -> Tuple[Any, Any]:
+    global _http_clients
+    if _http_clients is None:
+        import httpx
+
+        _http_clients = (httpx.Client(), httpx.AsyncClient())
+    return _http_clients
+
+
+def _build(provider: str, model: str, temperature: Optional[float]) -> Any:
+    kwargs: Dict[str, Any] = {}
+    if temperature is not None:
+        kwargs["temperature"] = temperature
+    if provider == "azure":
+        from langchain_openai import AzureChatOpenAI
+        from pydantic import SecretStr
+
+        http_client, http_async_client = _shared_http_clients()
+        return AzureChatOpenAI(
+            azure_endpoint=os.getenv("AZURE_OPENAI_ENDPOINT"),
+            api_key=SecretStr(os.getenv("AZURE_OPENAI_KEY") or ""),
+            api_version=os.getenv("AZURE_OPENAI_API_VERSION", "2024-12-01-preview"),
+            model=model,
+            http_client=http_client,
+            http_async_client=http_async_client,
+            **kwargs,
+        )
+    from langchain_google_genai import ChatGoogleGenerativeAI
+
+    return ChatGoogleGenerativeAI(model=model, google_api_key=os.getenv("GOOGLE_API_KEY"), **kwargs)
+
+
+def get_chat_model(provider: Optional[str], model: Optional[str] = None, temperature: Optional[float] = None) -> Tuple[Any, str]:
+    """Return a cached chat model and the provider that backs it.
+
+    Raises RuntimeError when no provider is configured.
+    """
+    resolved = resolve_provider(provider)
+    name = model or default_model(resolved)
+    key = (resolved, name, temperature)
+    llm = _models.get(key)
+    if llm is None:
+        llm = _models[key] = _build(resolved, name, temperature)
+        _keys[id(llm)] = key
+    return llm, resolved
+
+
+def model_key(llm: Any) -> Optional[Tuple[str, str, Optional[float]]]:
+    """(provider, model, temperature) of a model returned by ``get_chat_model``, else None."""
+    key = _keys.get(id(llm))
+    return key if key is not None and _models.get(key) is llm else None
+
+
+def clear_cache() -> None:
+    """Forget cached models and provider decisions (e.g. after changing credentials)."""
+    _models.clear()
+    _keys.clear()
+    _resolved.clear()
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count (about four characters per token) for prompt budgeting."""
+    return (len(text) + 3) // 4
+
+
+def content_text(content: Any) -> str:
+    """Text of a message or chunk ``content``, which may be a list of parts."""
+    if isinstance(content, str):
+        return content
+    if isinstance(content, list):
+        return "".join(part if isinstance(part, str) else str(part.get("text", "")) for part in content if isinstance(part, (str, dict)))
+    return "" if content is None else str(content)
+
+
+def stream_text(llm: Any, messages: Any, on_token: Optional[TokenCallback] = None, **kwargs: Any) -> str:
+    """Complete ``messages`` and return the full text, passing fragments to ``on_token`` as they arrive."""
+    if on_token is None:
+        return content_text(llm.invoke(messages, **kwargs).content)
+    parts = []
+    for chunk in llm.stream(messages, **kwargs):
+        text = content_text(chunk.content)
+        if text:
+            on_token(text)
+            parts.append(text)
+    return "".join(parts)
+
+
+async def astream_text(llm: Any, messages: Any, on_token: Optional[TokenCallback] = None, **kwargs: Any) -> str:
+    """Async ``stream_text``."""
+    if on_token is None:
+        return content_text((await llm.ainvoke(messages, **kwargs)).content)
+    parts = []
+    async for chunk in llm.astream(messages, **kwargs):
+        text = content_text(chunk.content)
+        if text:
+            on_token(text)
+            parts.append(text)
+    return "".join(parts)
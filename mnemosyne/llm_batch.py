@@ -0,0 +1,206 @@
+"""Request batching for non-streaming chat completions.
+
+Concurrent completions against the same chat model are collected for a short
+window and dispatched together with ``abatch``. Dispatch waits on
+requests-per-minute and tokens-per-minute budgets, and a bounded number of
+queued requests makes further callers wait instead of piling up. Requests the
+provider rejects for rate limiting (HTTP 429 / resource exhausted) are retried
+with exponential backoff.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import os
+import time
+import weakref
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Set
+
+from .llm import content_text, estimate_tokens
+
+DEFAULT_WINDOW_MS = float(os.getenv("MNEMO_LLM_BATCH_WINDOW_MS", "20"))
+DEFAULT_MAX_BATCH = int(os.getenv("MNEMO_LLM_BATCH_SIZE", "16"))
+# 0 disables a budget.
+DEFAULT_RPM = float(os.getenv("MNEMO_LLM_RPM", "0"))
+DEFAULT_TPM = float(os.getenv("MNEMO_LLM_TPM", "0"))
+DEFAULT_MAX_PENDING = int(os.getenv("MNEMO_LLM_MAX_PENDING", "64"))
+DEFAULT_RETRIES = 4
+BACKOFF_S = 1.0
+# A budget holds at most this share of a minute's allowance, so no 60 s window
+# admits much more than the configured rate, even after an idle spell.
+BURST_SHARE = 1 / 6
+# SDK exceptions that always mean rate limiting (openai/anthropic, google.api_core).
+_RATE_LIMIT_ERRORS = frozenset({"RateLimitError", "ResourceExhausted", "TooManyRequests"})
+# Provider wrappers that carry the status only in their message, e.g. "429 Resource has been exhausted".
+_WRAPPED_ERRORS = frozenset({"ChatGoogleGenerativeAIError", "GoogleGenerativeAIError", "ClientError"})
+
+
+def _is_rate_limited(exc: BaseException) -> bool:
+    seen = 0
+    while exc is not None and seen < 4:
+        status = getattr(exc, "status_code", None) or getattr(getattr(exc, "response", None), "status_code", None)
+        if status is None and isinstance(getattr(exc, "code", None), int):
+            status = exc.code  # type: ignore[attr-defined]
+        if status is not None:
+            return status == 429
+        name = type(exc).__name__
+        if name in _RATE_LIMIT_ERRORS:
+            return True
+        if name in _WRAPPED_ERRORS:
+            text = str(exc).lower()
+            return text.startswith("429") or "resource has been exhausted" in text or "resource_exhausted" in text
+        exc = exc.__cause__  # type: ignore[assignment]
+        seen += 1
+    return False
+
+
+def request_tokens(messages: Any, kwargs: Dict[str, Any]) -> int:
+    """Estimated prompt tokens plus the requested output cap, charged against the token budget."""
+    config = kwargs.get("generation_config") or {}
+    limit = kwargs.get("max_tokens") or (config.get("max_output_tokens") if isinstance(config, dict) else None) or 0
+    return estimate_tokens(str(messages)) + int(limit)
+
+
+class _Budget:
+    """Token bucket refilled continuously at ``per_minute``; zero means unlimited.
+
+    The bucket starts with, and never holds more than, a ``BURST_SHARE``
+    burst. A take larger than the burst waits for a full bucket and leaves the
+    balance negative, so it is paid back before the next one goes out.
+    """
+
+    def __init__(self, per_minute: float):
+        self.capacity = float(per_minute)
+        self.burst = self.capacity * BURST_SHARE
+        self.available = self.burst
+        self.updated = time.monotonic()
+
+    async def take(self, amount: float) -> None:
+        if self.capacity <= 0:
+            return
+        needed = min(float(amount), self.burst)
+        while True:
+            now = time.monotonic()
+            self.available = min(self.burst, self.available + (now - self.updated) * self.capacity / 60.0)
+            self.updated = now
+            if self.available >= needed:
+                self.available -= float(amount)
+                return
+            await asyncio.sleep((needed - self.available) * 60.0 / self.capacity)
+
+
+@dataclass
+class _Request:
+    messages: Any
+    future: "asyncio.Future[Any]"
+    tokens: int
+
+
+class RequestBatcher:
+    """Coalesces concurrent ``ainvoke`` calls on one chat model into ``abatch`` calls."""
+
+    def __init__(self, llm: Any, window_ms: float = DEFAULT_WINDOW_MS, max_batch: int = DEFAULT_MAX_BATCH,
+                 rpm: float = DEFAULT_RPM, tpm: float = DEFAULT_TPM, max_pending: int = DEFAULT_MAX_PENDING,
+                 retries: int = DEFAULT_RETRIES, backoff_s: float = BACKOFF_S):
+        self.llm = llm
+        self.window = window_ms / 1000.0
+        self.max_batch = max(1, max_batch)
+        self.retries = retries
+        self.backoff_s = backoff_s
+        self._requests = _Budget(rpm)
+        self._tokens = _Budget(tpm)
+        self._slots = asyncio.Semaphore(max(1, max_pending))
+        self._queues: Dict[str, List[_Request]] = {}
+        self._timers: Dict[str, asyncio.TimerHandle] = {}
+        self._inflight: Set[asyncio.Task] = set()
+        self.calls = 0
+        self.batches = 0
+        self.rate_limited = 0
+
+    async def ainvoke(self, messages: Any, **kwargs: Any) -> Any:
+        """Same result as ``llm.ainvoke(messages, **kwargs)``, sent along with concurrent requests."""
+        async with self._slots:
+            loop = asyncio.get_running_loop()
+            request = _Request(messages, loop.create_future(), request_tokens(messages, kwargs))
+            # abatch applies one set of kwargs to every input, so batch per kwargs.
+            key = json.dumps(kwargs, sort_keys=True, default=str)
+            queue = self._queues.setdefault(key, [])
+            queue.append(request)
+            self.calls += 1
+            if len(queue) >= self.max_batch:
+                self._flush(key, kwargs)
+            elif len(queue) == 1:
+                self._timers[key] = loop.call_later(self.window, self._flush, key, kwargs)
+            return await request.future
+
+    def _flush(self, key: str, kwargs: Dict[str, Any]) -> None:
+        timer = self._timers.pop(key, None)
+        if timer is not None:
+            timer.cancel()
+        batch = self._queues.pop(key, [])
+        if batch:
+            task = asyncio.ensure_future(self._dispatch(batch, kwargs))
+            self._inflight.add(task)
+            task.add_done_callback(self._inflight.discard)
+
+    async def _dispatch(self, batch: List[_Request], kwargs: Dict[str, Any]) -> None:
+        pending = batch
+        for attempt in range(self.retries + 1):
+            pending = [r for r in pending if not r.future.done()]  # callers may have been cancelled
+            if not pending:
+                return
+            await self._requests.take(len(pending))
+            await self._tokens.take(sum(r.tokens for r in pending))
+            self.batches += 1
+            try:
+                results = await self.llm.abatch(
+                    [r.messages for r in pending], config={"max_concurrency": len(pending)}, return_exceptions=True, **kwargs
+                )
+            except Exception as exc:
+                results = [exc] * len(pending)
+            retry: List[_Request] = []
+            for request, result in zip(pending, results):
+                if request.future.done():
+                    continue
+                if isinstance(result, BaseException):
+                    if attempt < self.retries and _is_rate_limited(result):
+                        retry.append(request)
+                    else:
+                        request.future.set_exception(result)
+                else:
+                    request.future.set_result(result)
+            if not retry:
+                return
+            self.rate_limited += len(retry)
+            await asyncio.sleep(self.backoff_s * 2 ** attempt)
+            pending = retry
+
+    def stats(self) -> Dict[str, Any]:
+        return {"calls": self.calls, "batches": self.batches, "rate_limited": self.rate_limited}
+
+
+# Batchers hold asyncio primitives, so each event loop gets its own per model.
+_batchers: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, Dict[int, RequestBatcher]]" = weakref.WeakKeyDictionary()
+
+
+def get_batcher(llm: Any) -> RequestBatcher:
+    """The batcher for ``llm`` on the running event loop."""
+    per_loop = _batchers.setdefault(asyncio.get_running_loop(), {})
+    batcher = per_loop.get(id(llm))
+    if batcher is None or batcher.llm is not llm:
+        batcher = per_loop[id(llm)] = RequestBatcher(llm)
+    return batcher
+
+
+async def abatched_text(llm: Any, messages: Any, **kwargs: Any) -> str:
+    """Text of a completion sent through the shared batcher for ``llm``."""
+    return content_text((await get_batcher(llm).ainvoke(messages, **kwargs)).content)
+
+
+def stats(llm: Optional[Any] = None) -> Dict[str, Any]:
+    """Counters summed over the running loop's batchers (or just ``llm``'s)."""
+    per_loop = _batchers.get(asyncio.get_running_loop(), {})
+    chosen = [b for b in per_loop.values() if llm is None or b.llm is llm]
+    return {key: sum(b.stats()[key] for b in chosen) for key in ("calls", "batches", "rate_limited")}
@@ -0,0 +1,175 @@
+"""On-disk cache of deterministic chat completions.
+
+Responses are keyed by provider, model, temperature, call options and a hash
+of the messages. Only models created through ``llm.get_chat_model`` with
+temperature 0 are cached, since any other setting may legitimately answer
+differently. The cache lives in ~/.mnemo/cache/llm_responses.sqlite and
+evicts the least recently used entries beyond ``max_bytes`` of response text.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass, field
+from functools import lru_cache
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from .config import cache_dir
+from .llm import TokenCallback, astream_text, content_text, model_key
+
+DEFAULT_MAX_BYTES = int(float(os.getenv("MNEMO_LLM_CACHE_MAX_MB", "50")) * 1024 * 1024)
+
+
+def default_path() -> Path:
+    return cache_dir() / "llm_responses.sqlite"
+
+
+def enabled() -> bool:
+    return os.getenv("MNEMO_LLM_CACHE", "1") != "0"
+
+
+def _message_blob(messages: Any) -> Any:
+    if isinstance(messages, (list, tuple)):
+        return [_message_blob(m) for m in messages]
+    if hasattr(messages, "type") and hasattr(messages, "content"):
+        return [messages.type, messages.content]
+    return messages
+
+
+def cache_key(llm: Any, messages: Any, **kwargs: Any) -> Optional[str]:
+    """Key for a completion, or None when ``llm`` is not a known temperature-0 model."""
+    described = model_key(llm)
+    if described is None:
+        return None
+    provider, model, temperature = described
+    if temperature != 0:
+        return None
+    blob = json.dumps([provider, model, temperature, kwargs, _message_blob(messages)], sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(blob.encode("utf-8")).hexdigest()
+
+
+class ResponseCache:
+    def __init__(self, path: Optional[Path] = None, max_bytes: int = DEFAULT_MAX_BYTES):
+        self.path = Path(path or default_path())
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = max(1, max_bytes)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(self.path), check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS responses (key TEXT PRIMARY KEY, model TEXT NOT NULL, response TEXT NOT NULL, "
+            "size INTEGER NOT NULL, created REAL NOT NULL, last_used REAL NOT NULL, hits INTEGER NOT NULL DEFAULT 0)"
+        )
+        self._conn.execute("CREATE TABLE IF NOT EXISTS counters (name TEXT PRIMARY KEY, value INTEGER NOT NULL)")
+        self._conn.commit()
+
+    def _bump(self, name: str) -> None:
+        self._conn.execute(
+            "INSERT INTO counters (name, value) VALUES (?, 1) ON CONFLICT(name) DO UPDATE SET value = value + 1", (name,)
+        )
+
+    def get(self, key: str) -> Optional[str]:
+        with self._lock:
+            row = self._conn.execute("SELECT response FROM responses WHERE key = ?", (key,)).fetchone()
+            if row is not None:
+                self._conn.execute("UPDATE responses SET last_used = ?, hits = hits + 1 WHERE key = ?", (time.time(), key))
+            self._bump("hits" if row else "misses")
+            self._conn.commit()
+        return row[0] if row else None
+
+    def put(self, key: str, model: str, response: str) -> None:
+        now = time.time()
+        size = len(response.encode("utf-8"))
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO responses (key, model, response, size, created, last_used) VALUES (?, ?, ?, ?, ?, ?)",
+                (key, model, response, size, now, now),
+            )
+            total = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+            if total > self.max_bytes:
+                # Walk from the least recently used entry until enough bytes are freed.
+                excess = total - self.max_bytes
+                doomed = []
+                for old_key, old_size in self._conn.execute("SELECT key, size FROM responses ORDER BY last_used ASC"):
+                    if excess <= 0:
+                        break
+                    doomed.append((old_key,))
+                    excess -= old_size
+                self._conn.executemany("DELETE FROM responses WHERE key = ?", doomed)
+            self._conn.commit()
+
+    def entries(self, limit: int = 20) -> List[Dict[str, Any]]:
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT key, model, size, created, last_used, hits, substr(response, 1, 60) FROM responses "
+                "ORDER BY last_used DESC LIMIT ?", (limit,)
+            ).fetchall()
+        return [
+            {"key": key[:12], "model": model, "bytes": size, "created": created, "last_used": last_used, "hits": hits, "preview": preview}
+            for key, model, size, created, last_used, hits, preview in rows
+        ]
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            counters = dict(self._conn.execute("SELECT name, value FROM counters").fetchall())
+            entries, size = self._conn.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM responses").fetchone()
+        hits, misses = counters.get("hits", 0), counters.get("misses", 0)
+        return {
+            "entries": entries,
+            "bytes": size,
+            "max_bytes": self.max_bytes,
+            "hits": hits,
+            "misses": misses,
+            "hit_rate": round(hits / (hits + misses), 3) if hits + misses else 0.0,
+            "path": str(self.path),
+        }
+
+    def clear(self) -> None:
+        with self._lock:
+            self._conn.execute("DELETE FROM responses")
+            self._conn.execute("DELETE FROM counters")
+            self._conn.commit()
+
+
+@lru_cache(maxsize=None)
+def get_response_cache() -> ResponseCache:
+    return ResponseCache()
+
+
+@dataclass
+class Completion:
+    text: str
+    cached: bool = False
+    usage: Dict[str, Any] = field(default_factory=dict)
+
+
+async def acomplete(llm: Any, messages: Any, on_token: Optional[TokenCallback] = None, **kwargs: Any) -> Completion:
+    """Complete ``messages``, answering deterministic calls from the response cache.
+
+    With ``on_token`` a fresh answer streams as usual and a cached one is
+    passed on in a single piece.
+    """
+    key = cache_key(llm, messages, **kwargs) if enabled() else None
+    if key is not None:
+        text = get_response_cache().get(key)
+        if text is not None:
+            if on_token is not None and text:
+                on_token(text)
+            return Completion(text, cached=True)
+    usage: Dict[str, Any] = {}
+    if on_token is None:
+        msg = await llm.ainvoke(messages, **kwargs)
+        text = content_text(msg.content)
+        usage = dict(getattr(msg, "usage_metadata", None) or {})
+    else:
+        text = await astream_text(llm, messages, on_token, **kwargs)
+    if key is not None and text:
+        described = model_key(llm)
+        get_response_cache().put(key, f"{described[0]}:{described[1]}" if described else "", text)
+    return Completion(text, usage=usage)
@@ -2,7 +2,7 @@ import json
 import os
 import subprocess
 import sys
-from typing import Any, Callable, List, Optional, Tuple
+from typing import Any, Callable, Dict, List, Optional, Tuple
 import typer
 from .display import print_banner, print_success_message
 from .config import (
@@ -13,11 +13,10 @@ from .config import (
     get_fs_root,
     set_fs_root,
 )
-import keyring
 import asyncio
-from .mcp.github_client import list_tools as gh_list_tools, list_tools_full as gh_list_tools_full, call_tool as gh_call_tool
-from .agents.github_agent import run_agent as run_github_agent
 
+# Subcommands import LangChain, MCP, keyring and the RAG stack on first use so
+# that `mnemo --help` and config commands start fast; keep top-level imports light.
 from .ai_rag.cli import doc_app
 from dotenv import load_dotenv
 
@@ -30,6 +29,9 @@ app.add_typer(mcp_app, name="mcp")
 gh_app = typer.Typer(help="Use GitHub hosted MCP from CLI")
 app.add_typer(gh_app, name="github")
 
+cache_app = typer.Typer(help="Inspect and clear the LLM response cache")
+app.add_typer(cache_app, name="cache")
+
 
 @app.callback(invoke_without_command=True)
 def callback(
@@ -51,20 +53,37 @@ def callback(
 @app.command("repl")
 def repl(provider: str = typer.Option("azure", help="Default model provider"), owner: Optional[str] = typer.Option(None), repo: Optional[str] = typer.Option(None)):
     """Interactive Mnemosyne mode. Type 'exit' to quit."""
-    from .agents.orchestrator import run_orchestrator
-    while True:
+    from .agents import github_agent
+    from .agents.orchestrator import get_graph, run_orchestrator
+
+    # One loop for the whole session keeps pooled MCP sessions and clients alive
+    # between prompts; graphs are compiled up front instead of on the first prompt.
+    get_graph()
+    github_agent.get_graph((provider or "azure").lower())
+    with asyncio.Runner() as runner:
         try:
-            prompt = input("mnemo> ").strip()
-        except (EOFError, KeyboardInterrupt):
-            break
-        if not prompt:
-            continue
-        if prompt.lower() in {"exit", "quit"}:
-            break
-        res = asyncio.run(run_orchestrator(prompt, provider=provider, owner=owner, repo=repo))
-        result = res.get("result", {})
-        print()
-        _render_result(result.get("content"), result.get("structured"), print)
+            while True:
+                try:
+                    prompt = input("mnemo> ").strip()
+                except (EOFError, KeyboardInterrupt):
+                    break
+                if not prompt:
+                    continue
+                if prompt.lower() in {"exit", "quit"}:
+                    break
+                printer = _StreamPrinter()
+                try:
+                    res = runner.run(run_orchestrator(prompt, provider=provider, owner=owner, repo=repo, on_token=printer))
+                except KeyboardInterrupt:
+                    print("\nCancelled.")
+                    continue
+                if not printer.streamed:
+                    print()
+                printer.finish(res.get("result", {}), print)
+        finally:
+            from .mcp.github_client import close_sessions
+
+            runner.run(close_sessions())
 
 
 @app.command("start")
@@ -88,13 +107,29 @@ def help():
     typer.echo("• dashboard - Launch Textual TUI dashboard")
     typer.echo("• mcp start [cli|fs|git|custom] - Run MCP servers")
     typer.echo("• mcp config [view|set] - Manage MCP config")
-    typer.echo("• github login|tools|call - Use GitHub hosted MCP")
+    typer.echo("• github login|tools|call|test|bench-planner - Use GitHub hosted MCP")
     typer.echo("• agent-github - Run GitHub agent (LangGraph)")
+    typer.echo("• bench-router - Measure orchestrator keyword routing accuracy and latency")
     typer.echo("• doc - Knowledge agent (load & query documents)")
+    typer.echo("• cache stats|list|clear - Inspect the LLM response cache")
     typer.echo("• help - Show this list of features")
     typer.echo("\nUse 'python -m mnemosyne <command> --help' for more details on each command.")
 
 
+def _run_async(coro: Any) -> Any:
+    """Run a coroutine on a fresh loop, closing pooled MCP sessions before the loop ends."""
+
+    async def _main() -> Any:
+        try:
+            return await coro
+        finally:
+            github_client = sys.modules.get("mnemosyne.mcp.github_client")
+            if github_client is not None:
+                await github_client.close_sessions()
+
+    return asyncio.run(_main())
+
+
 def _spawn(cmd: list[str]):
     # Spawn a subprocess that runs until user cancels
     return subprocess.call(cmd)
@@ -105,10 +140,14 @@ GITHUB_PAT_MISSING_MSG = "GitHub PAT not found. Run 'mnemo github login' first."
 
 
 def _store_pat(pat: str):
+    import keyring
+
     keyring.set_password(GITHUB_PAT_SERVICE, "pat", pat)
 
 
 def _load_pat() -> str | None:
+    import keyring
+
     return keyring.get_password(GITHUB_PAT_SERVICE, "pat")
 
 
@@ -147,6 +186,12 @@ def _render_content_block(content: Any, emit: Callable[[str], None]) -> None:
     emit(str(content))
 
 
+def _render_structured(structured: Any, emit: Callable[[str], None]) -> None:
+    if structured not in (None, {}):
+        emit(STRUCTURED_LABEL)
+        emit(json.dumps(structured, indent=2, ensure_ascii=False))
+
+
 def _render_result(content: Any, structured: Any, emit: Callable[[str], None]) -> None:
     has_content = content not in (None, "") and not (isinstance(content, list) and len(content) == 0)
     if has_content:
@@ -155,9 +200,33 @@ def _render_result(content: Any, structured: Any, emit: Callable[[str], None]) -
         emit(RESULT_FOOTER)
     else:
         emit("No content returned.")
-    if structured not in (None, {}):
-        emit(STRUCTURED_LABEL)
-        emit(json.dumps(structured, indent=2, ensure_ascii=False))
+    _render_structured(structured, emit)
+
+
+class _StreamPrinter:
+    """Token callback that writes the result block as the answer streams in.
+
+    ``finish`` closes the block, or renders the result normally when nothing
+    was streamed (errors, raw tool output, cached answers).
+    """
+
+    def __init__(self) -> None:
+        self.streamed = False
+
+    def __call__(self, token: str) -> None:
+        if not self.streamed:
+            self.streamed = True
+            sys.stdout.write(f"\n{RESULT_HEADER}\n")
+        sys.stdout.write(token)
+        sys.stdout.flush()
+
+    def finish(self, result: Dict[str, Any], emit: Callable[[str], None]) -> None:
+        if not self.streamed:
+            _render_result(result.get("content"), result.get("structured"), emit)
+            return
+        emit("")
+        emit(RESULT_FOOTER)
+        _render_structured(result.get("structured"), emit)
 
 
 @gh_app.command("login")
@@ -173,10 +242,12 @@ def github_login(pat: Optional[str] = typer.Option(None, help="GitHub Personal A
 
 
 @gh_app.command("tools")
-def github_tools():
+def github_tools(refresh: bool = typer.Option(False, help="Re-list tools from the server instead of the cached catalog.")):
+    from .mcp.github_client import list_tools as gh_list_tools
+
     pat = _require_pat(typer.echo)
     try:
-        names = asyncio.run(gh_list_tools(pat))
+        names = _run_async(gh_list_tools(pat, refresh=refresh))
     except Exception as exc:
         typer.echo(f"Error retrieving tools from GitHub MCP: {exc}")
         raise typer.Exit(code=1)
@@ -187,6 +258,8 @@ def github_tools():
 @gh_app.command("call")
 def github_call(tool: str, args: str = typer.Option("{}", help="JSON dict of arguments")):
     import json as _json
+    from .mcp.github_client import call_tool as gh_call_tool
+
     pat = _require_pat(typer.echo)
     try:
         arguments = _json.loads(args)
@@ -194,69 +267,161 @@ def github_call(tool: str, args: str = typer.Option("{}", help="JSON dict of arg
         typer.echo("Invalid JSON for --args")
         raise typer.Exit(code=2)
     try:
-        result = asyncio.run(gh_call_tool(pat, tool, arguments))
+        result = _run_async(gh_call_tool(pat, tool, arguments))
     except Exception as exc:
         typer.echo(f"Error calling GitHub MCP tool '{tool}': {exc}")
         raise typer.Exit(code=1)
     _render_result(result.get("content"), result.get("structured"), typer.echo)
 
 
-async def _run_github_tool_tests(pat: str, limit: Optional[int], include_required: bool) -> List[Tuple[str, str, str]]:
-    results: List[Tuple[str, str, str]] = []
+async def _run_github_tool_tests(pat: str, limit: Optional[int], include_required: bool, concurrency: int, repeat: int) -> List[Dict[str, Any]]:
+    from .mcp import tool_bench
+    from .mcp.github_client import call_tool as gh_call_tool, list_tools_full as gh_list_tools_full
+
+    # Listing opens the pooled session that every concurrent call below shares.
     meta = await gh_list_tools_full(pat)
-    names = sorted(meta.keys())
-    if limit is not None:
-        names = names[:limit]
-
-    for name in names:
-        schema = (meta.get(name, {}) or {}).get("inputSchema") or {}
-        required = schema.get("required") or []
-        if required and not include_required:
-            results.append((name, "skipped", f"requires parameters: {', '.join(required)}"))
-            continue
-        try:
-            await gh_call_tool(pat, name, {})
-            results.append((name, "ok", ""))
-        except Exception as exc:  # pragma: no cover - network dependent
-            message = str(exc)
-            lowered = message.lower()
-            if "no copilot spaces found" in lowered:
-                results.append((name, "skipped", "no Copilot spaces available"))
-            else:
-                results.append((name, "error", message))
-    return results
+
+    async def call(name: str, args: Dict[str, Any]) -> Dict[str, Any]:
+        return await gh_call_tool(pat, name, args)
+
+    return await tool_bench.run(meta, call, limit=limit, include_required=include_required, concurrency=concurrency, repeat=repeat)
 
 
 @gh_app.command("test")
 def github_test(
     limit: Optional[int] = typer.Option(None, help="Maximum number of tools to exercise."),
     include_required: bool = typer.Option(False, help="Attempt tools that require parameters using empty payloads (may fail)."),
+    concurrency: int = typer.Option(8, help="Tool calls in flight at once."),
+    repeat: int = typer.Option(1, help="Calls per tool for the latency percentiles; each repeat is another live API call."),
+    as_json: bool = typer.Option(False, "--json", help="Emit one JSON row per tool."),
 ):
-    """Call each GitHub MCP tool with minimal arguments to verify connectivity."""
+    """Call each GitHub MCP tool with minimal arguments; report status, latency and payload size."""
 
     pat = _require_pat(typer.echo)
     try:
-        outcomes = asyncio.run(_run_github_tool_tests(pat, limit, include_required))
+        outcomes = _run_async(_run_github_tool_tests(pat, limit, include_required, concurrency, repeat))
     except Exception as exc:
         typer.echo(f"GitHub tool test failed: {exc}")
         raise typer.Exit(code=1)
 
-    passed = sum(1 for _, status, _ in outcomes if status == "ok")
-    skipped = sum(1 for _, status, _ in outcomes if status == "skipped")
-    failed = sum(1 for _, status, _ in outcomes if status == "error")
+    passed = sum(1 for row in outcomes if row["status"] == "ok")
+    skipped = sum(1 for row in outcomes if row["status"] == "skipped")
+    failed = sum(1 for row in outcomes if row["status"] == "error")
 
-    for name, status, detail in outcomes:
-        if status == "ok":
-            typer.echo(f"✓ {name}")
-        elif status == "skipped":
-            typer.echo(f"- {name} (skipped: {detail})")
-        else:
-            typer.echo(f"✗ {name} -> {detail}")
+    if as_json:
+        typer.echo(json.dumps(outcomes, indent=2, ensure_ascii=False))
+    else:
+        width = max([len(row["tool"]) for row in outcomes] + [4])
+        typer.echo(f"  {'tool':<{width}} {'min ms':>8} {'p50 ms':>8} {'p99 ms':>8} {'bytes':>9}")
+        for row in outcomes:
+            name = row["tool"]
+            if row["status"] == "ok":
+                typer.echo(f"✓ {name:<{width}} {row['min_ms']:>8} {row['p50_ms']:>8} {row['p99_ms']:>8} {row['payload_bytes']:>9}")
+            elif row["status"] == "skipped":
+                typer.echo(f"- {name:<{width}} (skipped: {row['detail']})")
+            else:
+                typer.echo(f"✗ {name:<{width}} -> {row['detail']}")
+        typer.echo("")
+        calls = sum(row.get("calls", 0) for row in outcomes)
+        typer.echo(f"Summary: {passed} passed, {failed} failed, {skipped} skipped ({calls} API calls)")
+    if failed:
+        raise typer.Exit(code=1)
 
+
+async def _bench_planner(pat: str, cases: List[Tuple[str, str]], provider: str, use_llm: bool, use_memory: bool,
+                         owner: Optional[str], repo: Optional[str]) -> Dict[str, Any]:
+    import time
+
+    from .agents import github_agent, planner_prompt, tool_selector
+    from .mcp.github_client import list_tools_full as gh_list_tools_full
+
+    tool_map = await gh_list_tools_full(pat)
+    selector = tool_selector.ToolSelector(tool_map, tool_selector.get_memory() if use_memory else None)
+    llm_ms: Optional[List[float]] = None
+    if use_llm:
+        llm, _ = github_agent._llm(provider)
+        llm_ms = []
+        for prompt, _ in cases:
+            system, _ = planner_prompt.build(selector, prompt, owner, repo)
+            start = time.perf_counter()
+            await github_agent.llm_plan(llm, system, prompt)
+            llm_ms.append((time.perf_counter() - start) * 1000)
+    return tool_selector.benchmark(selector, cases, owner, repo, llm_ms)
+
+
+@gh_app.command("bench-planner")
+def github_bench_planner(
+    corpus: str = typer.Argument(..., help="Lines of 'prompt<TAB>expected tool'."),
+    provider: str = typer.Option("azure", help="azure|gemini, timed for the LLM planner baseline."),
+    use_llm: bool = typer.Option(True, "--llm/--no-llm", help="Time the LLM planner on every prompt to report latency saved."),
+    use_memory: bool = typer.Option(True, "--memory/--no-memory", help="Include prompt -> tool mappings learned from past runs."),
+    owner: Optional[str] = typer.Option("owner", help="Owner used to fill arguments."),
+    repo: Optional[str] = typer.Option("repo", help="Repo used to fill arguments."),
+    as_json: bool = typer.Option(False, "--json", help="Emit the report as JSON."),
+):
+    """Measure how often the local planner answers without the LLM, and the latency that saves."""
+    cases: List[Tuple[str, str]] = []
+    with open(corpus, encoding="utf-8") as fh:
+        for line in fh:
+            prompt, _, expected = line.rstrip("\n").partition("\t")
+            if prompt.strip() and expected.strip():
+                cases.append((prompt.strip(), expected.strip()))
+    if not cases:
+        typer.echo("No cases found. Use one 'prompt<TAB>expected tool' pair per line.")
+        raise typer.Exit(code=1)
+    pat = _require_pat(typer.echo)
+    try:
+        report = _run_async(_bench_planner(pat, cases, provider, use_llm, use_memory, owner, repo))
+    except Exception as exc:
+        typer.echo(f"Planner benchmark failed: {exc}")
+        raise typer.Exit(code=1)
+    if as_json:
+        typer.echo(json.dumps(report, indent=2, ensure_ascii=False))
+        return
+    for row in report["rows"]:
+        mark = "-" if row["tool"] is None else ("✓" if row["tool"] == row["expected"] else "✗")
+        typer.echo(f"{mark} {row['prompt']} -> {row['tool'] or 'LLM'} ({row['source'] or 'fallback'})")
     typer.echo("")
-    typer.echo(f"Summary: {passed} passed, {failed} failed, {skipped} skipped")
-    if failed:
+    typer.echo(f"Hit rate:   {report['hit_rate']:.1%} ({report['hits']} of {report['cases']} planned locally)")
+    typer.echo(f"Precision:  {report['precision']:.1%} of local plans chose the expected tool")
+    typer.echo(f"Local:      p50 {report['local_p50_ms']} ms, p99 {report['local_p99_ms']} ms")
+    if "saved_ms" in report:
+        typer.echo(f"LLM:        mean {report['llm_mean_ms']} ms per plan")
+        typer.echo(f"Saved:      {report['saved_ms']} ms over the corpus")
+
+
+@app.command("bench-router")
+def bench_router(
+    corpus: Optional[str] = typer.Argument(None, help="Lines of 'prompt<TAB>expected route'; defaults to a built-in sample."),
+    as_json: bool = typer.Option(False, "--json", help="Emit the report as JSON."),
+):
+    """Measure keyword routing accuracy and latency, and how many prompts would need the LLM router."""
+    from .agents import orchestrator  # noqa: F401 - importing the agents registers their routes
+    from .agents import router
+
+    cases: List[Tuple[str, str]] = list(router.SAMPLE_CASES)
+    if corpus:
+        cases = []
+        with open(corpus, encoding="utf-8") as fh:
+            for line in fh:
+                prompt, _, expected = line.rstrip("\n").partition("\t")
+                if prompt.strip() and expected.strip():
+                    cases.append((prompt.strip(), expected.strip()))
+    if not cases:
+        typer.echo("No cases found. Use one 'prompt<TAB>expected route' pair per line.")
         raise typer.Exit(code=1)
+    report = router.benchmark(router.get_router(), cases)
+    if as_json:
+        typer.echo(json.dumps(report, indent=2, ensure_ascii=False))
+        return
+    for row in report["rows"]:
+        mark = "✓" if row["route"] == row["expected"] else "✗"
+        via = "LLM" if row["llm"] else "keywords"
+        typer.echo(f"{mark} {row['prompt']} -> {row['route']} ({row['confidence']:.2f}, {via})")
+    typer.echo("")
+    typer.echo(f"Accuracy:   {report['accuracy']:.1%} of best keyword guesses")
+    typer.echo(f"Keywords:   {report['confident']} of {report['cases']} routed without the LLM, {report['precision']:.1%} correct")
+    typer.echo(f"Latency:    p50 {report['p50_ms']} ms, p99 {report['p99_ms']} ms")
 
 
 @app.command("agent-github")
@@ -265,16 +430,30 @@ def agent_github(
     provider: str = typer.Option("azure", help="azure|gemini"),
     owner: Optional[str] = typer.Option(None, help="GitHub owner/org"),
     repo: Optional[str] = typer.Option(None, help="GitHub repo name"),
+    stream: bool = typer.Option(True, "--stream/--no-stream", help="Print the answer as it is generated."),
+    as_json: bool = typer.Option(False, "--json", help="Print the final result as JSON (no streaming)."),
+    llm_format: Optional[bool] = typer.Option(None, "--llm-format/--local-format", help="Rewrite results with the LLM instead of local tables (default: MNEMO_LLM_FORMAT=1)."),
+    concurrency: Optional[int] = typer.Option(None, help="Tool calls run at once for multi-step plans (default: MNEMO_GITHUB_CONCURRENCY or 4)."),
 ):
+    from .agents.github_agent import run_agent as run_github_agent
+
+    printer = _StreamPrinter() if stream and not as_json else None
     try:
-        result = asyncio.run(run_github_agent(prompt, provider=provider, owner=owner, repo=repo))
+        result = _run_async(run_github_agent(
+            prompt, provider=provider, owner=owner, repo=repo, on_token=printer, llm_format=llm_format, concurrency=concurrency,
+        ))
     except RuntimeError as exc:
         typer.echo(f"Error: {exc}")
         raise typer.Exit(code=1)
     except Exception as exc:
         typer.echo(f"Unexpected error running GitHub agent: {exc}")
         raise typer.Exit(code=1)
-    _render_result(result.get("content"), result.get("structured"), typer.echo)
+    if as_json:
+        typer.echo(json.dumps(result, indent=2, ensure_ascii=False, default=str))
+    elif printer is not None:
+        printer.finish(result, typer.echo)
+    else:
+        _render_result(result.get("content"), result.get("structured"), typer.echo)
 
 
 @mcp_app.command("start")
@@ -346,4 +525,44 @@ def mcp_config(
 
 
     
-    
\ No newline at end of file
+    
+
+
+@cache_app.command("stats")
+def cache_stats(as_json: bool = typer.Option(False, "--json", help="Emit the counters as JSON.")):
+    """Entries, size and hit rate of the LLM response cache."""
+    from .llm_cache import enabled, get_response_cache
+
+    stats = get_response_cache().stats()
+    if as_json:
+        typer.echo(json.dumps(stats, indent=2))
+        return
+    typer.echo(f"Path:     {stats['path']}{'' if enabled() else ' (disabled by MNEMO_LLM_CACHE=0)'}")
+    typer.echo(f"Entries:  {stats['entries']} ({stats['bytes'] / 1024:.1f} of {stats['max_bytes'] / 1024:.0f} KiB)")
+    typer.echo(f"Hit rate: {stats['hit_rate']:.1%} ({stats['hits']} hits, {stats['misses']} misses)")
+
+
+@cache_app.command("list")
+def cache_list(limit: int = typer.Option(20, help="Number of entries to show, most recently used first.")):
+    """List cached responses."""
+    import time
+
+    from .llm_cache import get_response_cache
+
+    rows = get_response_cache().entries(limit)
+    if not rows:
+        typer.echo("The LLM response cache is empty.")
+        return
+    for row in rows:
+        used = time.strftime("%Y-%m-%d %H:%M", time.localtime(row["last_used"]))
+        preview = " ".join(row["preview"].split())
+        typer.echo(f"{row['key']}  {row['model']}  {row['bytes']} B  {row['hits']} hits  {used}  {preview}")
+
+
+@cache_app.command("clear")
+def cache_clear():
+    """Delete every cached response and reset the counters."""
+    from .llm_cache import get_response_cache
+
+    get_response_cache().clear()
+    typer.echo("LLM response cache cleared.")
@@ -1,11 +1,16 @@
-from . import cli_executor_server
-from . import filesystem_server
-from . import git_server
-from . import custom_tools_server
+import importlib
 
+# Server modules import fastmcp at load time; resolve them on first access so
+# that importing the GitHub client does not start up every server.
 __all__ = [
     "cli_executor_server",
     "filesystem_server",
     "git_server",
     "custom_tools_server",
 ]
+
+
+def __getattr__(name):
+    if name in __all__:
+        return importlib.import_module(f"{__name__}.{name}")
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
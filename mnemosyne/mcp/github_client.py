@@ -1,9 +1,15 @@
 import json
-from typing import Any, Dict, List
+from contextlib import asynccontextmanager
+from functools import partial
+from typing import Any, AsyncIterator, Dict, List, Optional
 
 from mcp import ClientSession
 from mcp.client.streamable_http import streamablehttp_client
 
+from ..config import cache_dir
+from .session_pool import SessionPool
+from .tool_catalog import ToolCatalog
+
 
 GITHUB_MCP_URL = "https://api.githubcopilot.com/mcp/"
 
@@ -31,60 +37,94 @@ def _parse_text_payload(text: str) -> Any:
         return text
 
 
-async def list_tools(pat: str) -> list[str]:
-    try:
-        async with streamablehttp_client(GITHUB_MCP_URL, headers={"Authorization": f"Bearer {pat}"}) as (read, write, _):
-            async with ClientSession(read, write) as session:
-                await session.initialize()
-                tools = await session.list_tools()
-                return [t.name for t in tools.tools]
-    except BaseExceptionGroup as exc:
-        messages = _flatten_exception_messages(exc)
-        raise RuntimeError("; ".join(messages)) from exc
-    except Exception as exc:
-        raise RuntimeError(str(exc)) from exc
+@asynccontextmanager
+async def _connect(url: str, pat: str) -> AsyncIterator[ClientSession]:
+    async with streamablehttp_client(url, headers={"Authorization": f"Bearer {pat}"}) as (read, write, _):
+        async with ClientSession(read, write) as session:
+            await session.initialize()
+            yield session
+
+
+_pool: Optional[SessionPool] = None
+_catalog: Optional[ToolCatalog] = None
 
 
-async def list_tools_full(pat: str) -> dict:
-    """Return a mapping of tool name -> {description, inputSchema}"""
+def get_session_pool() -> SessionPool:
+    """Process-wide pool of GitHub MCP sessions keyed by PAT."""
+    global _pool
+    if _pool is None:
+        _pool = SessionPool(partial(_connect, GITHUB_MCP_URL))
+    return _pool
+
+
+async def close_sessions() -> None:
+    if _pool is not None:
+        await _pool.aclose()
+
+
+def _as_runtime_error(exc: BaseException) -> RuntimeError:
+    if isinstance(exc, BaseExceptionGroup):
+        return RuntimeError("; ".join(_flatten_exception_messages(exc)))
+    return RuntimeError(str(exc))
+
+
+def get_tool_catalog() -> ToolCatalog:
+    """Process-wide tool catalog backed by ~/.mnemo/cache/github_tools.json."""
+    global _catalog
+    if _catalog is None:
+        _catalog = ToolCatalog(_fetch_tools_full, cache_dir() / "github_tools.json")
+    return _catalog
+
+
+async def list_tools(pat: str, refresh: bool = False) -> list[str]:
+    return list((await list_tools_full(pat, refresh=refresh)).keys())
+
+
+async def list_tools_full(pat: str, refresh: bool = False) -> dict:
+    """Return a mapping of tool name -> {description, inputSchema}, served from the catalog cache."""
+    return await get_tool_catalog().get(pat, refresh=refresh)
+
+
+async def _fetch_tools_full(pat: str) -> dict:
+    async def _list(session: ClientSession) -> dict:
+        tools = await session.list_tools()
+        out = {}
+        for t in tools.tools:
+            out[t.name] = {
+                "description": getattr(t, "description", None),
+                "inputSchema": getattr(t, "inputSchema", None),
+                "title": getattr(t, "title", None),
+            }
+        return out
+
     try:
-        async with streamablehttp_client(GITHUB_MCP_URL, headers={"Authorization": f"Bearer {pat}"}) as (read, write, _):
-            async with ClientSession(read, write) as session:
-                await session.initialize()
-                tools = await session.list_tools()
-                out = {}
-                for t in tools.tools:
-                    out[t.name] = {
-                        "description": getattr(t, "description", None),
-                        "inputSchema": getattr(t, "inputSchema", None),
-                        "title": getattr(t, "title", None),
-                    }
-                return out
+        return await get_session_pool().run(pat, _list, retry=True)
     except BaseExceptionGroup as exc:
-        messages = _flatten_exception_messages(exc)
-        raise RuntimeError("; ".join(messages)) from exc
+        raise _as_runtime_error(exc) from exc
     except Exception as exc:
-        raise RuntimeError(str(exc)) from exc
+        raise _as_runtime_error(exc) from exc
 
 
 async def call_tool(pat: str, tool_name: str, arguments: Dict[str, Any]) -> Dict[str, Any]:
+    async def _call(session: ClientSession) -> Dict[str, Any]:
+        result = await session.call_tool(tool_name, arguments=arguments)
+        data: Dict[str, Any] = {"content": [], "structured": result.structuredContent}
+        if result.isError:
+            data["isError"] = True
+        for c in result.content:
+            try:
+                # Most contents are TextContent with .text
+                text = getattr(c, "text", None)
+                if text:
+                    data["content"].append(_parse_text_payload(text))
+            except Exception:
+                pass
+        return data
+
+    # Tool calls may have side effects, so a broken session is dropped but the call is not replayed.
     try:
-        async with streamablehttp_client(GITHUB_MCP_URL, headers={"Authorization": f"Bearer {pat}"}) as (read, write, _):
-            async with ClientSession(read, write) as session:
-                await session.initialize()
-                result = await session.call_tool(tool_name, arguments=arguments)
-                data: Dict[str, Any] = {"content": [], "structured": result.structuredContent}
-                for c in result.content:
-                    try:
-                        # Most contents are TextContent with .text
-                        text = getattr(c, "text", None)
-                        if text:
-                            data["content"].append(_parse_text_payload(text))
-                    except Exception:
-                        pass
-                return data
+        return await get_session_pool().run(pat, _call)
     except BaseExceptionGroup as exc:
-        messages = _flatten_exception_messages(exc)
-        raise RuntimeError("; ".join(messages)) from exc
+        raise _as_runtime_error(exc) from exc
     except Exception as exc:
-        raise RuntimeError(str(exc)) from exc
+        raise _as_runtime_error(exc) from exc
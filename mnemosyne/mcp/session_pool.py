@@ -0,0 +1,199 @@
+from __future__ import annotations
+
+import asyncio
+import time
+from contextlib import asynccontextmanager
+from typing import Any, AsyncContextManager, AsyncIterator, Awaitable, Callable, Dict, Optional, TypeVar
+
+import anyio
+from mcp import ClientSession
+
+
+# A connector opens a transport for the given key (e.g. a PAT) and yields an
+# initialized ClientSession; leaving the context closes the transport.
+Connector = Callable[[str], AsyncContextManager[ClientSession]]
+T = TypeVar("T")
+
+DEFAULT_IDLE_TIMEOUT = 300.0
+DEFAULT_HEALTH_INTERVAL = 30.0
+DEFAULT_PING_TIMEOUT = 10.0
+
+_CONNECTION_ERRORS = (anyio.ClosedResourceError, anyio.BrokenResourceError, anyio.EndOfStream, ConnectionError)
+
+
+class _PooledSession:
+    """One live MCP session, owned by a dedicated task.
+
+    The transport's task group must be entered and exited by the same task, so
+    the session is opened in a background task that stays parked until close().
+    """
+
+    def __init__(self, key: str, connector: Connector):
+        self.key = key
+        self.session: Optional[ClientSession] = None
+        self.in_use = 0
+        self.last_used = time.monotonic()
+        self.last_checked = self.last_used
+        self._connector = connector
+        self._ready = asyncio.Event()
+        self._closing = asyncio.Event()
+        self._error: Optional[BaseException] = None
+        self._task: Optional[asyncio.Task[None]] = None
+
+    @property
+    def alive(self) -> bool:
+        return self.session is not None and self._task is not None and not self._task.done()
+
+    async def start(self) -> None:
+        self._task = asyncio.create_task(self._run())
+        await self._ready.wait()
+        if self._error is not None:
+            raise self._error
+
+    async def _run(self) -> None:
+        try:
+            async with self._connector(self.key) as session:
+                self.session = session
+                self._ready.set()
+                await self._closing.wait()
+        except Exception as exc:
+            self._error = exc
+        finally:
+            self.session = None
+            self._ready.set()
+
+    async def close(self) -> None:
+        self._closing.set()
+        if self._task is None or self._task.done():
+            return
+        try:
+            await asyncio.wait_for(self._task, timeout=DEFAULT_PING_TIMEOUT)
+        except (asyncio.TimeoutError, asyncio.CancelledError):
+            self._task.cancel()
+
+
+class SessionPool:
+    """Long-lived MCP sessions keyed by credential.
+
+    Sessions are opened on first use, pinged before reuse once they have been
+    quiet for ``health_interval`` seconds, evicted after ``idle_timeout``
+    seconds without use and reopened transparently when found dead. A pool is
+    bound to the event loop that first uses it; switching loops (e.g. one
+    ``asyncio.run`` per CLI command) drops sessions owned by the old loop.
+    """
+
+    def __init__(
+        self,
+        connector: Connector,
+        idle_timeout: float = DEFAULT_IDLE_TIMEOUT,
+        health_interval: float = DEFAULT_HEALTH_INTERVAL,
+    ):
+        self._connector = connector
+        self.idle_timeout = idle_timeout
+        self.health_interval = health_interval
+        self.connects = 0
+        self._entries: Dict[str, _PooledSession] = {}
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._lock: Optional[asyncio.Lock] = None
+
+    def _bind_loop(self) -> asyncio.Lock:
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop or self._lock is None:
+            self._entries = {}
+            self._loop = loop
+            self._lock = asyncio.Lock()
+        return self._lock
+
+    async def _healthy(self, entry: _PooledSession) -> bool:
+        if not entry.alive:
+            return False
+        now = time.monotonic()
+        if entry.in_use or now - entry.last_checked < self.health_interval:
+            return True
+        assert entry.session is not None
+        try:
+            await asyncio.wait_for(entry.session.send_ping(), timeout=DEFAULT_PING_TIMEOUT)
+        except Exception:
+            return False
+        entry.last_checked = now
+        return True
+
+    async def _evict_idle(self) -> None:
+        now = time.monotonic()
+        for key, entry in list(self._entries.items()):
+            if entry.in_use == 0 and now - entry.last_used >= self.idle_timeout:
+                del self._entries[key]
+                await entry.close()
+
+    async def _acquire(self, key: str) -> _PooledSession:
+        async with self._bind_loop():
+            await self._evict_idle()
+            entry = self._entries.get(key)
+            if entry is not None and not await self._healthy(entry):
+                del self._entries[key]
+                await entry.close()
+                entry = None
+            if entry is None:
+                entry = _PooledSession(key, self._connector)
+                await entry.start()
+                self.connects += 1
+                self._entries[key] = entry
+            return entry
+
+    async def _discard(self, entry: _PooledSession) -> None:
+        if self._entries.get(entry.key) is entry:
+            del self._entries[entry.key]
+        await entry.close()
+
+    @asynccontextmanager
+    async def _borrow(self, entry: _PooledSession) -> AsyncIterator[ClientSession]:
+        assert entry.session is not None
+        entry.in_use += 1
+        try:
+            yield entry.session
+        except _CONNECTION_ERRORS:
+            await self._discard(entry)
+            raise
+        finally:
+            entry.in_use -= 1
+            entry.last_used = time.monotonic()
+
+    @asynccontextmanager
+    async def session(self, key: str) -> AsyncIterator[ClientSession]:
+        """Borrow the pooled session for ``key``; the session stays open afterwards."""
+        entry = await self._acquire(key)
+        async with self._borrow(entry) as session:
+            yield session
+
+    async def run(self, key: str, fn: Callable[[ClientSession], Awaitable[T]], retry: bool = False) -> T:
+        """Run ``fn`` against the pooled session for ``key``.
+
+        A session that fails with a transport error is dropped so the next use
+        reconnects. With ``retry=True`` (safe for read-only requests) the call
+        is replayed once on a fresh session.
+        """
+        attempts = 2 if retry else 1
+        for attempt in range(attempts):
+            entry = await self._acquire(key)
+            try:
+                async with self._borrow(entry) as session:
+                    return await fn(session)
+            except Exception as exc:
+                dead = not entry.alive or isinstance(exc, _CONNECTION_ERRORS)
+                if dead:
+                    await self._discard(entry)
+                if not dead or attempt == attempts - 1:
+                    raise
+        raise AssertionError("unreachable")
+
+    async def aclose(self) -> None:
+        """Close every pooled session owned by the current loop."""
+        if self._loop is not asyncio.get_running_loop():
+            self._entries = {}
+            return
+        entries, self._entries = list(self._entries.values()), {}
+        for entry in entries:
+            await entry.close()
+
+    def stats(self) -> Dict[str, Any]:
+        return {"open": len(self._entries), "connects": self.connects}
@@ -0,0 +1,74 @@
+"""Smoke test and latency report for a GitHub MCP tool catalog.
+
+Each tool is called with empty arguments ``repeat`` times; calls for
+different tools run concurrently up to a limit, sharing one pooled session.
+Every row records the outcome plus min/p50/p99 latency and the size of the
+returned payload, so runs can be compared over time.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import time
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+from ..timing import percentile
+
+Call = Callable[[str, Dict[str, Any]], Awaitable[Dict[str, Any]]]
+
+DEFAULT_CONCURRENCY = 8
+
+
+def _skip_reason(message: str) -> Optional[str]:
+    if "no copilot spaces found" in message.lower():
+        return "no Copilot spaces available"
+    return None
+
+
+async def _exercise(name: str, call: Call, repeat: int, limit: asyncio.Semaphore) -> Dict[str, Any]:
+    row: Dict[str, Any] = {"tool": name, "status": "ok", "detail": "", "calls": 0}
+    latencies: List[float] = []
+    size = 0
+    for _ in range(repeat):
+        async with limit:
+            start = time.perf_counter()
+            try:
+                result = await call(name, {})
+            except Exception as exc:  # pragma: no cover - network dependent
+                message = str(exc)
+                reason = _skip_reason(message)
+                row.update(status="skipped" if reason else "error", detail=reason or message)
+                break
+            latencies.append((time.perf_counter() - start) * 1000)
+        size = len(json.dumps(result.get("content"), ensure_ascii=False, default=str).encode("utf-8"))
+    row["calls"] = len(latencies)
+    if latencies:
+        row.update(
+            min_ms=round(min(latencies), 1),
+            p50_ms=round(percentile(latencies, 50), 1),
+            p99_ms=round(percentile(latencies, 99), 1),
+            payload_bytes=size,
+        )
+    return row
+
+
+async def run(meta: Dict[str, Any], call: Call, limit: Optional[int] = None, include_required: bool = False,
+              concurrency: int = DEFAULT_CONCURRENCY, repeat: int = 1) -> List[Dict[str, Any]]:
+    """One row per tool in name order; tools with required parameters are skipped unless ``include_required``."""
+    names = sorted(meta)
+    if limit is not None:
+        names = names[:limit]
+    gate = asyncio.Semaphore(max(1, concurrency))
+    rows: Dict[str, Dict[str, Any]] = {}
+    pending = []
+    for name in names:
+        schema = (meta.get(name, {}) or {}).get("inputSchema") or {}
+        required = (schema.get("required") or []) if isinstance(schema, dict) else []
+        if required and not include_required:
+            rows[name] = {"tool": name, "status": "skipped", "detail": f"requires parameters: {', '.join(required)}", "calls": 0}
+        else:
+            pending.append(name)
+    for row in await asyncio.gather(*(_exercise(name, call, max(1, repeat), gate) for name in pending)):
+        rows[row["tool"]] = row
+    return [rows[name] for name in names]
@@ -0,0 +1,94 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import time
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+
+DEFAULT_TTL = float(os.getenv("MNEMO_TOOL_CATALOG_TTL", "3600"))
+
+Fetcher = Callable[[str], Awaitable[Dict[str, Any]]]
+
+
+def catalog_version(tools: Dict[str, Any]) -> str:
+    """Stable hash of a tool map; changes whenever a tool or its schema changes."""
+    blob = json.dumps(tools, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(blob.encode("utf-8")).hexdigest()[:16]
+
+
+def _owner_key(pat: str) -> str:
+    # Catalogs differ per token scope; never persist the token itself.
+    return hashlib.sha256(pat.encode("utf-8")).hexdigest()[:16]
+
+
+class ToolCatalog:
+    """Tool name -> {description, inputSchema, title} maps cached in memory and on disk.
+
+    Entries are served without touching the server until ``ttl`` seconds have
+    passed. Each entry records the hash of the listing it came from so callers
+    can key derived data on ``version()`` and notice when the server changes.
+    """
+
+    def __init__(self, fetch: Fetcher, path: Optional[Path] = None, ttl: float = DEFAULT_TTL):
+        self._fetch = fetch
+        self.path = path
+        self.ttl = ttl
+        self.fetches = 0
+        self._entries: Dict[str, Dict[str, Any]] = {}
+        self._loaded = False
+
+    def _load(self) -> None:
+        if self._loaded:
+            return
+        self._loaded = True
+        if self.path is None or not self.path.exists():
+            return
+        try:
+            data = json.loads(self.path.read_text(encoding="utf-8"))
+        except (OSError, json.JSONDecodeError):
+            return
+        if isinstance(data, dict):
+            self._entries.update({k: v for k, v in data.items() if isinstance(v, dict) and "tools" in v})
+
+    def _save(self) -> None:
+        if self.path is None:
+            return
+        try:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            tmp = self.path.with_suffix(".tmp")
+            tmp.write_text(json.dumps(self._entries, ensure_ascii=False, default=str), encoding="utf-8")
+            os.replace(tmp, self.path)
+        except OSError:
+            pass  # the on-disk copy is an optimisation only
+
+    def _fresh(self, entry: Optional[Dict[str, Any]]) -> bool:
+        return entry is not None and time.time() - float(entry.get("fetched_at", 0)) < self.ttl
+
+    async def get(self, pat: str, refresh: bool = False) -> Dict[str, Any]:
+        self._load()
+        key = _owner_key(pat)
+        entry = self._entries.get(key)
+        if refresh or not self._fresh(entry):
+            tools = await self._fetch(pat)
+            self.fetches += 1
+            entry = {"fetched_at": time.time(), "version": catalog_version(tools), "tools": tools}
+            self._entries[key] = entry
+            self._save()
+        assert entry is not None
+        return entry["tools"]
+
+    def version(self, pat: str) -> Optional[str]:
+        self._load()
+        entry = self._entries.get(_owner_key(pat))
+        return entry.get("version") if entry else None
+
+    def invalidate(self, pat: Optional[str] = None) -> None:
+        self._load()
+        if pat is None:
+            self._entries.clear()
+        else:
+            self._entries.pop(_owner_key(pat), None)
+        self._save()
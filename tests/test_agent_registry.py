@@ -0,0 +1,109 @@
+import asyncio
+import time
+
+from mnemosyne.agents import orchestrator, registry
+
+
+def _agent(name, delay, timeout=5.0, fail=False):
+    async def handler(request):
+        await asyncio.sleep(delay)
+        if fail:
+            raise RuntimeError("boom")
+        request.trace.append(f"{name} done")
+        return {"content": [f"{name} answer"], "structured": {"from": name}}
+
+    return registry.Agent(name, handler, timeout=timeout)
+
+
+def test_dispatch_runs_agents_concurrently_with_timeouts(monkeypatch):
+    agents = {"a": _agent("a", 0.2), "b": _agent("b", 0.2), "slow": _agent("slow", 1.0, timeout=0.1), "bad": _agent("bad", 0, fail=True)}
+    monkeypatch.setattr(registry, "_agents", agents)
+    request = registry.AgentRequest("hi", on_token=lambda token: None)
+    start = time.perf_counter()
+    records = asyncio.run(registry.dispatch(["a", "b", "slow", "bad", "missing"], request))
+    assert time.perf_counter() - start < 0.35
+    assert [r["agent"] for r in records] == ["a", "b", "slow", "bad"]
+    assert records[0]["result"]["content"] == ["a answer"]
+    assert records[2]["error"] == "timed out after 0.1s"
+    assert records[3]["error"] == "boom"
+    merged = registry.merge(records)
+    assert merged["content"][:4] == ["## a", "a answer", "## b", "b answer"]
+    assert "slow agent failed: timed out after 0.1s" in merged["content"][4]
+    assert merged["structured"] == {"a": {"from": "a"}, "b": {"from": "b"}}
+
+
+def test_act_node_merges_several_routes(monkeypatch):
+    monkeypatch.setattr(registry, "_agents", {"a": _agent("a", 0), "b": _agent("b", 0)})
+    state = {"prompt": "hi", "provider": "azure", "owner": None, "repo": None, "route": "a", "routes": ["a", "b"],
+             "result": {}, "trace": [], "on_token": None}
+    final = asyncio.run(orchestrator.act_node(state))
+    assert final["result"]["content"] == ["## a", "a answer", "## b", "b answer"]
+    assert "a done" in final["trace"] and "b done" in final["trace"]
+
+    state.update(routes=["b"], trace=[])
+    assert asyncio.run(orchestrator.act_node(state))["result"] == {"content": ["b answer"], "structured": {"from": "b"}}
+
+
+def test_git_agent_runs_only_requested_commands_and_caps_output(monkeypatch):
+    from mnemosyne.agents import formatters, git_agent
+    from mnemosyne.mcp import git_server
+
+    assert git_agent._operations("show the diff") == ["diff"]
+    assert git_agent._operations("what changed in git?") == ["status"]
+    assert git_agent._operations("git status and local branches") == ["status", "branches"]
+
+    calls = []
+    monkeypatch.setattr(git_server, "diff_impl", lambda repo_dir: calls.append("diff") or {"ok": True, "stdout": "+x\n" * 10000})
+    monkeypatch.setattr(git_server, "status_impl", lambda repo_dir: calls.append("status") or {"ok": True, "stdout": ""})
+    result = asyncio.run(git_agent._handle(registry.AgentRequest("git diff please")))
+    assert calls == ["diff"]
+    (block,) = result["content"]
+    assert block.startswith("$ git diff\n+x\n") and len(block) < formatters.MAX_PAYLOAD_CHARS + 100
+    assert "[truncated" in block
+
+
+def test_prompt_parts_reach_their_agents(monkeypatch):
+    seen = {}
+
+    def agent(name):
+        async def handler(request):
+            seen[name] = request.prompt
+            return {"content": [name]}
+
+        return registry.Agent(name, handler)
+
+    monkeypatch.setattr(registry, "_agents", {"a": agent("a"), "b": agent("b")})
+    asyncio.run(registry.dispatch(["a", "b"], registry.AgentRequest("first and second"), {"a": "first"}))
+    assert seen == {"a": "first", "b": "first and second"}
+
+
+def test_doc_agent_stream_stops_when_it_times_out(monkeypatch):
+    from langchain_core.messages import AIMessageChunk
+
+    from mnemosyne.agents import doc_agent
+    from mnemosyne.ai_rag import rag
+
+    closed = []
+
+    class StalledStream:
+        async def astream(self, messages, **kwargs):
+            try:
+                yield AIMessageChunk("one ")
+                await asyncio.sleep(10)
+                yield AIMessageChunk("two")
+            finally:
+                closed.append(True)
+
+    monkeypatch.setattr(rag, "_qa_llm", StalledStream)
+    monkeypatch.setattr(rag, "_cached_answer", lambda *args: (None, None, None))
+    monkeypatch.setattr(rag, "_qa_messages", lambda llm, query, *args: query)
+    tokens = []
+
+    async def main():
+        agent = registry.Agent("doc", doc_agent._handle, timeout=0.1)
+        record = await registry._run_one(agent, registry.AgentRequest("q", on_token=tokens.append))
+        return record, list(closed)
+
+    record, closed_in_time = asyncio.run(main())
+    assert record["error"] == "timed out after 0.1s"
+    assert tokens == ["one "] and closed_in_time == [True]
@@ -0,0 +1,43 @@
+import json
+import os
+import subprocess
+import sys
+import time
+
+# Modules that must only be imported by the subcommands that need them.
+HEAVY_MODULES = [
+    "langchain",
+    "langchain_core",
+    "langchain_community",
+    "langchain_openai",
+    "langchain_google_genai",
+    "langchain_huggingface",
+    "langgraph",
+    "faiss",
+    "torch",
+    "sentence_transformers",
+    "mcp",
+    "fastmcp",
+    "keyring",
+]
+
+# Cold `mnemo --help` budget in seconds; override on slow machines.
+HELP_BUDGET = float(os.getenv("MNEMO_HELP_BUDGET", "1.5"))
+
+
+def test_cli_import_does_not_load_heavy_dependencies():
+    code = (
+        "import json, sys, mnemosyne.main; "
+        f"print(json.dumps([m for m in {HEAVY_MODULES!r} if m in sys.modules]))"
+    )
+    out = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True)
+    assert json.loads(out.stdout.strip().splitlines()[-1]) == []
+
+
+def test_cold_help_stays_within_budget():
+    timings = []
+    for _ in range(3):
+        start = time.perf_counter()
+        subprocess.run([sys.executable, "-m", "mnemosyne", "--help"], capture_output=True, check=True)
+        timings.append(time.perf_counter() - start)
+    assert min(timings) < HELP_BUDGET, f"mnemo --help took {min(timings):.2f}s (budget {HELP_BUDGET}s)"
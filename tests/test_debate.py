@@ -0,0 +1,72 @@
+import asyncio
+
+from langchain_core.messages import AIMessage
+
+from mnemosyne.ai_rag import debate
+
+
+class SlowLLM:
+    """Answers every prompt after ``delay`` seconds, echoing the role it was asked to play.
+
+    ``peak`` is the most calls that were ever in flight at once.
+    """
+
+    def __init__(self, delay: float):
+        self.delay = delay
+        self.prompts = []
+        self.batches = []
+        self.in_flight = 0
+        self.peak = 0
+
+    async def ainvoke(self, prompt, **kwargs):
+        self.prompts.append(prompt)
+        self.in_flight += 1
+        self.peak = max(self.peak, self.in_flight)
+        try:
+            await asyncio.sleep(self.delay)
+        finally:
+            self.in_flight -= 1
+        return AIMessage(prompt.split(" ", 2)[1].rstrip(","))
+
+    async def abatch(self, prompts, config=None, return_exceptions=False, **kwargs):
+        self.batches.append(len(prompts))
+        return await asyncio.gather(*(self.ainvoke(p, **kwargs) for p in prompts))
+
+
+def test_researchers_run_in_parallel_and_feed_the_summarizer(monkeypatch):
+    llm = SlowLLM(0.1)
+    monkeypatch.setattr(debate, "_llm", lambda: llm)
+    result = debate.run_debate("Is tabs better than spaces?", researchers=3)
+    # Three researchers at once, then summarizer, critic and consensus: four rounds, not six.
+    assert len(llm.prompts) == 6 and llm.peak == 3
+    assert llm.batches == [3, 1, 1, 1]
+    assert result["researcher_output"].count("researcher") == 3
+    assert result["consensus_output"] == "balanced"
+    assert debate.get_graph(3) is debate.get_graph(3)
+
+
+def test_batch_of_topics_is_bounded_by_concurrency(monkeypatch):
+    llm = SlowLLM(0.05)
+    monkeypatch.setattr(debate, "_llm", lambda: llm)
+    finished = []
+    results = debate.run_debates([f"topic {i}" for i in range(4)], concurrency=2, researchers=1,
+                                 on_result=lambda i, r: finished.append(i))
+    assert [r["question"] for r in results] == [f"topic {i}" for i in range(4)]
+    assert sorted(finished) == [0, 1, 2, 3]
+    # Each debate makes one call at a time, so the peak is the number of debates in flight.
+    assert len(llm.prompts) == 16 and llm.peak == 2
+
+
+def test_default_debate_uses_one_researcher_and_bad_topic_file_exits_cleanly(monkeypatch, tmp_path):
+    from typer.testing import CliRunner
+
+    from mnemosyne.ai_rag.cli import doc_app
+
+    llm = SlowLLM(0)
+    monkeypatch.setattr(debate, "_llm", lambda: llm)
+    debate.run_debate("Is tabs better than spaces?")
+    assert len(llm.prompts) == 4
+
+    result = CliRunner().invoke(doc_app, ["init-debate", "--from-file", str(tmp_path / "missing.txt")])
+    assert result.exit_code == 1
+    assert "Could not read" in result.output
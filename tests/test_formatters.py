@@ -0,0 +1,71 @@
+import asyncio
+import json
+
+from mnemosyne.agents import formatters, github_agent
+
+ISSUES = [
+    {"number": 12, "state": "open", "title": "Crash on load", "user": {"login": "ada"}, "updated_at": "2024-05-01"},
+    {"number": 9, "state": "closed", "title": "Typo in README", "user": {"login": "linus"}, "updated_at": "2024-04-02"},
+]
+
+
+def test_registry_picks_formatter_by_tool_and_shape():
+    text = formatters.format_result("list_issues", [ISSUES])
+    lines = text.splitlines()
+    assert lines[0].split() == ["#", "state", "title", "author", "updated"]
+    assert "Crash on load" in lines[2] and "ada" in lines[2]
+
+    repos = {"total_count": 120, "items": [{"full_name": "octo/cli", "stargazers_count": 7, "language": "Go", "description": "x"}]}
+    text = formatters.format_result("search_repositories", [repos])
+    assert "octo/cli" in text and text.endswith("… 119 more")
+    assert "octo/cli" in formatters.format_result("list_starred_repositories", [repos["items"]])
+    # Other tools that merely mention repositories keep their own columns.
+    tree = formatters.format_result("get_repository_tree", [[{"path": "README.md", "type": "blob"}]])
+    assert tree.splitlines()[0].split() == ["path", "type"]
+    # Pull request sub-resources are not pull request listings.
+    reviews = [{"id": 80, "user": {"login": "ada"}, "state": "APPROVED", "body": "LGTM", "submitted_at": "2024-05-02"}]
+    text = formatters.format_result("get_pull_request_reviews", [reviews])
+    assert text.splitlines()[0].split() == ["state", "id", "body", "submitted_at"]
+    assert "APPROVED" in text and "head" not in text
+
+    # Unknown tools still get a table or key/value view, never raw JSON.
+    assert formatters.format_result("get_me", [{"login": "ada", "plan": {"name": "pro"}}]) == "login: ada\nplan: pro"
+    assert formatters.shape_of("plain") == "text" and formatters.format_result("x", ["done"]) == "done"
+
+
+def test_cap_payload_bounds_large_listings():
+    rows = [{"number": i, "title": "t" * 50} for i in range(1000)]
+    capped = formatters.cap_payload(rows, limit=2000)
+    assert len(capped) < 2100
+    assert "items omitted" in capped
+    assert json.loads(capped.split("\n[")[0])[0]["number"] == 0
+    assert formatters.cap_payload({"a": 1}) == json.dumps({"a": 1}, indent=1)
+
+
+def test_format_node_skips_llm_unless_opted_in(monkeypatch):
+    def no_llm(provider):
+        raise AssertionError("the LLM should not be used")
+
+    monkeypatch.setattr(github_agent, "_llm", no_llm)
+    state = {
+        "prompt": "list issues", "owner": None, "repo": None, "plan": {"tool": "list_issues"}, "trace": [],
+        "llm_provider": "azure", "result": {"content": [ISSUES], "structured": None}, "on_token": None, "llm_format": False,
+    }
+    out = asyncio.run(github_agent.format_node(state, "azure"))
+    assert out["result"]["content"] == formatters.format_result("list_issues", [ISSUES])
+    assert out["trace"] == ["GitHub: formatted result locally"]
+
+
+def test_format_node_renders_each_step_of_a_multi_step_plan():
+    records = [
+        {"id": "s1", "tool": "list_issues", "arguments": {"owner": "octo", "repo": "cli"}, "content": [ISSUES], "structured": None},
+        {"id": "s2", "tool": "list_issues", "arguments": {"owner": "octo", "repo": "web", "state": "OPEN"}, "error": "Not Found"},
+    ]
+    state = {
+        "prompt": "list issues in cli and web", "owner": None, "repo": None, "plan": {"steps": records}, "trace": [],
+        "llm_provider": "azure", "result": {"content": records, "structured": None}, "on_token": None, "llm_format": False,
+    }
+    text = asyncio.run(github_agent.format_node(state, "azure"))["result"]["content"]
+    first, second = text.split("\n\n")
+    assert first.startswith("## list_issues octo/cli\n") and "Crash on load" in first
+    assert second == '## list_issues octo/web {"state": "OPEN"}\nerror: Not Found'
@@ -0,0 +1,66 @@
+import pytest
+
+from mnemosyne import llm
+
+
+@pytest.fixture(autouse=True)
+def _fresh_registry(monkeypatch):
+    llm.clear_cache()
+    built = []
+    monkeypatch.setattr(llm, "_build", lambda provider, model, temperature: built.append((provider, model, temperature)) or object())
+    yield built
+    llm.clear_cache()
+
+
+def test_models_are_cached_per_provider_model_and_temperature(monkeypatch, _fresh_registry):
+    monkeypatch.setenv("AZURE_OPENAI_ENDPOINT", "https://example.openai.azure.com")
+    monkeypatch.setenv("AZURE_OPENAI_KEY", "k")
+    router, provider = llm.get_chat_model("azure", temperature=0.0)
+    again, _ = llm.get_chat_model("AZURE", temperature=0.0)
+    planner, _ = llm.get_chat_model("azure", temperature=0.2)
+    assert provider == "azure"
+    assert router is again
+    assert planner is not router
+    assert len(_fresh_registry) == 2
+
+
+def test_azure_falls_back_to_gemini_once(monkeypatch):
+    monkeypatch.delenv("AZURE_OPENAI_ENDPOINT", raising=False)
+    monkeypatch.setenv("GOOGLE_API_KEY", "g")
+    assert llm.get_chat_model("azure")[1] == "gemini"
+    # Later credential changes do not flip the decision mid-process.
+    monkeypatch.setenv("AZURE_OPENAI_ENDPOINT", "https://example.openai.azure.com")
+    monkeypatch.setenv("AZURE_OPENAI_KEY", "k")
+    assert llm.resolve_provider("azure") == "gemini"
+
+
+def test_missing_credentials_raise(monkeypatch):
+    monkeypatch.delenv("AZURE_OPENAI_ENDPOINT", raising=False)
+    monkeypatch.delenv("GOOGLE_API_KEY", raising=False)
+    with pytest.raises(RuntimeError):
+        llm.get_chat_model("azure")
+
+
+def test_streamed_format_matches_blocking_result(monkeypatch):
+    import asyncio
+
+    from langchain_core.language_models.fake_chat_models import GenericFakeChatModel
+    from langchain_core.messages import AIMessage
+
+    from mnemosyne.agents import github_agent
+
+    answer = "- octo/one: 3 stars\n- octo/two: 5 stars"
+    monkeypatch.setattr(github_agent, "_llm", lambda provider: (GenericFakeChatModel(messages=iter([AIMessage(answer)])), "azure"))
+
+    def run(on_token):
+        state = {
+            "prompt": "list repos", "owner": None, "repo": None, "plan": {}, "trace": [], "llm_provider": "azure",
+            "result": {"content": [{"name": "one"}, {"name": "two"}], "structured": {"total": 2}}, "on_token": on_token,
+            "llm_format": True,
+        }
+        return asyncio.run(github_agent.format_node(state, "azure"))["result"]
+
+    tokens = []
+    streamed = run(tokens.append)
+    assert len(tokens) > 1 and "".join(tokens) == answer
+    assert streamed == run(None) == {"content": answer, "structured": {"total": 2}}
@@ -0,0 +1,125 @@
+import asyncio
+import time
+
+import pytest
+from langchain_core.messages import AIMessage
+
+from mnemosyne import llm_batch
+
+
+class ResourceExhausted(Exception):
+    """Named like google.api_core's 429 exception."""
+
+
+class FakeProvider:
+    """Chat model stand-in whose abatch records batch sizes and can reject the first calls with 429."""
+
+    def __init__(self, rate_limited: int = 0, delay: float = 0.01):
+        self.batches = []
+        self.in_flight = 0
+        self.peak = 0
+        self.rate_limited = rate_limited
+        self.delay = delay
+
+    async def _one(self, prompt):
+        self.in_flight += 1
+        self.peak = max(self.peak, self.in_flight)
+        await asyncio.sleep(self.delay)
+        self.in_flight -= 1
+        if self.rate_limited:
+            self.rate_limited -= 1
+            return ResourceExhausted("429 Resource has been exhausted")
+        if prompt == "bad":
+            return ValueError("bad prompt")
+        return AIMessage(prompt.upper())
+
+    async def abatch(self, prompts, config=None, return_exceptions=False, **kwargs):
+        self.batches.append(len(prompts))
+        return await asyncio.gather(*(self._one(p) for p in prompts))
+
+
+def test_concurrent_requests_share_one_batch():
+    provider = FakeProvider()
+
+    async def main():
+        texts = await asyncio.gather(*(llm_batch.abatched_text(provider, f"q{i}") for i in range(5)))
+        return texts, llm_batch.stats(provider)
+
+    texts, stats = asyncio.run(main())
+    assert texts == [f"Q{i}" for i in range(5)]
+    assert provider.batches == [5]
+    assert stats == {"calls": 5, "batches": 1, "rate_limited": 0}
+
+
+def test_rate_limited_requests_are_retried_and_errors_stay_per_request():
+    provider = FakeProvider(rate_limited=2)
+    batcher = None
+
+    async def main():
+        nonlocal batcher
+        batcher = llm_batch.RequestBatcher(provider, window_ms=5, backoff_s=0.01)
+        return await asyncio.gather(batcher.ainvoke("a"), batcher.ainvoke("b"), batcher.ainvoke("bad"), return_exceptions=True)
+
+    a, b, bad = asyncio.run(main())
+    assert (a.content, b.content) == ("A", "B")
+    assert isinstance(bad, ValueError)
+    assert provider.batches == [3, 2] and batcher.rate_limited == 2
+
+
+def test_budgets_and_backpressure_bound_the_request_rate():
+    provider = FakeProvider(delay=0.05)
+
+    async def main():
+        # 120 requests/minute allows a burst of 20, then two per second.
+        batcher = llm_batch.RequestBatcher(provider, window_ms=1, max_batch=4, rpm=120, max_pending=2)
+        start = time.perf_counter()
+        await asyncio.gather(*(batcher.ainvoke(str(i)) for i in range(6)))
+        return time.perf_counter() - start
+
+    elapsed = asyncio.run(main())
+    assert provider.peak <= 2  # never more than max_pending outstanding
+    assert elapsed >= 0.15
+
+
+def test_token_budget_waits_for_refill():
+    budget = llm_batch._Budget(per_minute=600)  # ten per second
+    budget.available = 0
+
+    async def main():
+        start = time.perf_counter()
+        await budget.take(2)
+        return time.perf_counter() - start
+
+    assert asyncio.run(main()) == pytest.approx(0.2, abs=0.1)
+    assert llm_batch.request_tokens("x" * 40, {"generation_config": {"max_output_tokens": 80}}) == 90
+
+
+def test_fresh_and_idle_budgets_allow_only_a_small_burst():
+    budget = llm_batch._Budget(per_minute=600)
+    assert budget.available == 100
+    budget.updated -= 3600  # an hour idle refills the burst, not the whole minute
+
+    async def main():
+        await budget.take(40)
+
+    asyncio.run(main())
+    assert budget.available == pytest.approx(60, abs=1)
+
+
+def test_only_rate_limit_errors_are_retried():
+    class StatusError(Exception):
+        def __init__(self, message, status_code):
+            super().__init__(message)
+            self.status_code = status_code
+
+    class ChatGoogleGenerativeAIError(Exception):
+        pass
+
+    assert llm_batch._is_rate_limited(StatusError("slow down", 429))
+    assert llm_batch._is_rate_limited(ResourceExhausted("quota"))
+    assert llm_batch._is_rate_limited(ChatGoogleGenerativeAIError("429 Resource has been exhausted (e.g. check quota)."))
+    wrapped = RuntimeError("batch failed")
+    wrapped.__cause__ = StatusError("too many requests", 429)
+    assert llm_batch._is_rate_limited(wrapped)
+    assert not llm_batch._is_rate_limited(StatusError("429 in the prompt", 400))
+    assert not llm_batch._is_rate_limited(ValueError("could not parse line 429: rate limit field missing"))
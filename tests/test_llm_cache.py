@@ -0,0 +1,64 @@
+import asyncio
+
+import pytest
+from langchain_core.messages import AIMessage
+
+from mnemosyne import llm, llm_cache
+
+
+class CountingLLM:
+    def __init__(self):
+        self.calls = 0
+
+    async def ainvoke(self, messages, **kwargs):
+        self.calls += 1
+        return AIMessage(f"answer {self.calls}")
+
+
+@pytest.fixture()
+def cache(monkeypatch, tmp_path):
+    llm.clear_cache()
+    monkeypatch.setattr(llm, "_build", lambda provider, model, temperature: CountingLLM())
+    monkeypatch.setenv("GOOGLE_API_KEY", "g")
+    monkeypatch.delenv("MNEMO_LLM_CACHE", raising=False)
+    store = llm_cache.ResponseCache(tmp_path / "responses.sqlite")
+    monkeypatch.setattr(llm_cache, "get_response_cache", lambda: store)
+    yield store
+    llm.clear_cache()
+
+
+def test_deterministic_calls_are_answered_from_cache(cache):
+    model, _ = llm.get_chat_model("gemini", temperature=0.0)
+    messages = [("system", "route"), ("user", "list my PRs")]
+    first = asyncio.run(llm_cache.acomplete(model, messages))
+    second = asyncio.run(llm_cache.acomplete(model, messages))
+    other = asyncio.run(llm_cache.acomplete(model, [("user", "something else")]))
+    assert (first.text, first.cached) == ("answer 1", False)
+    assert (second.text, second.cached) == ("answer 1", True)
+    assert other.text == "answer 2"
+    assert model.calls == 2
+    stats = cache.stats()
+    assert (stats["entries"], stats["hits"], stats["misses"]) == (2, 1, 2)
+    cache.clear()
+    assert cache.stats()["entries"] == 0
+
+
+def test_sampled_and_unknown_models_bypass_cache(cache):
+    sampled, _ = llm.get_chat_model("gemini", temperature=0.7)
+    loose = CountingLLM()
+    for model in (sampled, loose):
+        asyncio.run(llm_cache.acomplete(model, "hi"))
+        asyncio.run(llm_cache.acomplete(model, "hi"))
+        assert model.calls == 2
+    assert cache.stats()["entries"] == 0
+
+
+def test_least_recently_used_entries_are_evicted(tmp_path):
+    store = llm_cache.ResponseCache(tmp_path / "small.sqlite", max_bytes=10)
+    store.put("a", "m", "aaaa")
+    store.put("b", "m", "bbbb")
+    assert store.get("a") == "aaaa"  # "b" is now the least recently used
+    store.put("c", "m", "cccc")
+    assert store.get("b") is None
+    assert store.get("a") == "aaaa"
+    assert store.stats()["bytes"] <= 10
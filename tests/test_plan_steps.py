@@ -0,0 +1,55 @@
+import asyncio
+import time
+
+import pytest
+
+from mnemosyne.agents import plan_steps
+
+
+def test_single_call_plans_become_one_step():
+    assert plan_steps.normalize({"tool": "list_issues", "arguments": {"repo": "cli"}}) == [
+        {"id": "s1", "tool": "list_issues", "arguments": {"repo": "cli"}, "after": []}
+    ]
+    with pytest.raises(plan_steps.PlanError, match="cycle"):
+        plan_steps.normalize({"steps": [{"id": "a", "tool": "x", "after": ["b"]}, {"id": "b", "tool": "y", "after": "a"}]})
+    with pytest.raises(plan_steps.PlanError, match="unknown"):
+        plan_steps.normalize({"steps": [{"id": "a", "tool": "x", "arguments": {"n": "$missing.number"}}]})
+
+
+def test_independent_steps_run_concurrently_within_the_limit():
+    running = []
+    peak = []
+
+    async def call(tool, args):
+        running.append(tool)
+        peak.append(len(running))
+        await asyncio.sleep(0.05)
+        running.remove(tool)
+        return {"content": [{"repo": args["repo"]}], "structured": None}
+
+    steps = plan_steps.normalize({"steps": [{"tool": "list_pull_requests", "arguments": {"repo": f"r{i}"}} for i in range(6)]})
+    start = time.perf_counter()
+    records = asyncio.run(plan_steps.run(steps, call, concurrency=3))
+    elapsed = time.perf_counter() - start
+    assert [r["content"][0]["repo"] for r in records] == [f"r{i}" for i in range(6)]
+    assert max(peak) == 3 and elapsed < 0.25
+
+
+def test_dependent_steps_receive_earlier_results_and_skip_after_failures():
+    async def call(tool, args):
+        if tool == "search_repositories":
+            return {"content": [{"items": [{"name": "cli", "owner": {"login": "octo"}}]}]}
+        if tool == "broken":
+            raise RuntimeError("boom")
+        return {"content": [args]}
+
+    plan = {"steps": [
+        {"id": "find", "tool": "search_repositories", "arguments": {"query": "cli"}},
+        {"id": "prs", "tool": "list_pull_requests", "arguments": {"owner": "$find.items.0.owner.login", "repo": "$find.items.0.name"}},
+        {"id": "bad", "tool": "broken"},
+        {"id": "after_bad", "tool": "list_issues", "after": ["bad"]},
+    ]}
+    records = asyncio.run(plan_steps.run(plan_steps.normalize(plan), call))
+    assert records[1]["content"] == [{"owner": "octo", "repo": "cli"}]
+    assert records[2]["error"] == "boom"
+    assert records[3]["error"] == "skipped: step(s) bad failed"
@@ -0,0 +1,371 @@
+import os
+import threading
+
+import pytest
+from langchain_core.documents import Document
+from langchain_core.embeddings import DeterministicFakeEmbedding
+
+from mnemosyne.ai_rag import chunk_store, daemon, rag
+
+DOCS = [
+    Document(page_content="FAISS stores dense vectors", metadata={"source": "a.md"}),
+    Document(page_content="Typer builds the command line", metadata={"source": "b.md"}),
+]
+
+
+@pytest.fixture
+def index_dir(tmp_path, monkeypatch):
+    embeddings = DeterministicFakeEmbedding(size=32)
+    monkeypatch.setattr(rag, "get_embeddings", lambda: embeddings)
+    monkeypatch.setenv("MNEMO_RAG_SOCKET", str(tmp_path / "rag.sock"))
+    monkeypatch.setattr(rag, "_stores", {})
+    path = str(tmp_path / "index")
+    rag.build_vectorstore(DOCS, index_dir=path, embeddings=embeddings)
+    return path
+
+
+def test_loaded_index_is_reused_until_it_changes(index_dir):
+    first = rag.load_vectorstore(index_dir)
+    assert rag.load_vectorstore(index_dir) is first
+    hits = rag.retrieve("Typer builds the command line", k=1, index_dir=index_dir)
+    assert hits[0].metadata["source"] == "b.md"
+
+
+def test_reload_keeps_old_store_readable_and_rejects_mismatched_files(index_dir, tmp_path):
+    import shutil
+
+    first = rag.load_vectorstore(index_dir)
+    more = DOCS + [Document(page_content="Gemini answers questions", metadata={"source": "c.md"})]
+    rag.build_vectorstore(more, index_dir=index_dir, embeddings=rag.get_embeddings())
+    os.utime(os.path.join(index_dir, chunk_store.INDEX_NAME))
+    second = rag.load_vectorstore(index_dir)
+    assert second is not first
+    # Readers still holding the superseded store keep working.
+    assert first.documents([0])[0].page_content == "FAISS stores dense vectors"
+    # New chunks next to an old index with the same vector count, as after a crash between the two renames.
+    other = str(tmp_path / "other")
+    swapped = [Document(page_content=f"unrelated {i}", metadata={}) for i in range(3)]
+    rag.build_vectorstore(swapped, index_dir=other, embeddings=rag.get_embeddings())
+    shutil.copy(os.path.join(other, chunk_store.INDEX_NAME), os.path.join(index_dir, chunk_store.INDEX_NAME))
+    with pytest.raises(ValueError, match="inconsistent"):
+        chunk_store.MappedStore(index_dir, rag.get_embeddings())
+
+
+@pytest.mark.skipif(not daemon.supported(), reason="Unix sockets unavailable")
+def test_retrieve_goes_through_running_daemon(index_dir):
+    server = daemon._Server(str(daemon.socket_path()), daemon._Handler)
+    server.index_dir = os.path.abspath(index_dir)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        hits = daemon.query("FAISS stores dense vectors", k=1, index_dir=index_dir)
+        assert hits == [{"page_content": "FAISS stores dense vectors", "metadata": {"source": "a.md"}}]
+        # A daemon serving another index is ignored so callers fall back in-process.
+        assert daemon.query("x", k=1, index_dir=index_dir + "-other") is None
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+@pytest.mark.skipif(not daemon.supported(), reason="Unix sockets unavailable")
+def test_serve_keeps_live_daemon_and_replaces_stale_socket(index_dir):
+    import socket
+
+    path = daemon.socket_path()
+    server = daemon._Server(str(path), daemon._Handler)
+    server.index_dir = os.path.abspath(index_dir) + "-other"
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        with pytest.raises(RuntimeError, match="already listening"):
+            daemon.serve(index_dir)
+        assert path.exists()
+    finally:
+        server.shutdown()
+        server.server_close()
+    path.unlink()
+    stale = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    stale.bind(str(path))
+    stale.close()
+    assert path.exists() and not daemon.alive()
+
+
+def test_incremental_load_only_embeds_changed_files(tmp_path):
+    from mnemosyne.ai_rag import indexer
+
+    docs = tmp_path / "docs"
+    docs.mkdir()
+    (docs / "a.md").write_text("alpha notes", encoding="utf-8")
+    (docs / "b.md").write_text("beta notes", encoding="utf-8")
+    (docs / "skip.bin").write_bytes(b"\x00")
+    index_dir = str(tmp_path / "index")
+    loads = []
+
+    def get_embeddings():
+        loads.append(1)
+        return DeterministicFakeEmbedding(size=16)
+
+    first = indexer.update_index(str(docs), index_dir, get_embeddings)
+    assert (first["added"], first["chunks"]) == (2, 2)
+
+    unchanged = indexer.update_index(str(docs), index_dir, get_embeddings)
+    assert unchanged["unchanged"] == 2 and unchanged["chunks"] == 0
+    assert len(loads) == 1  # nothing changed, so the model was never loaded
+
+    (docs / "a.md").write_text("alpha notes, revised", encoding="utf-8")
+    (docs / "b.md").unlink()
+    (docs / "c.md").write_text("gamma notes", encoding="utf-8")
+    stats = indexer.update_index(str(docs), index_dir, get_embeddings)
+    assert {k: stats[k] for k in ("added", "changed", "removed", "chunks")} == {"added": 1, "changed": 1, "removed": 1, "chunks": 2}
+
+    store = chunk_store.load(index_dir, DeterministicFakeEmbedding(size=16))
+    texts = sorted(d.page_content for d in store.docstore._dict.values())
+    assert texts == ["alpha notes, revised", "gamma notes"]
+    manifest = indexer.load_manifest(index_dir)
+    assert store.index.ntotal == sum(len(e["chunk_ids"]) for e in manifest["files"].values())
+
+
+def test_parallel_loader_streams_every_file(tmp_path):
+    from mnemosyne.ai_rag import doc_loader
+
+    paths = []
+    for i in range(5):
+        p = tmp_path / f"f{i}.txt"
+        p.write_text(f"file number {i}", encoding="utf-8")
+        paths.append(str(p))
+    loaded = dict(doc_loader.iter_loaded(paths, workers=2))
+    assert sorted(loaded) == sorted(paths)
+    assert all(chunks[0].page_content.startswith("file number") for chunks in loaded.values())
+
+
+def test_interrupted_load_resumes_from_checkpoint(tmp_path):
+    from mnemosyne.ai_rag import indexer
+
+    docs = tmp_path / "docs"
+    docs.mkdir()
+    (docs / "a.md").write_text("short file", encoding="utf-8")
+    (docs / "b.md").write_text("\n\n".join(f"paragraph {i} " + "word " * 120 for i in range(3)), encoding="utf-8")
+    index_dir = str(tmp_path / "index")
+
+    class Interrupting(DeterministicFakeEmbedding):
+        calls: int = 0
+
+        def embed_documents(self, texts):
+            self.calls += 1
+            if self.calls == 3:
+                raise KeyboardInterrupt
+            return super().embed_documents(texts)
+
+    with pytest.raises(KeyboardInterrupt):
+        indexer.update_index(str(docs), index_dir, lambda: Interrupting(size=16), batch_size=1, checkpoint_every=1)
+    manifest = indexer.load_manifest(index_dir)
+    assert [os.path.basename(p) for p in manifest["files"]] == ["a.md"]
+    assert len(next(iter(manifest["pending"].values()))["chunk_ids"]) == 1
+
+    stats = indexer.update_index(str(docs), index_dir, lambda: DeterministicFakeEmbedding(size=16), batch_size=2)
+    # The chunk stored before the interruption is kept; only the other two are embedded.
+    assert (stats["unchanged"], stats["added"], stats["chunks"]) == (1, 1, 2)
+    assert stats["chunks_per_sec"] > 0
+    store = chunk_store.load(index_dir, DeterministicFakeEmbedding(size=16))
+    assert store.index.ntotal == 4
+    assert not indexer.load_manifest(index_dir)["pending"]
+
+
+def test_ann_index_types_build_and_benchmark(tmp_path):
+    import numpy as np
+
+    from mnemosyne.ai_rag import ann, indexer
+
+    docs = tmp_path / "docs"
+    docs.mkdir()
+    for i in range(60):
+        (docs / f"n{i}.md").write_text(f"note {i} about topic {i % 7}", encoding="utf-8")
+    index_dir = str(tmp_path / "index")
+    embed = lambda: DeterministicFakeEmbedding(size=16)
+
+    indexer.update_index(str(docs), index_dir, embed, index_type="ivf-flat", train_size=50, batch_size=8)
+    store = chunk_store.load(index_dir, embed())
+    assert ann.index_kind(store.index) == "ivf-flat" and store.index.ntotal == 60
+    assert indexer.load_manifest(index_dir)["index_type"] == "ivf-flat"
+
+    # Deleting from an IVF index rebuilds it rather than corrupting id mapping.
+    (docs / "n0.md").unlink()
+    stats = indexer.update_index(str(docs), index_dir, embed)
+    assert stats["rebuilt"] == 1
+    store = chunk_store.load(index_dir, embed())
+    assert store.index.ntotal == 59
+
+    # An interrupted load into an IVF index resumes instead of rebuilding.
+    (docs / "long.md").write_text("\n\n".join(f"paragraph {i} " + "word " * 120 for i in range(3)), encoding="utf-8")
+
+    class Interrupting(DeterministicFakeEmbedding):
+        calls: int = 0
+
+        def embed_documents(self, texts):
+            self.calls += 1
+            if self.calls == 2:
+                raise KeyboardInterrupt
+            return super().embed_documents(texts)
+
+    with pytest.raises(KeyboardInterrupt):
+        indexer.update_index(str(docs), index_dir, lambda: Interrupting(size=16), batch_size=1, checkpoint_every=1)
+    assert indexer.load_manifest(index_dir)["pending"]
+    stats = indexer.update_index(str(docs), index_dir, embed)
+    assert "rebuilt" not in stats and stats["chunks"] == 2
+    assert chunk_store.load(index_dir, embed()).index.ntotal == 62
+    assert "note 0 about" not in {d.page_content for d in store.docstore._dict.values()}
+
+    vectors = np.random.default_rng(1).random((500, 16), dtype="float32")
+    rows = ann.benchmark(vectors, vectors[:20], k=5, kinds=["flat", "ivf-pq", "hnsw"], train_size=400)
+    assert [r["index"] for r in rows] == ["flat", "ivf-pq", "hnsw"]
+    assert rows[0]["recall_at_k"] == 1.0
+    assert all(0 <= r["recall_at_k"] <= 1 and r["p99_ms"] >= r["p50_ms"] for r in rows)
+
+
+def test_embedding_cache_skips_model_for_seen_chunks(tmp_path):
+    from mnemosyne.ai_rag.embedding_cache import CachedEmbeddings, EmbeddingCache
+
+    calls = []
+
+    class Counting(DeterministicFakeEmbedding):
+        def embed_documents(self, texts):
+            calls.append(list(texts))
+            return super().embed_documents(texts)
+
+    cache = EmbeddingCache(tmp_path / "emb.sqlite")
+    first = CachedEmbeddings(lambda: Counting(size=8), "model-a", cache)
+    vectors = first.embed_documents(["license header", "readme", "license header"])
+    assert calls == [["license header", "readme"]]
+    assert vectors[0] == vectors[2]
+
+    later = CachedEmbeddings(lambda: Counting(size=8), "model-a", EmbeddingCache(tmp_path / "emb.sqlite"))
+    assert later.embed_documents(["readme", "license header"]) == [vectors[1], vectors[0]]
+    assert later._model is None and later.hits == 2  # the model was never loaded
+    other_model = CachedEmbeddings(lambda: Counting(size=8), "model-b", cache)
+    other_model.embed_documents(["readme"])
+    assert calls[-1] == ["readme"]
+
+
+def test_index_is_pickle_free_and_memory_mapped(index_dir):
+    assert sorted(os.listdir(index_dir)) == ["chunks.sqlite", "index.faiss"]
+    store = rag.load_vectorstore(index_dir)
+    assert isinstance(store, chunk_store.MappedStore)
+    hits = store.similarity_search("FAISS stores dense vectors", k=5)
+    assert [d.metadata["source"] for d in hits][:1] == ["a.md"] and len(hits) == 2
+
+    writable = chunk_store.load(index_dir, DeterministicFakeEmbedding(size=32))
+    assert sorted(d.page_content for d in writable.docstore._dict.values()) == sorted(d.page_content for d in DOCS)
+
+    legacy = os.path.join(os.path.dirname(index_dir), "legacy")
+    os.makedirs(legacy)
+    open(os.path.join(legacy, "index.pkl"), "wb").close()
+    with pytest.raises(FileNotFoundError, match="old pickle format"):
+        rag.load_vectorstore(legacy)
+
+
+def test_hybrid_mode_finds_exact_identifiers(tmp_path, monkeypatch):
+    embeddings = DeterministicFakeEmbedding(size=32)
+    monkeypatch.setattr(rag, "get_embeddings", lambda: embeddings)
+    monkeypatch.setenv("MNEMO_RAG_SOCKET", str(tmp_path / "rag.sock"))
+    monkeypatch.setattr(rag, "_stores", {})
+    docs = [Document(page_content=f"general note number {i}", metadata={"source": f"n{i}.md"}) for i in range(30)]
+    docs.append(Document(page_content="load_manifest raises ERR_4021 when the file is corrupt", metadata={"source": "errors.md"}))
+    index_dir = str(tmp_path / "index")
+    rag.build_vectorstore(docs, index_dir=index_dir, embeddings=embeddings)
+
+    query = "what does ERR_4021 mean"
+    assert [d.metadata["source"] for d in rag.retrieve(query, k=1, index_dir=index_dir, mode="keyword")] == ["errors.md"]
+    # The BM25 winner ranks with the best vector hit even when vectors alone miss it.
+    assert "errors.md" in [d.metadata["source"] for d in rag.retrieve(query, k=2, index_dir=index_dir, mode="hybrid")]
+    assert chunk_store.rrf([[1, 2, 3], [3, 9]])[:2] == [3, 1]
+    with pytest.raises(ValueError, match="Unknown retrieval mode"):
+        rag.retrieve(query, index_dir=index_dir, mode="fuzzy")
+
+    rows = {r["mode"]: r for r in rag.retrieval_benchmark([(query, "errors.md")], max_k=31, index_dir=index_dir)}
+    assert rows["hybrid"]["mean_k"] <= 2 and rows["hybrid"]["hit_rate"] == 1.0
+    assert rows["hybrid"]["mean_prompt_tokens"] <= rows["vector"]["mean_prompt_tokens"]
+
+
+def test_answer_cache_threshold_ttl_and_lru(tmp_path, monkeypatch):
+    from mnemosyne.ai_rag import answer_cache
+
+    cache = answer_cache.AnswerCache(tmp_path / "answers.sqlite", threshold=0.9, ttl=60, max_entries=2)
+    cache.put("v1", "how do I load docs?", [1.0, 0.0, 0.0], "run mnemo doc load")
+    hit = cache.lookup("v1", [0.99, 0.05, 0.0])
+    assert hit["answer"] == "run mnemo doc load" and hit["similarity"] > 0.9
+    assert cache.lookup("v1", [0.0, 1.0, 0.0]) is None  # not similar enough
+    assert cache.lookup("v2", [1.0, 0.0, 0.0]) is None  # index changed
+
+    cache.put("v1", "second", [0.0, 1.0, 0.0], "b")
+    cache.lookup("v1", [1.0, 0.0, 0.0])  # touch the first entry
+    cache.put("v1", "third", [0.0, 0.0, 1.0], "c")
+    assert cache.lookup("v1", [0.0, 1.0, 0.0]) is None  # least recently used was evicted
+    assert cache.stats()["entries"] == 2
+
+    now = answer_cache.time.time()
+    monkeypatch.setattr(answer_cache.time, "time", lambda: now + 120)
+    assert cache.lookup("v1", [1.0, 0.0, 0.0]) is None  # expired
+    stats = cache.stats()
+    assert (stats["hits"], stats["misses"]) == (2, 4)
+
+
+def test_cached_answer_skips_retrieval_and_llm(index_dir, tmp_path, monkeypatch):
+    from mnemosyne.ai_rag import answer_cache
+
+    cache = answer_cache.AnswerCache(tmp_path / "answers.sqlite")
+    monkeypatch.setattr(rag, "get_answer_cache", lambda: cache)
+    question = "What stores dense vectors?"
+    scope = f"{rag.index_version(index_dir)}:vector:4"
+    cache.put(scope, question, rag.embed_query(question), "FAISS does.")
+    monkeypatch.setattr(rag, "WarmRetriever", None)  # any retrieval/LLM path would fail
+    answer = rag.query_vectorstore(question, index_dir=index_dir)
+    assert answer["result"] == "FAISS does." and answer["cached"]
+
+
+def test_doc_ask_streams_the_same_answer(index_dir, monkeypatch):
+    from langchain_core.language_models.fake_chat_models import GenericFakeChatModel
+    from langchain_core.messages import AIMessage
+
+    monkeypatch.setattr(rag, "_qa_llm", lambda: GenericFakeChatModel(messages=iter([AIMessage("FAISS stores the vectors.")] * 2)))
+    tokens = []
+    streamed = rag.query_vectorstore("Where are vectors?", index_dir=index_dir, use_cache=False, on_token=tokens.append)
+    assert len(tokens) > 1 and "".join(tokens) == streamed["result"] == "FAISS stores the vectors."
+    assert rag.query_vectorstore("Where are vectors?", index_dir=index_dir, use_cache=False) == streamed
+
+
+def test_doc_ask_from_file_answers_every_question_in_order(index_dir, monkeypatch):
+    import itertools
+
+    from langchain_core.language_models.fake_chat_models import GenericFakeChatModel
+    from langchain_core.messages import AIMessage
+
+    llm = GenericFakeChatModel(messages=itertools.cycle([AIMessage("FAISS stores the vectors.")]))
+    monkeypatch.setattr(rag, "_qa_llm", lambda: llm)
+    questions = ["Where are vectors?", "What is FAISS?", "How are chunks split?"]
+    answers = rag.query_many(questions, index_dir=index_dir, use_cache=False, concurrency=2)
+    assert [a["query"] for a in answers] == questions
+    assert {a["result"] for a in answers} == {"FAISS stores the vectors."}
+
+
+def test_query_many_overlaps_retrieval_and_batches_llm_calls(index_dir, monkeypatch):
+    import time
+
+    from langchain_core.messages import AIMessage
+
+    class BatchLLM:
+        batches = []
+
+        async def abatch(self, inputs, config=None, return_exceptions=False, **kwargs):
+            self.batches.append(len(inputs))
+            return [AIMessage("answer") for _ in inputs]
+
+    def slow_messages(llm, query, k, index_dir, mode):
+        time.sleep(0.2)  # embedding + retrieval, CPU bound in real use
+        return query
+
+    llm = BatchLLM()
+    monkeypatch.setattr(rag, "_qa_llm", lambda: llm)
+    monkeypatch.setattr(rag, "_qa_messages", slow_messages)
+    answers = rag.query_many(["a", "b", "c"], index_dir=index_dir, use_cache=False, concurrency=3)
+    assert [a["result"] for a in answers] == ["answer"] * 3
+    assert sum(llm.batches) == 3 and len(llm.batches) < 3  # coalesced, not one call per question
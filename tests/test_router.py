@@ -0,0 +1,65 @@
+import asyncio
+
+from mnemosyne.agents import orchestrator, router
+
+
+def _router():
+    r = router.KeywordRouter(threshold=0.5)
+    r.register("github", {"github": 1.0, "pull request": 1.0, "issue": 0.6, "repository": 0.6, "tag": 0.4, "release": 0.4})
+    r.register("docs", {"document": 0.8, "release": 0.4})
+    return r
+
+
+def test_keywords_match_whole_words_and_plurals():
+    r = _router()
+    assert r.score("summarize the stage directions").route == "default"
+    decision = r.score("list open Pull  Requests and issues")
+    assert decision.route == "github"
+    assert decision.confidence == 1.0
+    assert sorted(decision.matches) == ["issue", "pull request"]
+    assert r.score("list my repositories").matches == ["repository"]
+    assert r.route("search repositories about langchain").route == "github"
+
+
+def test_low_confidence_and_ties_defer_to_llm():
+    r = _router()
+    assert r.route("list tags") is None  # weak keyword alone
+    assert r.score("release notes").confidence == 0.0  # two routes tie
+    assert r.route("tags on github").route == "github"
+    assert "- docs:" in r.llm_prompt()
+
+
+def test_classify_uses_keyword_guess_without_llm(monkeypatch):
+    def unavailable(provider):
+        raise RuntimeError("no credentials")
+
+    monkeypatch.setattr(orchestrator, "_llm", unavailable)
+
+    def classify(prompt):
+        state = {"prompt": prompt, "provider": "azure", "trace": [], "route": ""}
+        return asyncio.run(orchestrator.classify_node(state))
+
+    assert classify("show open pull requests")["route"] == "github"
+    assert classify("list the tags")["route"] == "github"
+    assert classify("write a haiku about the stage")["route"] == "default"
+    report = router.benchmark(router.get_router(), router.SAMPLE_CASES)
+    assert report["precision"] == 1.0
+
+
+def test_several_agents_only_for_joined_asks():
+    r = router.get_router()
+    for prompt in ("list open pull requests in the docs repo", "show the diff for PR 12", "git log of the main branch on github"):
+        assert r.matching(prompt) == ["github"], prompt
+    assert r.matching("show my uncommitted changes and open pull requests") == ["git", "github"]
+    assert r.matching("what does the runbook say about deploys, and are there open issues on github") == ["github", "doc"]
+
+
+def test_each_joined_ask_routes_on_its_own():
+    r = router.get_router()
+    prompt = "show git status and list open issues in octo/cli"
+    assert r.matching(prompt) == ["git", "github"]
+    assert r.split(prompt, ["git", "github"]) == {"git": "show git status", "github": "list open issues in octo/cli"}
+    # Context no route claims goes to every agent; a route with no piece of its own gets the whole prompt.
+    assert r.split("for octo/cli, show uncommitted changes and open pull requests", ["git", "github"]) == {
+        "git": "for octo/cli, show uncommitted changes", "github": "for octo/cli, open pull requests"}
+    assert r.split("hello there", ["git"]) == {"git": "hello there"}
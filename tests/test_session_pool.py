@@ -0,0 +1,69 @@
+import asyncio
+from contextlib import asynccontextmanager
+
+from mcp.server.fastmcp import FastMCP
+from mcp.shared.memory import create_connected_server_and_client_session
+
+from mnemosyne.mcp import github_client
+from mnemosyne.mcp.session_pool import SessionPool
+from mnemosyne.mcp.tool_catalog import ToolCatalog
+
+
+def _stand_in_pool(**kwargs) -> SessionPool:
+    server = FastMCP("stand-in")
+
+    @server.tool()
+    def echo(text: str) -> str:
+        return text
+
+    @server.tool()
+    def list_repositories() -> list:
+        return [{"name": "mnemosyne"}]
+
+    @asynccontextmanager
+    async def connect(pat: str):
+        assert pat == "pat-123"
+        async with create_connected_server_and_client_session(server._mcp_server) as session:
+            yield session
+
+    return SessionPool(connect, **kwargs)
+
+
+def test_github_client_reuses_one_session(monkeypatch):
+    pool = _stand_in_pool()
+    monkeypatch.setattr(github_client, "_pool", pool)
+    monkeypatch.setattr(github_client, "_catalog", ToolCatalog(github_client._fetch_tools_full))
+
+    async def scenario():
+        names = await github_client.list_tools("pat-123")
+        meta = await github_client.list_tools_full("pat-123")
+        result = await github_client.call_tool("pat-123", "echo", {"text": "hi"})
+        await github_client.close_sessions()
+        return names, meta, result
+
+    names, meta, result = asyncio.run(scenario())
+    assert sorted(names) == ["echo", "list_repositories"]
+    assert meta["echo"]["inputSchema"]["required"] == ["text"]
+    assert result["content"] == ["hi"]
+    assert pool.connects == 1
+    assert pool.stats()["open"] == 0
+
+
+def test_pool_evicts_idle_and_reconnects_dead_sessions():
+    async def scenario():
+        pool = _stand_in_pool(idle_timeout=0.0)
+        async with pool.session("pat-123") as session:
+            await session.send_ping()
+        async with pool.session("pat-123") as session:
+            await session.send_ping()
+        assert pool.connects == 2  # idle entry evicted before reuse
+
+        pool.idle_timeout = 300.0
+        entry = pool._entries["pat-123"]
+        await entry.close()  # simulate the server dropping the connection
+        tools = await pool.run("pat-123", lambda s: s.list_tools(), retry=True)
+        assert pool.connects == 3
+        await pool.aclose()
+        return [t.name for t in tools.tools]
+
+    assert "echo" in asyncio.run(scenario())
@@ -0,0 +1,33 @@
+import asyncio
+
+from mnemosyne.mcp import tool_bench
+
+META = {
+    "get_me": {"inputSchema": {}},
+    "list_notifications": {"inputSchema": {"properties": {}}},
+    "list_issues": {"inputSchema": {"required": ["owner", "repo"]}},
+    "list_copilot_spaces": {"inputSchema": {}},
+}
+
+
+def test_tools_run_concurrently_with_latency_and_payload_stats():
+    in_flight = []
+    peak = []
+
+    async def call(name, args):
+        if name == "list_copilot_spaces":
+            raise RuntimeError("No Copilot spaces found")
+        in_flight.append(name)
+        peak.append(len(in_flight))
+        await asyncio.sleep(0.05)
+        in_flight.remove(name)
+        return {"content": [{"login": "ada"}]}
+
+    rows = asyncio.run(tool_bench.run(META, call, concurrency=4, repeat=2))
+    assert [r["tool"] for r in rows] == ["get_me", "list_copilot_spaces", "list_issues", "list_notifications"]
+    assert max(peak) == 2  # both runnable tools in flight together
+    ok = rows[0]
+    assert ok["status"] == "ok" and ok["calls"] == 2 and ok["payload_bytes"] == len('[{"login": "ada"}]')
+    assert 40 < ok["min_ms"] <= ok["p50_ms"] <= ok["p99_ms"]
+    assert rows[1]["status"] == "skipped" and rows[1]["detail"] == "no Copilot spaces available"
+    assert rows[2]["detail"] == "requires parameters: owner, repo" and rows[2]["calls"] == 0
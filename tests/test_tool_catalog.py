@@ -0,0 +1,40 @@
+import asyncio
+
+from mnemosyne.mcp.tool_catalog import ToolCatalog, catalog_version
+
+
+TOOLS = {"list_issues": {"description": "List issues", "inputSchema": {"required": ["owner", "repo"]}, "title": None}}
+
+
+def test_catalog_serves_warm_runs_from_disk(tmp_path):
+    calls = []
+
+    async def fetch(pat):
+        calls.append(pat)
+        return dict(TOOLS)
+
+    path = tmp_path / "github_tools.json"
+    first = ToolCatalog(fetch, path, ttl=60)
+    assert asyncio.run(first.get("pat-1")) == TOOLS
+    assert asyncio.run(first.get("pat-1")) == TOOLS
+    assert len(calls) == 1
+    assert "pat-1" not in path.read_text()
+
+    # A new process sees the on-disk copy and plans with zero round trips.
+    warm = ToolCatalog(fetch, path, ttl=60)
+    assert asyncio.run(warm.get("pat-1")) == TOOLS
+    assert len(calls) == 1
+    assert warm.version("pat-1") == catalog_version(TOOLS)
+
+
+def test_catalog_refetches_after_ttl_and_tracks_version(tmp_path):
+    listings = [dict(TOOLS), {**TOOLS, "get_me": {"description": None, "inputSchema": {}, "title": None}}]
+
+    async def fetch(pat):
+        return listings.pop(0)
+
+    catalog = ToolCatalog(fetch, tmp_path / "c.json", ttl=0)
+    asyncio.run(catalog.get("pat-1"))
+    before = catalog.version("pat-1")
+    assert "get_me" in asyncio.run(catalog.get("pat-1"))
+    assert catalog.version("pat-1") != before
@@ -0,0 +1,126 @@
+from mnemosyne.agents.tool_selector import PlannerMemory, ToolSelector, benchmark, fill_arguments, template
+
+REPO = {"type": "object", "properties": {"owner": {"type": "string"}, "repo": {"type": "string"}}, "required": ["owner", "repo"]}
+TOOLS = {
+    "list_issues": {"description": "List issues in a GitHub repository.", "inputSchema": {
+        **REPO, "properties": {**REPO["properties"], "state": {"type": "string", "enum": ["OPEN", "CLOSED"]}}}},
+    "get_pull_request": {"description": "Get details of a specific pull request.", "inputSchema": {
+        "properties": {**REPO["properties"], "pullNumber": {"type": "number"}}, "required": ["owner", "repo", "pullNumber"]}},
+    "list_pull_requests": {"description": "List pull requests in a GitHub repository.", "inputSchema": REPO},
+    "list_branches": {"description": "List branches in a GitHub repository", "inputSchema": REPO},
+    "get_me": {"description": "Get details of the authenticated GitHub user.", "inputSchema": {}},
+    "search_code": {"description": "Search for code across GitHub repositories", "inputSchema": {"required": ["query"]}},
+}
+
+
+def test_confident_prompts_are_planned_without_the_llm():
+    selector = ToolSelector(TOOLS)
+    plan = selector.select("list open issues", "octo", "cli")
+    assert plan["tool"] == "list_issues" and plan["source"] == "catalog"
+    assert plan["arguments"] == {"owner": "octo", "repo": "cli", "state": "OPEN"}
+    assert selector.select("get PR #5 in ada/site")["arguments"] == {"owner": "ada", "repo": "site", "pullNumber": 5}
+    # Vague prompts and unfillable required arguments go to the LLM.
+    assert selector.select("what changed recently?", "octo", "cli") is None
+    assert selector.select("search code for the retry helper") is None
+    assert fill_arguments('find "retry"', {"required": ["query"]}, None, None) == {"query": "retry"}
+
+
+def test_slash_phrases_do_not_override_the_repository():
+    # Context wins over slash phrases that are not repositories.
+    assert fill_arguments("list open issues about CI/CD", REPO, "octo", "cli") == {"owner": "octo", "repo": "cli"}
+    assert fill_arguments("list branches for read/write access", REPO, "octo", "cli") == {"owner": "octo", "repo": "cli"}
+    assert fill_arguments("list pull requests created 2024/05", REPO, "octo", "cli") == {"owner": "octo", "repo": "cli"}
+    # Without context they are not taken as owner/repo; a different real repo goes to the LLM.
+    for prompt in ("list open issues about CI/CD", "list branches for read/write access", "list pull requests created 2024/05"):
+        assert fill_arguments(prompt, REPO, None, None) is None
+    selector = ToolSelector(TOOLS)
+    assert selector.select("list branches in ada/site", "octo", "cli") is None
+    assert selector.select("list branches in octo/cli", "octo", "cli")["arguments"] == {"owner": "octo", "repo": "cli"}
+
+
+def test_apostrophes_are_not_quotes():
+    schema = {"required": ["query"]}
+    assert fill_arguments("search Ada's code for \"retry\"", schema, None, None) == {"query": "retry"}
+    assert fill_arguments("find 'retry helper' in the code", schema, None, None) == {"query": "retry helper"}
+    assert fill_arguments("find what's in the users' code", schema, None, None) is None
+    assert template("don't list Ada's issues") == "don't list ada's issues"
+
+
+def test_unparsed_constraints_go_to_the_llm():
+    selector = ToolSelector(TOOLS)
+    for prompt in ("list issues labeled bug", "list issues assigned to me", "list pull requests that aren't merged",
+                   "list open issues about CI/CD"):
+        assert selector.select(prompt, "octo", "cli") is None, prompt
+        assert selector.unexplained(prompt, selector.rank(prompt)[0][0], {"owner": "octo", "repo": "cli"})
+    assert selector.select("list the closed issues", "octo", "cli")["arguments"]["state"] == "CLOSED"
+
+
+def test_learned_prompts_take_the_fast_path(tmp_path):
+    memory = PlannerMemory(tmp_path / "memory.json")
+    selector = ToolSelector(TOOLS, memory)
+    assert selector.select("who am i") is None
+    memory.record("who am i", "get_me")
+    assert template("issue #12 in octo/cli") == template("issue 7 in ada/site") == "issue <n> in <repo>"
+
+    reloaded = ToolSelector(TOOLS, PlannerMemory(tmp_path / "memory.json"))
+    plan = reloaded.select("Who am I")
+    assert plan == {"tool": "get_me", "arguments": {}, "confidence": 1.0, "source": "learned"}
+
+    # Learned matches need the same margin as catalog ones.
+    memory.record("latest activity", "get_me")
+    memory.record("latest activity", "list_branches")
+    assert ToolSelector(TOOLS, memory).select("latest activity", "octo", "cli") is None
+
+
+def test_benchmark_reports_hit_rate_and_saved_latency():
+    cases = [("list branches", "list_branches"), ("list pull requests", "list_pull_requests"), ("what changed?", "list_issues")]
+    report = benchmark(ToolSelector(TOOLS), cases, "octo", "cli", llm_ms=[800.0, 900.0, 700.0])
+    assert report["hits"] == 2 and report["hit_rate"] == 0.667 and report["precision"] == 1.0
+    assert 1690 < report["saved_ms"] <= 1700
+    assert report["rows"][2]["tool"] is None
+
+
+def test_planner_prompt_lists_relevant_tools_with_compact_schemas():
+    from mnemosyne.agents import planner_prompt
+
+    assert planner_prompt.compact_schema(TOOLS["list_issues"]["inputSchema"]) == "owner*: str, repo*: str, state: OPEN|CLOSED"
+    system, shown = planner_prompt.build(ToolSelector(TOOLS), "get PR #5", "octo", "cli", top_n=2)
+    assert shown == ["get_pull_request", "list_pull_requests"]
+    assert "- get_pull_request(owner*: str, repo*: str, pullNumber*: num): Get details of a specific pull request" in system
+    assert "list_branches" not in system and "owner=octo repo=cli" in system
+    # A weak match keeps the other names available to the model.
+    system, _ = planner_prompt.build(ToolSelector(TOOLS), "what changed?", top_n=2)
+    assert "Other tools" in system and "search_code" in system
+
+
+def test_only_successful_llm_plans_are_remembered(monkeypatch, tmp_path):
+    import asyncio
+
+    from mnemosyne.agents import github_agent, tool_selector
+
+    memory = PlannerMemory(tmp_path / "memory.json")
+    monkeypatch.setattr(tool_selector, "get_memory", lambda: memory)
+    monkeypatch.setattr(github_agent, "_get_pat", lambda: "pat")
+
+    async def tools(pat, refresh=False):
+        return TOOLS
+
+    monkeypatch.setattr(github_agent, "list_tools_full", tools)
+    outcome = {}
+
+    async def call(pat, tool, args):
+        return outcome
+
+    monkeypatch.setattr(github_agent, "gh_call_tool", call)
+
+    def act(planned_by, result):
+        outcome.clear()
+        outcome.update(result)
+        state = {"prompt": "who am i", "plan": {"tool": "get_me", "arguments": {}}, "trace": [], "planned_by": planned_by}
+        return asyncio.run(github_agent.act_node(state))
+
+    act("local", {"content": [{"login": "ada"}]})
+    assert "MCP tool reported an error" in act("llm", {"content": ["Bad credentials"], "isError": True})["trace"][-1]
+    assert memory.templates() == {}
+    act("llm", {"content": [{"login": "ada"}]})
+    assert memory.templates() == {"get_me": {"who am i": 1}}